@@ -0,0 +1,302 @@
+"""
+Deterioration alerts computed incrementally as readings are inserted.
+
+Each user has one alert_state row: a running EWMA of systolic and diastolic
+pressure, time-decayed regression sums for the systolic slope and a ring
+buffer of the latest readings by time. insert_health_records updates it in
+constant time per reading, in the insert transaction, and records an alert
+when a rule starts to hold. An episode raises one alert: the rule has to
+clear before it alerts again. History is read only once, to build the state
+of a user who has readings but no (or an outdated) state row; after that
+continuous home monitor ingestion costs the same on the first day and after
+years.
+
+Readings may arrive out of time order (backfills, newest-first imports):
+they enter the averages with the decay their age calls for and take their
+place in the ring buffer by time, and readings older than
+ALERT_MAX_AGE_DAYS update the state without raising alerts.
+"""
+
+import bisect
+import datetime
+import json
+import math
+
+# ACOG blood pressure limits (mmHg) and proteinuria limit (g/day)
+HYPERTENSION_SYSTOLIC = 140
+HYPERTENSION_DIASTOLIC = 90
+SEVERE_SYSTOLIC = 160
+SEVERE_DIASTOLIC = 110
+PROTEINURIA = 0.3
+PREECLAMPSIA_FROM_WEEK = 20
+
+# Consecutive hypertensive readings that make a sustained episode
+SUSTAINED_READINGS = 3
+RING_SIZE = 5
+EWMA_ALPHA = 0.3
+
+# Systolic slope (mmHg per week) that counts as rising, once the EWMA is
+# already above RISING_FROM_SYSTOLIC; older readings lose half their weight
+# in the regression every SLOPE_HALF_LIFE_DAYS
+RISING_SLOPE_PER_WEEK = 5
+RISING_FROM_SYSTOLIC = 130
+SLOPE_HALF_LIFE_DAYS = 7
+# The regression needs this much (decayed) weight, spread over at least
+# SLOPE_MIN_SPREAD_DAYS (weighted standard deviation of the reading times)
+SLOPE_MIN_WEIGHT = 3
+SLOPE_MIN_SPREAD_DAYS = 0.5
+
+# Readings recorded longer ago than this (backfills, imported history) are
+# folded into the state but never raise an alert
+ALERT_MAX_AGE_DAYS = 7
+
+SEVERITIES = ('medium', 'high')
+
+# Bumped whenever the state layout changes; older states are rebuilt from history
+STATE_VERSION = 2
+
+
+def _new_state():
+    """Alert state of a user without readings"""
+    return {
+        'version': STATE_VERSION,
+        'readings': 0,
+        'day': None,
+        'ewma_systolic': None,
+        'ewma_diastolic': None,
+        # Decayed sums w, u, uu, y, uy of the systolic regression, with u the
+        # time in days relative to `day` (the latest reading)
+        'slope_sums': [0.0, 0.0, 0.0, 0.0, 0.0],
+        # [day, systolic, diastolic] of the latest RING_SIZE readings, oldest first
+        'recent': [],
+        'active': []
+    }
+
+
+def _day(recorded_at):
+    """Days since the epoch of a recorded_at value (now, in UTC, when missing or unparseable)"""
+    try:
+        moment = datetime.datetime.fromisoformat(str(recorded_at)[:19]) if recorded_at else None
+    except ValueError:
+        moment = None
+    moment = moment or datetime.datetime.utcnow()
+    return (moment - datetime.datetime(1970, 1, 1)).total_seconds() / 86400
+
+
+def _decay(days):
+    """Regression weight left to a reading ``days`` older than the latest one"""
+    return math.exp(-days * math.log(2) / SLOPE_HALF_LIFE_DAYS)
+
+
+def _update_state(state, systolic, diastolic, day):
+    """Fold one reading into the state"""
+    state['readings'] += 1
+
+    # A reading older than the latest one counts with the weight it would
+    # have had, had it arrived in time order
+    late = state['day'] is not None and day < state['day']
+    weight = _decay(state['day'] - day) if late else 1.0
+
+    if state['ewma_systolic'] is None:
+        state['ewma_systolic'], state['ewma_diastolic'] = float(systolic), float(diastolic)
+    else:
+        alpha = EWMA_ALPHA * weight
+        state['ewma_systolic'] += alpha * (systolic - state['ewma_systolic'])
+        state['ewma_diastolic'] += alpha * (diastolic - state['ewma_diastolic'])
+
+    w, u, uu, y, uy = state['slope_sums']
+    offset = 0.0
+    if state['day'] is None:
+        state['day'] = day
+    elif late:
+        # Add it at its place in time, relative to the latest reading
+        offset = day - state['day']
+    elif day > state['day']:
+        # Move the time origin to the new reading, then decay the old ones
+        delta = day - state['day']
+        uu = uu - 2 * delta * u + delta * delta * w
+        u = u - delta * w
+        uy = uy - delta * y
+        decay = _decay(delta)
+        w, u, uu, y, uy = w * decay, u * decay, uu * decay, y * decay, uy * decay
+        state['day'] = day
+    state['slope_sums'] = [w + weight, u + weight * offset, uu + weight * offset * offset,
+                           y + weight * systolic, uy + weight * offset * systolic]
+
+    recent = state['recent']
+    position = bisect.bisect_right([reading[0] for reading in recent], day)
+    recent.insert(position, [day, systolic, diastolic])
+    del recent[:-RING_SIZE]
+
+
+def systolic_slope_per_week(state):
+    """Time-decayed least-squares systolic slope in mmHg per week, or None while undefined"""
+    w, u, uu, y, uy = state['slope_sums']
+    if w < SLOPE_MIN_WEIGHT:
+        return None
+    spread = w * uu - u * u
+    if spread <= 0 or spread / (w * w) < SLOPE_MIN_SPREAD_DAYS ** 2:
+        return None
+    return (w * uy - u * y) / spread * 7
+
+
+def _hypertensive(systolic, diastolic):
+    """Whether a reading is at or above the hypertension limits"""
+    return systolic >= HYPERTENSION_SYSTOLIC or diastolic >= HYPERTENSION_DIASTOLIC
+
+
+def _evaluate(state, params):
+    """(alert_type, severity, message, details) for every rule that holds after a reading"""
+    systolic, diastolic = params['systolic_bp'], params['diastolic_bp']
+    found = []
+
+    if systolic >= SEVERE_SYSTOLIC or diastolic >= SEVERE_DIASTOLIC:
+        found.append(('severe_hypertension', 'high',
+                      f'Severe-range blood pressure {systolic}/{diastolic} mmHg', {}))
+
+    if (_hypertensive(systolic, diastolic) and params['protein_urine'] >= PROTEINURIA
+            and params['gestational_week'] >= PREECLAMPSIA_FROM_WEEK):
+        found.append(('preeclampsia_warning', 'high',
+                      f"Blood pressure {systolic}/{diastolic} mmHg with proteinuria "
+                      f"{params['protein_urine']} at week {params['gestational_week']}",
+                      {'protein_urine': params['protein_urine'], 'gestational_week': params['gestational_week']}))
+
+    recent = [reading[1:] for reading in state['recent'][-SUSTAINED_READINGS:]]
+    if len(recent) == SUSTAINED_READINGS and all(_hypertensive(*reading) for reading in recent):
+        found.append(('sustained_hypertension', 'medium',
+                      f'{SUSTAINED_READINGS} consecutive readings at or above '
+                      f'{HYPERTENSION_SYSTOLIC}/{HYPERTENSION_DIASTOLIC} mmHg',
+                      {'readings': recent}))
+
+    slope = systolic_slope_per_week(state)
+    if slope is not None and slope >= RISING_SLOPE_PER_WEEK and state['ewma_systolic'] >= RISING_FROM_SYSTOLIC:
+        found.append(('rising_blood_pressure', 'medium',
+                      f'Systolic pressure rising {slope:.1f} mmHg/week '
+                      f"(average {state['ewma_systolic']:.0f} mmHg)",
+                      {'slope_per_week': round(slope, 2), 'ewma_systolic': round(state['ewma_systolic'], 1)}))
+    return found
+
+
+def _fold(state, user_id, record_id, params, recorded_at, day, now_day, emit=True):
+    """Fold one reading into the state and return the alerts it raises.
+
+    Readings older than ALERT_MAX_AGE_DAYS only update the state; they do
+    not start or end episodes.
+    """
+    _update_state(state, params['systolic_bp'], params['diastolic_bp'], day)
+    if now_day - day > ALERT_MAX_AGE_DAYS:
+        return []
+
+    new_alerts = []
+    holding = set()
+    for alert_type, severity, message, details in _evaluate(state, params):
+        holding.add(alert_type)
+        if alert_type in state['active'] or not emit:
+            continue
+        new_alerts.append({
+            'user_id': user_id,
+            'record_id': record_id,
+            'alert_type': alert_type,
+            'severity': severity,
+            'message': message,
+            'details': details,
+            'recorded_at': recorded_at or datetime.datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+        })
+    state['active'] = sorted(holding)
+    return new_alerts
+
+
+def _rebuild_state(cursor, user_id, before_id, now_day, chunk_size=1000):
+    """State of a user's readings with ids below ``before_id``, folded in time order without alerts"""
+    state = _new_state()
+    rows = cursor.execute('''
+        SELECT id, systolic_bp, diastolic_bp, protein_urine, gestational_week, recorded_at
+        FROM health_records
+        WHERE user_id = ? AND id < ?
+        ORDER BY recorded_at, id
+    ''', (user_id, before_id))
+    while True:
+        chunk = rows.fetchmany(chunk_size)
+        if not chunk:
+            break
+        for record_id, systolic, diastolic, protein_urine, gestational_week, recorded_at in chunk:
+            params = {'systolic_bp': systolic, 'diastolic_bp': diastolic,
+                      'protein_urine': protein_urine or 0, 'gestational_week': gestational_week or 0}
+            _fold(state, user_id, record_id, params, recorded_at, _day(recorded_at), now_day, emit=False)
+    return state
+
+
+def update_alerts(cursor, user_id, record_ids, health_params_list, recorded_at_list=None):
+    """Fold newly inserted readings into the user's alert state and record new alerts.
+
+    Runs in the caller's transaction with one state read and one write per
+    call, whatever the user's history. A user with no state row, or one
+    written by an older STATE_VERSION, first has it rebuilt from their
+    earlier readings (once; existing users after an upgrade). Returns the
+    new alerts as dicts.
+    """
+    recorded_at_list = recorded_at_list or [None] * len(record_ids)
+    now_day = _day(None)
+    cursor.execute('SELECT state FROM alert_state WHERE user_id = ?', (user_id,))
+    row = cursor.fetchone()
+    state = json.loads(row[0]) if row else None
+    if state is None or state.get('version') != STATE_VERSION:
+        state = _rebuild_state(cursor, user_id, min(record_ids), now_day)
+
+    # Fold a batch in time order: imports may list the newest reading first
+    readings = sorted(
+        (_day(recorded_at), record_id, params, recorded_at)
+        for record_id, params, recorded_at in zip(record_ids, health_params_list, recorded_at_list)
+    )
+    new_alerts = []
+    for day, record_id, params, recorded_at in readings:
+        new_alerts.extend(_fold(state, user_id, record_id, params, recorded_at, day, now_day))
+
+    cursor.execute('''
+        INSERT INTO alert_state (user_id, state) VALUES (?, ?)
+        ON CONFLICT (user_id) DO UPDATE SET state = excluded.state, updated_at = CURRENT_TIMESTAMP
+    ''', (user_id, json.dumps(state)))
+
+    for alert in new_alerts:
+        cursor.execute('''
+            INSERT INTO alerts (user_id, record_id, alert_type, severity, message, details, recorded_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (user_id, alert['record_id'], alert['alert_type'], alert['severity'],
+              alert['message'], json.dumps(alert['details']), alert['recorded_at']))
+        alert['id'] = cursor.lastrowid
+    return new_alerts
+
+
+def fetch_alerts(conn, user_id=None, before_id=None, after_id=None, severity=None, limit=50):
+    """Alerts newest first; ``before_id`` pages back, ``after_id`` polls for newer ones"""
+    filters = []
+    params = []
+    if user_id is not None:
+        filters.append('user_id = ?')
+        params.append(user_id)
+    if before_id is not None:
+        filters.append('id < ?')
+        params.append(before_id)
+    if after_id is not None:
+        filters.append('id > ?')
+        params.append(after_id)
+    if severity:
+        filters.append('severity = ?')
+        params.append(severity)
+    where = f"WHERE {' AND '.join(filters)}" if filters else ''
+
+    columns = ['id', 'user_id', 'record_id', 'alert_type', 'severity', 'message', 'details',
+               'recorded_at', 'created_at']
+    rows = conn.execute(f'''
+        SELECT {', '.join(columns)} FROM alerts
+        {where}
+        ORDER BY id DESC
+        LIMIT ?
+    ''', params + [limit]).fetchall()
+
+    result = []
+    for row in rows:
+        alert = dict(zip(columns, row))
+        alert['details'] = json.loads(alert['details'] or '{}')
+        result.append(alert)
+    return result
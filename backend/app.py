@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, request, jsonify, send_file, stream_with_context
 from flask_cors import CORS
 import sqlite3
 import hashlib
@@ -6,121 +6,244 @@ import jwt
 import datetime
 from functools import wraps
 import os
-import io
 import json
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib import colors
-from ml_model.enhanced_risk_predictor import EnhancedRiskPredictor
+import base64
+import hmac
+import concurrent.futures
+import multiprocessing
+from ml_model.artifacts import ArtifactError
+from ml_model.registry import ModelRegistry
+from ml_model.batch_scheduler import MicroBatchScheduler
+from ml_model.inference_pool import InferencePool
+from database import ConnectionManager, database_path_from_url
+import migrations
+from records import (REQUIRED_HEALTH_FIELDS, RECORD_COLUMNS, health_params_from_record,
+                     insert_health_records, fetch_record_page, parse_recorded_at)
+import bulk_import
+import export
+import report_batch
+import rollups
+import alerts
+import events
+import trends
+from dashboard_cache import DashboardCache
+from report_jobs import ReportJobs
 from utils.pregnancy_tracker import PregnancyTracker
 from utils.health_recommendations import HealthRecommendations
 
+# `python app.py` runs this module as __main__, and the spawned inference and
+# report worker processes re-import it as __mp_main__. They only need its
+# imports: loading the model, starting pools and migrating happen once, in
+# the serving process
+IS_POOL_WORKER = __name__ == '__mp_main__'
+
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'maternal-health-secret-key-2024')
+app.config['MAX_BATCH_RECORDS'] = int(os.environ.get('MAX_BATCH_RECORDS', 1000))
+app.config['IMPORT_CHUNK_SIZE'] = int(os.environ.get('IMPORT_CHUNK_SIZE', 500))
+app.config['DATABASE_PATH'] = database_path_from_url(os.environ.get('DATABASE_URL', 'sqlite:///maternal_health.db'))
 CORS(app)
 
-# Initialize enhanced ML model and utilities
-try:
-    risk_predictor = EnhancedRiskPredictor()
-    print("Enhanced Risk Predictor initialized successfully!")
-except Exception as e:
-    print(f"Error initializing Enhanced Risk Predictor: {e}")
-    # Fallback to basic predictor if needed
-    from ml_model.risk_predictor import RiskPredictor
-    risk_predictor = RiskPredictor()
-    print("Fallback to basic Risk Predictor")
+# One long-lived WAL-mode connection per worker thread
+db = ConnectionManager(
+    app.config['DATABASE_PATH'],
+    busy_timeout_ms=int(os.environ.get('DATABASE_BUSY_TIMEOUT_MS', 5000))
+)
+
+# Serialized /api/dashboard responses per user, invalidated on every write;
+# DASHBOARD_CACHE_PATH adds a SQLite tier shared by all worker processes.
+# Without it other processes never see an invalidation, so entries expire
+# after DASHBOARD_CACHE_TTL seconds
+dashboard_cache = None
+if int(os.environ.get('DASHBOARD_CACHE_SIZE', 1024)) > 0:
+    dashboard_cache = DashboardCache(
+        max_size=int(os.environ.get('DASHBOARD_CACHE_SIZE', 1024)),
+        shared_path=os.environ.get('DASHBOARD_CACHE_PATH') or None,
+        ttl=None if os.environ.get('DASHBOARD_CACHE_PATH') else float(os.environ.get('DASHBOARD_CACHE_TTL', 10))
+    )
+
+# Server-Sent Events of each user's writes to their open /api/stream connections.
+# Every open stream holds a worker thread, so at most STREAM_THREAD_SHARE of
+# the WEB_THREADS threads (gunicorn --threads) serve streams; past that
+# /api/stream answers 503 and the dashboard polls instead
+event_hub = events.EventHub(
+    max_queue=int(os.environ.get('STREAM_QUEUE_SIZE', 32)),
+    max_subscribers_per_user=int(os.environ.get('STREAM_MAX_PER_USER', 5)),
+    max_subscribers=max(1, int(int(os.environ.get('WEB_THREADS', 8)) * float(os.environ.get('STREAM_THREAD_SHARE', 0.5))))
+)
+
+def on_user_data_changed(user_id, event_type=None, data=None):
+    """Call after committing a change to a user's records or profile; ``event_type`` streams it"""
+    if dashboard_cache is not None:
+        dashboard_cache.invalidate(user_id)
+    if event_type:
+        event_hub.publish(user_id, event_type, data or {})
+
+# Rendered PDF reports cached on disk per user, rendered by background threads
+report_jobs = ReportJobs(
+    db, os.environ.get('REPORT_CACHE_DIR', 'report_cache'),
+    max_workers=int(os.environ.get('REPORT_WORKERS', 2))
+)
+
+# Worker processes rendering admin batch report bundles, started by the first batch
+report_pool = report_batch.ReportPool(
+    db.path, report_jobs.report_dir,
+    max_workers=int(os.environ.get('REPORT_BATCH_PROCESSES', 0)) or None
+)
+
+@app.teardown_request
+def release_db_connection(exc):
+    """Roll back anything a failed request left open on this thread's connection"""
+    db.release()
+
+# Load the prebuilt enhanced ML model. Artifacts are produced at build time by
+# `python -m ml_model.train`; a missing or corrupted artifact set stops startup.
+# The registry hot-swaps newer versions without restarting the worker.
+model_registry = None
+if not IS_POOL_WORKER:
+    model_registry = ModelRegistry(
+        cache_size=int(os.environ.get('PREDICTION_CACHE_SIZE', 1024)),
+        poll_interval=float(os.environ.get('MODEL_POLL_INTERVAL', 30))
+    )
+    print(f"Enhanced Risk Predictor loaded (model version {model_registry.active.model_version})")
+
+app.config['INFERENCE_TIMEOUT'] = float(os.environ.get('INFERENCE_TIMEOUT', 5))
+
+# Optional out-of-process inference: forests are scored in a pool of warm
+# worker processes so request threads do not hold the GIL while they run
+inference_pool = None
+if os.environ.get('INFERENCE_BACKEND', 'thread') == 'process' and not IS_POOL_WORKER:
+    inference_pool = InferencePool(
+        max_workers=int(os.environ.get('INFERENCE_PROCESSES', 0)) or None,
+        version=model_registry.active.model_version,
+        cache_size=int(os.environ.get('PREDICTION_CACHE_SIZE', 1024))
+    )
+    # Start the workers and load the model in each now, not inside the first
+    # requests' INFERENCE_TIMEOUT, and likewise for each hot-swapped version
+    inference_pool.warm_up()
+    model_registry.before_swap = inference_pool.prepare
+    print(f"Inference pool warmed up ({inference_pool.max_workers} processes)")
+
+def predict_health_params_batch(health_params_list):
+    """Score many readings with the active model, in the process pool when it is enabled"""
+    risk_predictor = model_registry.active
+    if inference_pool is not None:
+        return inference_pool.predict_batch(
+            health_params_list, version=risk_predictor.model_version,
+            timeout=app.config['INFERENCE_TIMEOUT']
+        )
+    return risk_predictor.predict_comprehensive_batch(health_params_list)
+
+# Optional micro-batching: concurrent single-reading requests in threaded
+# workers are scored together in one vectorized forest pass
+inference_scheduler = None
+if os.environ.get('INFERENCE_MICROBATCH', '').lower() in ('1', 'true', 'yes'):
+    inference_scheduler = MicroBatchScheduler(
+        predict_health_params_batch,
+        max_batch_size=int(os.environ.get('MICROBATCH_MAX_SIZE', 32)),
+        max_wait_ms=float(os.environ.get('MICROBATCH_MAX_WAIT_MS', 2))
+    )
+
+def predict_health_params(health_params):
+    """Score one reading, through the micro-batching scheduler or process pool when enabled"""
+    if inference_scheduler is not None:
+        return inference_scheduler.predict(health_params, timeout=app.config['INFERENCE_TIMEOUT'])
+    if inference_pool is not None:
+        return predict_health_params_batch([health_params])[0]
+    return model_registry.active.predict_comprehensive(health_params)
 
 pregnancy_tracker = PregnancyTracker()
+
+def encode_json(data):
+    """Serialize data exactly as jsonify would; returns (etag, body)"""
+    body = app.json.response(data).get_data()
+    return hashlib.sha256(body).hexdigest(), body
+
+def serialized_json_response(etag, body, cache_control):
+    """Response for pre-serialized JSON with a strong ETag; 304 when the client already has it"""
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    return response.make_conditional(request)
+
+# Weekly guidance is static: serialize every week and the all-weeks bundle once
+GUIDANCE_CACHE_CONTROL = 'public, max-age=86400'
+guidance_responses = {
+    week: encode_json(pregnancy_tracker.get_weekly_guidance(week)) for week in range(1, 43)
+}
+guidance_bundle_response = encode_json({
+    'weeks': {str(week): pregnancy_tracker.get_weekly_guidance(week) for week in range(1, 43)}
+})
+invalid_guidance_response = encode_json(pregnancy_tracker.get_weekly_guidance(0))
 health_recommendations = HealthRecommendations()
 
 def init_db():
-    """Initialize SQLite database with required tables"""
-    conn = sqlite3.connect('maternal_health.db')
+    """Initialize SQLite database: apply schema migrations and create the demo user"""
+    conn = db.connection()
+    migrations.migrate(conn)
     cursor = conn.cursor()
     
-    # Users table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            email TEXT UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            name TEXT NOT NULL,
-            age INTEGER,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Health records table with additional parameters
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS health_records (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            systolic_bp INTEGER NOT NULL,
-            diastolic_bp INTEGER NOT NULL,
-            blood_sugar REAL NOT NULL,
-            body_weight REAL NOT NULL,
-            hemoglobin REAL NOT NULL,
-            heart_rate INTEGER DEFAULT 75,
-            protein_urine REAL DEFAULT 0.1,
-            age INTEGER DEFAULT 28,
-            gestational_week INTEGER DEFAULT 20,
-            risk_level TEXT NOT NULL,
-            detected_conditions TEXT DEFAULT '[]',
-            condition_details TEXT DEFAULT '{}',
-            recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users (id)
-        )
-    ''')
-    
-    # Pregnancy profiles table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS pregnancy_profiles (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            last_menstrual_period DATE NOT NULL,
-            expected_due_date DATE NOT NULL,
-            current_week INTEGER,
-            is_active BOOLEAN DEFAULT TRUE,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users (id)
-        )
-    ''')
-    
-    # Create demo user if it doesn't exist
+    # Create demo user if it doesn't exist (OR IGNORE: workers may start concurrently)
     cursor.execute('SELECT id FROM users WHERE email = ?', ('demo@maternalcare.ai',))
     if not cursor.fetchone():
         demo_password_hash = hashlib.sha256('demo123'.encode()).hexdigest()
         cursor.execute('''
-            INSERT INTO users (email, password_hash, name, age)
+            INSERT OR IGNORE INTO users (email, password_hash, name, age)
             VALUES (?, ?, ?, ?)
         ''', ('demo@maternalcare.ai', demo_password_hash, 'Demo User', 28))
     
     conn.commit()
-    conn.close()
+
+def user_id_from_authorization(token):
+    """User id of an Authorization header value - Modified for demo mode"""
+    # For demo purposes, allow access with demo-token or create a demo user
+    if not token or token == 'Bearer demo-token':
+        # Use a demo user ID
+        return 1
+    
+    try:
+        token = token.split(' ')[1]  # Remove 'Bearer ' prefix
+        data = jwt.decode(token, app.config['SECRET_KEY'], algorithms=['HS256'])
+        return data['user_id']
+    except:
+        # Fallback to demo user for invalid tokens
+        return 1
 
 def token_required(f):
     """Decorator for JWT token authentication - Modified for demo mode"""
     @wraps(f)
+    def decorated(*args, **kwargs):
+        current_user_id = user_id_from_authorization(request.headers.get('Authorization'))
+        return f(current_user_id, *args, **kwargs)
+    return decorated
+
+def stream_token_required(f):
+    """token_required that also accepts ?access_token=, for EventSource streams only.
+
+    EventSource cannot set headers; every other endpoint keeps tokens out of
+    URLs (and so out of access logs and Referer headers).
+    """
+    @wraps(f)
     def decorated(*args, **kwargs):
         token = request.headers.get('Authorization')
+        if not token and request.args.get('access_token'):
+            token = f"Bearer {request.args['access_token']}"
+        return f(user_id_from_authorization(token), *args, **kwargs)
+    return decorated
+
+def admin_required(f):
+    """Decorator for admin endpoints, authorized by the ADMIN_TOKEN environment variable"""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        admin_token = os.environ.get('ADMIN_TOKEN')
+        if not admin_token:
+            return jsonify({'message': 'Admin API is disabled'}), 403
         
-        # For demo purposes, allow access with demo-token or create a demo user
-        if not token or token == 'Bearer demo-token':
-            # Use a demo user ID
-            current_user_id = 1
-            return f(current_user_id, *args, **kwargs)
-        
-        try:
-            token = token.split(' ')[1]  # Remove 'Bearer ' prefix
-            data = jwt.decode(token, app.config['SECRET_KEY'], algorithms=['HS256'])
-            current_user_id = data['user_id']
-        except:
-            # Fallback to demo user for invalid tokens
-            current_user_id = 1
+        provided = request.headers.get('X-Admin-Token', '')
+        if not hmac.compare_digest(provided.encode(), admin_token.encode()):
+            return jsonify({'message': 'Invalid admin token'}), 401
         
-        return f(current_user_id, *args, **kwargs)
+        return f(*args, **kwargs)
     return decorated
 
 @app.route('/api/register', methods=['POST'])
@@ -137,7 +260,7 @@ def register():
     password_hash = hashlib.sha256(data['password'].encode()).hexdigest()
     
     try:
-        conn = sqlite3.connect('maternal_health.db')
+        conn = db.connection()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -147,7 +270,6 @@ def register():
         
         user_id = cursor.lastrowid
         conn.commit()
-        conn.close()
         
         # Generate JWT token
         token = jwt.encode({
@@ -179,7 +301,7 @@ def login():
     password_hash = hashlib.sha256(data['password'].encode()).hexdigest()
     print(f"Password hash: {password_hash}")
     
-    conn = sqlite3.connect('maternal_health.db')
+    conn = db.connection()
     cursor = conn.cursor()
     
     cursor.execute('''
@@ -188,7 +310,6 @@ def login():
     
     user = cursor.fetchone()
     print(f"User found: {bool(user)}")
-    conn.close()
     
     if user:
         token = jwt.encode({
@@ -213,47 +334,28 @@ def add_health_record(current_user_id):
     data = request.get_json()
     
     # Validate required health parameters
-    required_fields = ['systolic_bp', 'diastolic_bp', 'blood_sugar', 'body_weight', 'hemoglobin']
-    if not all(field in data for field in required_fields):
+    if not all(field in data for field in REQUIRED_HEALTH_FIELDS):
         return jsonify({'message': 'Missing required health parameters'}), 400
     
     # Prepare health parameters for AI analysis
-    health_params = {
-        'systolic_bp': data['systolic_bp'],
-        'diastolic_bp': data['diastolic_bp'],
-        'blood_sugar': data['blood_sugar'],
-        'body_weight': data['body_weight'],
-        'hemoglobin': data['hemoglobin'],
-        'heart_rate': data.get('heart_rate', 75),
-        'protein_urine': data.get('protein_urine', 0.1),
-        'age': data.get('age', 28),
-        'gestational_week': data.get('gestational_week', 20)
-    }
+    health_params = health_params_from_record(data)
     
     # Get comprehensive AI prediction
-    ai_results = risk_predictor.predict_comprehensive(health_params)
+    try:
+        ai_results = predict_health_params(health_params)
+    except concurrent.futures.TimeoutError:
+        return jsonify({'message': 'Health analysis timed out, please retry'}), 503
     
-    # Store health record with comprehensive data
-    conn = sqlite3.connect('maternal_health.db')
+    # Store health record with its per-condition predictions
+    conn = db.connection()
     cursor = conn.cursor()
-    
-    cursor.execute('''
-        INSERT INTO health_records 
-        (user_id, systolic_bp, diastolic_bp, blood_sugar, body_weight, hemoglobin,
-         heart_rate, protein_urine, age, gestational_week, risk_level, 
-         detected_conditions, condition_details)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    ''', (current_user_id, 
-          data['systolic_bp'], data['diastolic_bp'], data['blood_sugar'], 
-          data['body_weight'], data['hemoglobin'], health_params['heart_rate'],
-          health_params['protein_urine'], health_params['age'], 
-          health_params['gestational_week'], ai_results['risk_level'],
-          json.dumps(ai_results['detected_conditions']),
-          json.dumps(ai_results['condition_details'])))
-    
-    record_id = cursor.lastrowid
+    record_id = insert_health_records(cursor, current_user_id, [health_params], [ai_results])[0]
     conn.commit()
-    conn.close()
+    on_user_data_changed(current_user_id, 'health_record', {
+        'record_id': record_id,
+        'risk_level': ai_results['risk_level'],
+        'detected_conditions': ai_results['detected_conditions']
+    })
     
     # Generate enhanced recommendations
     recommendations = health_recommendations.get_recommendations(
@@ -271,6 +373,110 @@ def add_health_record(current_user_id):
         'message': 'Comprehensive health analysis completed'
     }), 201
 
+@app.route('/api/health-records/batch', methods=['POST'])
+@token_required
+def add_health_records_batch(current_user_id):
+    """Add many health records at once and analyze them in a single model pass"""
+    data = request.get_json()
+    records = data.get('records') if isinstance(data, dict) else data
+    
+    if not isinstance(records, list) or not records:
+        return jsonify({'message': 'A non-empty list of records is required'}), 400
+    if len(records) > app.config['MAX_BATCH_RECORDS']:
+        return jsonify({'message': f"At most {app.config['MAX_BATCH_RECORDS']} records per batch"}), 413
+    
+    # Validate required health parameters and timestamps for every record
+    recorded_at_list = []
+    for index, record in enumerate(records):
+        if not isinstance(record, dict) or not all(field in record for field in REQUIRED_HEALTH_FIELDS):
+            return jsonify({'message': f'Missing required health parameters in record {index}'}), 400
+        try:
+            recorded_at_list.append(parse_recorded_at(record.get('recorded_at')))
+        except ValueError as e:
+            return jsonify({'message': f'{e} in record {index}'}), 400
+    
+    # Prepare health parameters for AI analysis
+    health_params_list = [health_params_from_record(record) for record in records]
+    
+    # Get comprehensive AI predictions for the whole batch
+    try:
+        ai_results_list = predict_health_params_batch(health_params_list)
+    except concurrent.futures.TimeoutError:
+        return jsonify({'message': 'Health analysis timed out, please retry'}), 503
+    
+    # Store all health records and their per-condition predictions in one transaction
+    conn = db.connection()
+    cursor = conn.cursor()
+    record_ids = insert_health_records(
+        cursor, current_user_id, health_params_list, ai_results_list, recorded_at_list
+    )
+    conn.commit()
+    on_user_data_changed(current_user_id, 'health_records', {
+        'count': len(record_ids),
+        'last_record_id': record_ids[-1],
+        'risk_level': ai_results_list[-1]['risk_level']
+    })
+    
+    return jsonify({
+        'records': [
+            {
+                'record_id': record_id,
+                'risk_level': ai_results['risk_level'],
+                'risk_probabilities': ai_results['risk_probabilities'],
+                'detected_conditions': ai_results['detected_conditions'],
+                'condition_details': ai_results['condition_details'],
+                'ai_recommendations': ai_results['recommendations'],
+                'general_recommendations': health_recommendations.get_recommendations(
+                    ai_results['risk_level'], params
+                )
+            } for record_id, params, ai_results in zip(record_ids, health_params_list, ai_results_list)
+        ],
+        'count': len(records),
+        'message': 'Batch health analysis completed'
+    }), 201
+
+@app.route('/api/health-records/import', methods=['POST'])
+@token_required
+def import_health_records(current_user_id):
+    """Stream-import historical readings from an uploaded CSV or NDJSON file, scored in batches"""
+    # Either a multipart upload (field 'file') or the raw file as the request body
+    upload = request.files.get('file')
+    if upload is not None:
+        stream = upload.stream
+        input_format = request.args.get('format') or bulk_import.detect_format(upload.filename, upload.mimetype)
+    else:
+        stream = request.stream
+        input_format = request.args.get('format') or bulk_import.detect_format(content_type=request.content_type)
+    
+    if input_format not in bulk_import.FORMATS:
+        return jsonify({'message': 'Import format must be csv or ndjson (use ?format= or a matching Content-Type)'}), 400
+    
+    summaries = bulk_import.import_records(
+        bulk_import.iter_rows(stream, input_format), predict_health_params_batch, db.connection(),
+        user_id=current_user_id, chunk_size=app.config['IMPORT_CHUNK_SIZE']
+    )
+    
+    if request.args.get('progress', '').lower() in ('1', 'true', 'yes'):
+        # One NDJSON progress line per chunk, then the final summary with the error report
+        def generate():
+            try:
+                for summary in summaries:
+                    if summary['done']:
+                        yield json.dumps(summary) + '\n'
+                    else:
+                        yield json.dumps({key: value for key, value in summary.items() if key != 'errors'}) + '\n'
+            finally:
+                on_user_data_changed(current_user_id, 'import')
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    
+    # Drive the import to completion; the last summary carries the error report
+    try:
+        for summary in summaries:
+            pass
+    finally:
+        on_user_data_changed(current_user_id, 'import')
+    return jsonify(summary), 200
+
 @app.route('/api/pregnancy-profile', methods=['POST'])
 @token_required
 def create_pregnancy_profile(current_user_id):
@@ -283,7 +489,7 @@ def create_pregnancy_profile(current_user_id):
     # Calculate expected due date and current week
     profile_data = pregnancy_tracker.create_profile(data['last_menstrual_period'])
     
-    conn = sqlite3.connect('maternal_health.db')
+    conn = db.connection()
     cursor = conn.cursor()
     
     # Deactivate existing profiles
@@ -299,7 +505,10 @@ def create_pregnancy_profile(current_user_id):
     
     profile_id = cursor.lastrowid
     conn.commit()
-    conn.close()
+    on_user_data_changed(current_user_id, 'pregnancy_profile', {
+        'profile_id': profile_id,
+        'current_week': profile_data['current_week']
+    })
     
     return jsonify({
         'profile_id': profile_id,
@@ -312,14 +521,27 @@ def create_pregnancy_profile(current_user_id):
 @token_required
 def get_pregnancy_guidance(current_user_id, week):
     """Get week-specific pregnancy guidance"""
-    guidance = pregnancy_tracker.get_weekly_guidance(week)
-    return jsonify(guidance), 200
+    etag, body = guidance_responses.get(week, invalid_guidance_response)
+    return serialized_json_response(etag, body, GUIDANCE_CACHE_CONTROL)
+
+@app.route('/api/pregnancy-guidance', methods=['GET'])
+@token_required
+def get_pregnancy_guidance_bundle(current_user_id):
+    """Get the guidance for all 42 weeks in one response"""
+    return serialized_json_response(*guidance_bundle_response, GUIDANCE_CACHE_CONTROL)
 
 @app.route('/api/dashboard', methods=['GET'])
 @token_required
 def get_dashboard_data(current_user_id):
     """Get dashboard data including recent records and pregnancy info"""
-    conn = sqlite3.connect('maternal_health.db')
+    if dashboard_cache is not None:
+        cached = dashboard_cache.get(current_user_id)
+        if cached is not None:
+            return dashboard_response(*cached)
+        # Read before querying, so data changed meanwhile is not cached as current
+        generation = dashboard_cache.generation(current_user_id)
+    
+    conn = db.connection()
     cursor = conn.cursor()
     
     # Get recent health records
@@ -344,7 +566,6 @@ def get_dashboard_data(current_user_id):
     ''', (current_user_id,))
     
     pregnancy_profile = cursor.fetchone()
-    conn.close()
     
     dashboard_data = {
         'recent_records': [
@@ -365,209 +586,428 @@ def get_dashboard_data(current_user_id):
         } if pregnancy_profile else None
     }
     
-    return jsonify(dashboard_data), 200
+    if dashboard_cache is None:
+        return jsonify(dashboard_data), 200
+    body = app.json.response(dashboard_data).get_data()
+    return dashboard_response(dashboard_cache.put(current_user_id, generation, body), body)
+
+@app.route('/api/stream', methods=['GET'])
+@stream_token_required
+def stream_events(current_user_id):
+    """Server-Sent Events of the user's new readings and profile changes"""
+    try:
+        subscription = event_hub.subscribe(current_user_id)
+    except events.StreamLimitError:
+        response = jsonify({'message': 'Too many open event streams, poll /api/dashboard instead'})
+        response.headers['Retry-After'] = '60'
+        return response, 503
+    response = Response(
+        events.stream(subscription, heartbeat=float(os.environ.get('STREAM_HEARTBEAT_SECONDS', 15))),
+        mimetype='text/event-stream'
+    )
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+def dashboard_response(etag, body):
+    """Serialized dashboard JSON; clients may keep a copy but must revalidate it on every load"""
+    return serialized_json_response(etag, body, 'private, no-cache')
+
+def encode_cursor(record):
+    """Opaque paging cursor for the (recorded_at, id) key of a record"""
+    return base64.urlsafe_b64encode(json.dumps([record['recorded_at'], record['id']]).encode()).decode()
+
+def decode_cursor(cursor):
+    """(recorded_at, id) key from a paging cursor; raises ValueError when it is malformed"""
+    try:
+        recorded_at, record_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (TypeError, ValueError) as e:
+        raise ValueError('Invalid cursor') from e
+    if not isinstance(recorded_at, str) or not isinstance(record_id, int):
+        raise ValueError('Invalid cursor')
+    return recorded_at, record_id
+
+@app.route('/api/health-records', methods=['GET'])
+@token_required
+def get_health_records(current_user_id):
+    """Page through the user's health records, newest first, with optional field projection"""
+    fields = RECORD_COLUMNS
+    if request.args.get('fields'):
+        fields = [field.strip() for field in request.args['fields'].split(',') if field.strip()]
+        unknown = [field for field in fields if field not in RECORD_COLUMNS]
+        if unknown:
+            return jsonify({'message': f"Unknown fields: {', '.join(unknown)}", 'fields': RECORD_COLUMNS}), 400
+    
+    try:
+        limit = max(1, min(int(request.args.get('limit', 50)), 500))
+    except ValueError:
+        return jsonify({'message': 'limit must be a number'}), 400
+    try:
+        after = decode_cursor(request.args['cursor']) if request.args.get('cursor') else None
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    
+    # Fetch one extra row to know whether another page exists
+    records = fetch_record_page(
+        db.connection(), fields, user_id=current_user_id,
+        since=request.args.get('since'), until=request.args.get('until'),
+        after=after, limit=limit + 1, descending=True
+    )
+    has_more = len(records) > limit
+    records = records[:limit]
+    
+    for record in records:
+        if 'detected_conditions' in record:
+            record['detected_conditions'] = json.loads(record['detected_conditions'] or '[]')
+    
+    return jsonify({
+        'records': records,
+        'next_cursor': encode_cursor(records[-1]) if has_more else None,
+        'limit': limit
+    }), 200
+
+@app.route('/api/trends/rollups', methods=['GET'])
+@token_required
+def get_trend_rollups(current_user_id):
+    """Daily or weekly min/max/mean vital signs and risk level counts for trend charts"""
+    period = request.args.get('period', 'day')
+    if period not in rollups.PERIODS:
+        return jsonify({'message': f"period must be one of {', '.join(rollups.PERIODS)}"}), 400
+    
+    return jsonify({
+        'period': period,
+        'rollups': rollups.fetch_rollups(
+            db.connection(), current_user_id, period,
+            since=request.args.get('since'), until=request.args.get('until')
+        )
+    }), 200
+
+def alerts_response(user_id=None):
+    """Page of deterioration alerts, newest first (before_id pages back, after_id polls for new ones)"""
+    try:
+        limit = max(1, min(int(request.args.get('limit', 50)), 500))
+        before_id = int(request.args['before_id']) if request.args.get('before_id') else None
+        after_id = int(request.args['after_id']) if request.args.get('after_id') else None
+    except ValueError:
+        return jsonify({'message': 'limit, before_id and after_id must be numbers'}), 400
+    severity = request.args.get('severity')
+    if severity and severity not in alerts.SEVERITIES:
+        return jsonify({'message': f"severity must be one of {', '.join(alerts.SEVERITIES)}"}), 400
+    
+    page = alerts.fetch_alerts(db.connection(), user_id, before_id=before_id, after_id=after_id,
+                               severity=severity, limit=limit + 1)
+    has_more = len(page) > limit
+    page = page[:limit]
+    return jsonify({
+        'alerts': page,
+        'next_before_id': page[-1]['id'] if has_more else None,
+        'limit': limit
+    }), 200
+
+@app.route('/api/alerts', methods=['GET'])
+@token_required
+def get_alerts(current_user_id):
+    """Deterioration alerts raised from the user's readings"""
+    return alerts_response(current_user_id)
+
+@app.route('/api/admin/alerts', methods=['GET'])
+@admin_required
+def get_clinic_alerts():
+    """Deterioration alerts of every patient, or one patient's with ?user_id="""
+    try:
+        user_id = int(request.args['user_id']) if request.args.get('user_id') else None
+    except ValueError:
+        return jsonify({'message': 'user_id must be a number'}), 400
+    return alerts_response(user_id)
+
+@app.route('/api/trends', methods=['GET'])
+@token_required
+def get_trends(current_user_id):
+    """Rolling means, EWMA, slope per week and z-score outliers of every vital over the user's history"""
+    resolution = request.args.get('resolution', 'day')
+    if resolution not in trends.RESOLUTIONS:
+        return jsonify({'message': f"resolution must be one of {', '.join(trends.RESOLUTIONS)}"}), 400
+    
+    try:
+        window_days = float(request.args.get('window_days', 7))
+        span = float(request.args.get('span', 7))
+        z_threshold = float(request.args.get('z', 3))
+        max_points = max(1, min(int(request.args.get('points', 500)), 5000))
+    except ValueError:
+        return jsonify({'message': 'window_days, span, z and points must be numbers'}), 400
+    if window_days <= 0 or span < 1 or z_threshold <= 0:
+        return jsonify({'message': 'window_days and z must be positive and span at least 1'}), 400
+    
+    # Daily and weekly points come from vital_rollups, not from every reading
+    series = trends.load_series(
+        db.connection(), current_user_id, resolution,
+        since=request.args.get('since'), until=request.args.get('until')
+    )
+    return jsonify(trends.analyze(
+        series, resolution, window_days=window_days, span=span,
+        z_threshold=z_threshold, max_points=max_points
+    )), 200
+
+def report_file_response(path):
+    """PDF report download; conditional, so an unchanged report is not sent again"""
+    response = send_file(
+        path,
+        as_attachment=True,
+        download_name=f'maternal_health_report_{datetime.datetime.now().strftime("%Y%m%d")}.pdf',
+        mimetype='application/pdf',
+        conditional=True
+    )
+    
+    # Add CORS headers for frontend access
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    response.headers['Access-Control-Expose-Headers'] = 'Content-Disposition'
+    
+    return response
 
 @app.route('/api/generate-report', methods=['GET'])
 @token_required
 def generate_health_report(current_user_id):
-    """Generate comprehensive health report PDF"""
+    """Generate comprehensive health report PDF, served from the report cache when unchanged"""
     try:
-        conn = sqlite3.connect('maternal_health.db')
-        cursor = conn.cursor()
-        
-        # Get user info
-        cursor.execute('SELECT name, email FROM users WHERE id = ?', (current_user_id,))
-        user_info = cursor.fetchone()
-        
-        # Get all health records
-        cursor.execute('''
-            SELECT systolic_bp, diastolic_bp, blood_sugar, body_weight, 
-                   hemoglobin, risk_level, recorded_at
-            FROM health_records 
-            WHERE user_id = ? 
-            ORDER BY recorded_at DESC
-        ''', (current_user_id,))
-        
-        health_records = cursor.fetchall()
+        return report_file_response(report_jobs.report_path(current_user_id))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def report_job_response(job):
+    """Job status JSON; 202 with a Location header while the report is being rendered"""
+    job = dict(job, download_url=None)
+    if job['status'] == 'done':
+        job['download_url'] = f"/api/reports/{job['job_id']}/download"
+    response = jsonify(job)
+    if job['status'] in ('queued', 'running'):
+        response.status_code = 202
+        response.headers['Location'] = f"/api/reports/{job['job_id']}"
+    return response
+
+@app.route('/api/reports', methods=['POST'])
+@token_required
+def create_report_job(current_user_id):
+    """Queue a PDF report render; returns the finished job at once when the cached report is current"""
+    return report_job_response(report_jobs.submit(current_user_id))
+
+@app.route('/api/reports/<job_id>', methods=['GET'])
+@token_required
+def get_report_job(current_user_id, job_id):
+    """Status of a report job"""
+    job = report_jobs.get(job_id, current_user_id)
+    if job is None:
+        return jsonify({'message': 'Report job not found'}), 404
+    return report_job_response(job)
+
+@app.route('/api/reports/<job_id>/download', methods=['GET'])
+@token_required
+def download_report(current_user_id, job_id):
+    """Download the PDF of a finished report job"""
+    job = report_jobs.get(job_id, current_user_id)
+    if job is None:
+        return jsonify({'message': 'Report job not found'}), 404
+    if job['status'] == 'failed':
+        return jsonify({'message': 'Report generation failed', 'error': job['error']}), 500
+    if job['status'] != 'done':
+        return jsonify({'message': 'Report is not ready yet', 'status': job['status']}), 409
+    
+    path = report_jobs.job_path(current_user_id, job)
+    if path is None:
+        return jsonify({'message': 'A newer report replaced this one, request a new report'}), 410
+    return report_file_response(path)
+
+def export_response(user_id=None):
+    """Streaming CSV/NDJSON export of health records, one keyset page at a time"""
+    export_format = request.args.get('format', 'csv')
+    if export_format not in export.FORMATS:
+        return jsonify({'message': 'Export format must be csv or ndjson'}), 400
+    
+    conditions = None
+    if request.args.get('include_conditions', '').lower() in ('1', 'true', 'yes'):
+        conditions = model_registry.active.conditions
+    
+    body = export.stream_export(
+        db.connection(), export_format, user_id=user_id,
+        since=request.args.get('since'), until=request.args.get('until'), conditions=conditions
+    )
+    response = Response(stream_with_context(body), mimetype=export.FORMATS[export_format])
+    response.headers['Content-Disposition'] = (
+        f'attachment; filename=maternal_health_export_{datetime.datetime.now().strftime("%Y%m%d")}.{export_format}'
+    )
+    response.headers['Access-Control-Expose-Headers'] = 'Content-Disposition'
+    return response
+
+@app.route('/api/export', methods=['GET'])
+@token_required
+def export_health_records(current_user_id):
+    """Export the current user's health records as CSV or NDJSON (optional since/until range)"""
+    return export_response(current_user_id)
+
+@app.route('/api/admin/export', methods=['GET'])
+@admin_required
+def export_clinic_health_records():
+    """Export every patient's health records, or one patient's with ?user_id="""
+    try:
+        user_id = int(request.args['user_id']) if request.args.get('user_id') else None
+    except ValueError:
+        return jsonify({'message': 'user_id must be a number'}), 400
+    return export_response(user_id)
+
+@app.route('/api/admin/reports/batch', methods=['GET'])
+@admin_required
+def batch_health_reports():
+    """Zip of PDF reports for every patient with readings (or ?user_id=...&user_id=..., ?since=)"""
+    try:
+        user_ids = [int(user_id) for user_id in request.args.getlist('user_id')]
+    except ValueError:
+        return jsonify({'message': 'user_id must be a number'}), 400
+    if not user_ids:
+        user_ids = report_batch.patient_ids(db.connection(), request.args.get('since'))
+    
+    # Reports render in the shared process pool and are zipped as they finish
+    results = report_pool.render(user_ids)
+    response = Response(stream_with_context(report_batch.stream_zip(results)), mimetype='application/zip')
+    response.headers['Content-Disposition'] = (
+        f'attachment; filename=maternal_health_reports_{datetime.datetime.now().strftime("%Y%m%d")}.zip'
+    )
+    response.headers['Access-Control-Expose-Headers'] = 'Content-Disposition'
+    response.headers['X-Report-Count'] = str(len(user_ids))
+    return response
+
+@app.route('/api/model/stats', methods=['GET'])
+@token_required
+def get_model_stats(current_user_id):
+    """Get the active model version, prediction cache and micro-batching counters"""
+    risk_predictor = model_registry.active
+    return jsonify({
+        'model_version': risk_predictor.model_version,
+        'prediction_cache': risk_predictor.cache_stats(),
+        'micro_batching': inference_scheduler.stats() if inference_scheduler is not None else None
+    }), 200
+
+@app.route('/api/admin/models', methods=['GET'])
+@admin_required
+def list_model_versions():
+    """List model artifact versions, the active one and recent activation jobs"""
+    return jsonify(model_registry.list_versions()), 200
+
+@app.route('/api/admin/models/activate', methods=['POST'])
+@admin_required
+def activate_model_version():
+    """Load, validate and hot-swap a model version in the background"""
+    data = request.get_json() or {}
+    if not data.get('version'):
+        return jsonify({'message': 'Model version required'}), 400
+    
+    try:
+        job = model_registry.activate(data['version'])
+    except ArtifactError as e:
+        return jsonify({'message': str(e)}), 404
+    return jsonify(job), 202
+
+@app.route('/api/admin/models/rollback', methods=['POST'])
+@admin_required
+def rollback_model_version():
+    """Hot-swap back to the previously active model version"""
+    try:
+        job = model_registry.rollback()
+    except ArtifactError as e:
+        return jsonify({'message': str(e)}), 409
+    return jsonify(job), 202
+
+@app.route('/api/admin/conditions', methods=['GET'])
+@admin_required
+def query_condition_predictions():
+    """Triage query: readings (or patients) whose predicted probability for a condition is high"""
+    condition = request.args.get('condition')
+    if condition not in model_registry.active.conditions:
+        return jsonify({
+            'message': 'A valid condition is required',
+            'conditions': model_registry.active.conditions
+        }), 400
+    
+    try:
+        min_probability = float(request.args.get('min_probability', 0.5))
+        limit = min(int(request.args.get('limit', 100)), 1000)
+        user_id = int(request.args['user_id']) if request.args.get('user_id') else None
+    except ValueError:
+        return jsonify({'message': 'min_probability, limit and user_id must be numbers'}), 400
+    
+    # The (condition, probability) index serves both the filter and the ordering
+    filters = ['rc.condition = ?', 'rc.probability >= ?']
+    params = [condition, min_probability]
+    if request.args.get('since'):
+        filters.append('hr.recorded_at >= ?')
+        params.append(request.args['since'])
+    if request.args.get('until'):
+        filters.append('hr.recorded_at < ?')
+        params.append(request.args['until'])
+    if user_id is not None:
+        filters.append('rc.user_id = ?')
+        params.append(user_id)
+    if request.args.get('detected_only', '').lower() in ('1', 'true', 'yes'):
+        filters.append('rc.detected')
+    where = ' AND '.join(filters)
+    
+    conn = db.connection()
+    cursor = conn.cursor()
+    
+    if request.args.get('group_by') == 'patient':
+        cursor.execute(f'''
+            SELECT rc.user_id, u.name, u.email, MAX(rc.probability), COUNT(*), MAX(hr.recorded_at)
+            FROM record_conditions rc
+            JOIN health_records hr ON hr.id = rc.record_id
+            LEFT JOIN users u ON u.id = rc.user_id
+            WHERE {where}
+            GROUP BY rc.user_id
+            ORDER BY MAX(rc.probability) DESC
+            LIMIT ?
+        ''', params + [limit])
         
-        # If no records exist, create some sample data for demo
-        if not health_records:
-            sample_records = [
-                (120, 80, 95, 65.5, 12.1, 'Normal', datetime.datetime.now().isoformat()),
-                (125, 85, 110, 66.2, 11.8, 'Medium', (datetime.datetime.now() - datetime.timedelta(days=7)).isoformat()),
-                (118, 78, 88, 65.0, 12.3, 'Normal', (datetime.datetime.now() - datetime.timedelta(days=14)).isoformat()),
+        return jsonify({
+            'condition': condition,
+            'min_probability': min_probability,
+            'patients': [
+                {
+                    'user_id': row[0],
+                    'name': row[1],
+                    'email': row[2],
+                    'max_probability': row[3],
+                    'readings': row[4],
+                    'last_recorded_at': row[5]
+                } for row in cursor.fetchall()
             ]
-            health_records = sample_records
-        
-        # Get pregnancy profile
-        cursor.execute('''
-            SELECT current_week, expected_due_date, last_menstrual_period
-            FROM pregnancy_profiles 
-            WHERE user_id = ? AND is_active = TRUE
-            ORDER BY created_at DESC 
-            LIMIT 1
-        ''', (current_user_id,))
-        
-        pregnancy_profile = cursor.fetchone()
-        conn.close()
-        
-        # Create PDF report
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4)
-        styles = getSampleStyleSheet()
-        story = []
-        
-        # Title
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            spaceAfter=30,
-            textColor=colors.HexColor('#667eea'),
-            alignment=1  # Center alignment
-        )
-        story.append(Paragraph("Maternal Health Report", title_style))
-        story.append(Spacer(1, 20))
-        
-        # Patient Information
-        story.append(Paragraph("Patient Information", styles['Heading2']))
-        patient_data = [
-            ['Name:', user_info[0] if user_info else 'Demo User'],
-            ['Email:', user_info[1] if user_info else 'demo@maternalcare.ai'],
-            ['Report Date:', datetime.datetime.now().strftime('%B %d, %Y')],
+        }), 200
+    
+    cursor.execute(f'''
+        SELECT rc.record_id, rc.user_id, u.name, rc.probability, rc.severity, rc.detected,
+               hr.risk_level, hr.systolic_bp, hr.diastolic_bp, hr.recorded_at
+        FROM record_conditions rc
+        JOIN health_records hr ON hr.id = rc.record_id
+        LEFT JOIN users u ON u.id = rc.user_id
+        WHERE {where}
+        ORDER BY rc.probability DESC, rc.record_id DESC
+        LIMIT ?
+    ''', params + [limit])
+    
+    return jsonify({
+        'condition': condition,
+        'min_probability': min_probability,
+        'records': [
+            {
+                'record_id': row[0],
+                'user_id': row[1],
+                'name': row[2],
+                'probability': row[3],
+                'severity': row[4],
+                'detected': bool(row[5]),
+                'risk_level': row[6],
+                'systolic_bp': row[7],
+                'diastolic_bp': row[8],
+                'recorded_at': row[9]
+            } for row in cursor.fetchall()
         ]
-        
-        if pregnancy_profile:
-            patient_data.extend([
-                ['Current Week:', f"Week {pregnancy_profile[0]}"],
-                ['Expected Due Date:', pregnancy_profile[1]],
-                ['Last Menstrual Period:', pregnancy_profile[2]]
-            ])
-        
-        patient_table = Table(patient_data, colWidths=[2*inch, 4*inch])
-        patient_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f7fafc')),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#e2e8f0'))
-        ]))
-        story.append(patient_table)
-        story.append(Spacer(1, 20))
-        
-        # Health Records Summary
-        if health_records:
-            story.append(Paragraph("Health Records Summary", styles['Heading2']))
-            
-            # Latest record
-            latest = health_records[0]
-            story.append(Paragraph(f"<b>Latest Assessment ({datetime.datetime.fromisoformat(latest[6]).strftime('%B %d, %Y')}):</b>", styles['Normal']))
-            
-            latest_data = [
-                ['Parameter', 'Value', 'Status'],
-                ['Systolic Blood Pressure', f"{latest[0]} mmHg", 'Normal' if latest[0] < 140 else 'Elevated'],
-                ['Diastolic Blood Pressure', f"{latest[1]} mmHg", 'Normal' if latest[1] < 90 else 'Elevated'],
-                ['Blood Sugar', f"{latest[2]} mg/dL", 'Normal' if latest[2] < 125 else 'Elevated'],
-                ['Body Weight', f"{latest[3]} kg", 'Monitored'],
-                ['Hemoglobin', f"{latest[4]} g/dL", 'Normal' if latest[4] >= 11 else 'Low'],
-                ['Risk Level', latest[5], latest[5]]
-            ]
-            
-            health_table = Table(latest_data, colWidths=[2.5*inch, 1.5*inch, 1.5*inch])
-            health_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#667eea')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 9),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f7fafc')])
-            ]))
-            story.append(health_table)
-            story.append(Spacer(1, 20))
-            
-            # Trends
-            if len(health_records) > 1:
-                story.append(Paragraph("Health Trends", styles['Heading3']))
-                
-                # Calculate trends
-                current = health_records[0]
-                previous = health_records[1]
-                
-                trends = []
-                parameters = ['Systolic BP', 'Diastolic BP', 'Blood Sugar', 'Weight', 'Hemoglobin']
-                for i, param in enumerate(parameters):
-                    change = current[i] - previous[i]
-                    trend = "↑" if change > 0 else "↓" if change < 0 else "→"
-                    trends.append([param, f"{change:+.1f}", trend])
-                
-                trend_table = Table([['Parameter', 'Change', 'Trend']] + trends)
-                trend_table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#48bb78')),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, -1), 9),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.black)
-                ]))
-                story.append(trend_table)
-                story.append(Spacer(1, 20))
-        
-        # Recommendations
-        if health_records:
-            latest_record = health_records[0]
-            health_params = {
-                'systolic_bp': latest_record[0],
-                'diastolic_bp': latest_record[1],
-                'blood_sugar': latest_record[2],
-                'body_weight': latest_record[3],
-                'hemoglobin': latest_record[4]
-            }
-            
-            recommendations = health_recommendations.get_recommendations(latest_record[5], health_params)
-            
-            story.append(Paragraph("AI-Generated Recommendations", styles['Heading2']))
-            
-            for category, items in recommendations.items():
-                if isinstance(items, list) and items:
-                    story.append(Paragraph(f"<b>{category.replace('_', ' ').title()}:</b>", styles['Normal']))
-                    for item in items:
-                        story.append(Paragraph(f"• {item}", styles['Normal']))
-                    story.append(Spacer(1, 10))
-        
-        # Footer
-        story.append(Spacer(1, 30))
-        footer_style = ParagraphStyle(
-            'Footer',
-            parent=styles['Normal'],
-            fontSize=8,
-            textColor=colors.grey,
-            alignment=1
-        )
-        story.append(Paragraph("This report is generated by AI-Powered Maternal Health Monitoring System", footer_style))
-        story.append(Paragraph("Please consult with your healthcare provider for medical decisions", footer_style))
-        
-        # Build PDF
-        doc.build(story)
-        buffer.seek(0)
-        
-        # Create response with proper headers
-        response = send_file(
-            buffer,
-            as_attachment=True,
-            download_name=f'maternal_health_report_{datetime.datetime.now().strftime("%Y%m%d")}.pdf',
-            mimetype='application/pdf'
-        )
-        
-        # Add CORS headers for frontend access
-        response.headers['Access-Control-Allow-Origin'] = '*'
-        response.headers['Access-Control-Expose-Headers'] = 'Content-Disposition'
-        
-        return response
-        
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    }), 200
 
 @app.route('/api/emergency-call', methods=['POST'])
 @token_required
@@ -603,6 +1043,9 @@ def initiate_emergency_call(current_user_id):
         ]
     }), 200
 
-if __name__ == '__main__':
+# Bring the schema up to date at startup (every worker; migrations are idempotent)
+if not IS_POOL_WORKER:
     init_db()
+
+if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -0,0 +1 @@
+# Performance benchmarks for the prediction, recommendation and report hot paths
\ No newline at end of file
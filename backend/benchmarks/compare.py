@@ -0,0 +1,61 @@
+"""
+Compare two benchmark reports produced by ``python -m benchmarks.run``.
+
+Prints the relative change of every latency percentile and exits with status 1
+if any benchmark's p50, p95 or p99 got slower by more than the threshold.
+
+Usage (from the backend directory):
+    python -m benchmarks.compare baseline.json candidate.json [--threshold 0.10]
+"""
+
+import argparse
+import json
+import sys
+
+METRICS = ['p50_ms', 'p95_ms', 'p99_ms']
+
+
+def compare(baseline, candidate, threshold):
+    """Return (rows, regressions) comparing the benchmarks present in both reports"""
+    rows = []
+    regressions = []
+    for name in sorted(set(baseline['benchmarks']) & set(candidate['benchmarks'])):
+        before = baseline['benchmarks'][name]
+        after = candidate['benchmarks'][name]
+        for metric in METRICS:
+            change = (after[metric] - before[metric]) / before[metric] if before[metric] else 0.0
+            rows.append((name, metric, before[metric], after[metric], change))
+            if change > threshold:
+                regressions.append((name, metric, change))
+    return rows, regressions
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Compare two benchmark reports')
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='Relative slowdown that counts as a regression (default 0.10)')
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    print(f"baseline:  {baseline['environment'].get('commit')}")
+    print(f"candidate: {candidate['environment'].get('commit')}")
+    rows, regressions = compare(baseline, candidate, args.threshold)
+    for name, metric, before, after, change in rows:
+        print(f"{name:40s} {metric:7s} {before:10.3f} -> {after:10.3f} ms  {change:+7.1%}")
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}:")
+        for name, metric, change in regressions:
+            print(f"  {name} {metric} {change:+.1%}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
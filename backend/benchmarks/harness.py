@@ -0,0 +1,74 @@
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import time
+
+import numpy as np
+
+
+def summarize(timings, calls_per_iteration=1):
+    """Latency percentiles (milliseconds) and throughput from per-iteration timings (seconds)"""
+    timings = np.asarray(timings, dtype=np.float64)
+    total = float(timings.sum())
+    return {
+        'iterations': int(timings.size),
+        'calls_per_iteration': calls_per_iteration,
+        'p50_ms': float(np.percentile(timings, 50) * 1000),
+        'p95_ms': float(np.percentile(timings, 95) * 1000),
+        'p99_ms': float(np.percentile(timings, 99) * 1000),
+        'mean_ms': float(timings.mean() * 1000),
+        'max_ms': float(timings.max() * 1000),
+        'throughput_per_s': timings.size * calls_per_iteration / total if total else None
+    }
+
+
+def time_callable(fn, iterations=200, warmup=10, calls_per_iteration=1):
+    """Time fn() repeatedly after a warmup; fn may take the iteration index"""
+    for i in range(warmup):
+        fn(i)
+    timings = []
+    for i in range(iterations):
+        started = time.perf_counter()
+        fn(i)
+        timings.append(time.perf_counter() - started)
+    return summarize(timings, calls_per_iteration)
+
+
+@contextlib.contextmanager
+def quiet():
+    """Silence stdout from the code under test (training logs, request prints)"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def environment():
+    """Metadata that identifies where and on what commit a run happened"""
+    try:
+        commit = subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    import sklearn
+    return {
+        'commit': commit,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'python_version': platform.python_version(),
+        'numpy_version': np.__version__,
+        'sklearn_version': sklearn.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count()
+    }
+
+
+def write_report(report, output=None):
+    """Write a JSON report to a file, or to stdout"""
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if output:
+        with open(output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
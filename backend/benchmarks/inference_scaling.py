@@ -0,0 +1,90 @@
+"""
+Throughput of the out-of-process inference pool as worker processes are added.
+
+Client threads submit single readings, the way threaded web workers do. The
+in-thread predictor is measured first as the single-interpreter baseline,
+then InferencePool with 1, 2, 4, ... processes up to the CPU count, both
+with one reading per round trip and behind MicroBatchScheduler (the
+INFERENCE_BACKEND=process plus INFERENCE_MICROBATCH=1 setup in app.py).
+
+Usage (from the backend directory, after `python -m ml_model.train`):
+    python -m benchmarks.inference_scaling [--requests N] [--max-processes P] [--output scaling.json]
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.harness import environment, summarize, write_report
+from benchmarks.run import _readings
+from ml_model.batch_scheduler import MicroBatchScheduler
+from ml_model.enhanced_risk_predictor import EnhancedRiskPredictor
+from ml_model.inference_pool import InferencePool
+
+
+def _drive(predict, readings, client_threads):
+    """Score every reading from client_threads concurrent callers and time each call"""
+    def call(reading):
+        started = time.perf_counter()
+        predict(reading)
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=client_threads) as clients:
+        timings = list(clients.map(call, readings))
+    elapsed = time.perf_counter() - started
+
+    result = summarize(timings)
+    result['throughput_per_s'] = len(readings) / elapsed
+    result['client_threads'] = client_threads
+    return result
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Measure inference throughput against process count')
+    parser.add_argument('--requests', type=int, default=2000, help='Readings scored per configuration')
+    parser.add_argument('--max-processes', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--clients-per-process', type=int, default=4,
+                        help='Concurrent client threads per worker process')
+    parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+    args = parser.parse_args()
+
+    readings = _readings(args.requests)
+    results = {}
+
+    predictor = EnhancedRiskPredictor()
+    results['in_thread'] = _drive(predictor.predict_comprehensive, readings, args.clients_per_process)
+    results['in_thread']['processes'] = 0
+
+    process_counts = []
+    count = 1
+    while count < args.max_processes:
+        process_counts.append(count)
+        count *= 2
+    process_counts.append(args.max_processes)
+
+    for processes in process_counts:
+        pool = InferencePool(max_workers=processes)
+        pool.warm_up(timeout=120)
+        scheduler = MicroBatchScheduler(pool.predict_batch)
+        clients = processes * args.clients_per_process
+        try:
+            runs = {
+                f'process_pool_{processes}': _drive(pool.predict, readings, clients),
+                f'process_pool_{processes}_microbatch': _drive(scheduler.predict, readings, clients)
+            }
+        finally:
+            scheduler.close()
+            pool.close()
+        for name, result in runs.items():
+            result['processes'] = processes
+            result['speedup_vs_in_thread'] = result['throughput_per_s'] / results['in_thread']['throughput_per_s']
+            results[name] = result
+
+    write_report({'environment': environment(), 'benchmarks': results}, args.output)
+
+
+if __name__ == '__main__':
+    main()
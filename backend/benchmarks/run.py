@@ -0,0 +1,247 @@
+"""
+Benchmark suite for the prediction, recommendation and report hot paths.
+
+Each benchmark reports p50/p95/p99 latency and throughput; the whole run is
+written as JSON together with the commit and library versions so results from
+different commits can be compared with ``python -m benchmarks.compare``.
+
+Usage (from the backend directory, after `python -m ml_model.train`):
+    python -m benchmarks.run [--iterations N] [--only NAME ...] [--output results.json]
+    python -m benchmarks.run --list
+"""
+
+import argparse
+import contextlib
+import os
+import shutil
+import sys
+import tempfile
+
+from benchmarks.harness import environment, quiet, time_callable, write_report
+from ml_model import synthetic_data
+from ml_model.enhanced_risk_predictor import EnhancedRiskPredictor
+from ml_model.risk_predictor import RiskPredictor
+from utils.health_recommendations import HealthRecommendations
+from utils.pregnancy_tracker import PregnancyTracker
+
+BATCH_SIZE = 256
+
+
+def _readings(n=1000, seed=7):
+    """Varied synthetic readings as health parameter dicts"""
+    X, _, _ = synthetic_data.generate_enhanced_data(n_samples=n, seed=seed)
+    names = EnhancedRiskPredictor(load=False).feature_names
+    return [{name: round(float(value), 1) for name, value in zip(names, row)} for row in X]
+
+
+def bench_enhanced_predict(args):
+    """EnhancedRiskPredictor.predict_comprehensive on varied readings, cache disabled"""
+    predictor = EnhancedRiskPredictor()
+    readings = _readings()
+    return time_callable(
+        lambda i: predictor.predict_comprehensive(readings[i % len(readings)]), args.iterations
+    )
+
+
+def bench_enhanced_predict_cached(args):
+    """EnhancedRiskPredictor.predict_comprehensive on a repeated reading, cache enabled"""
+    predictor = EnhancedRiskPredictor(cache_size=1024)
+    reading = _readings(1)[0]
+    return time_callable(lambda i: predictor.predict_comprehensive(reading), args.iterations)
+
+
+def bench_enhanced_predict_batch(args):
+    """EnhancedRiskPredictor.predict_comprehensive_batch, per-reading throughput"""
+    predictor = EnhancedRiskPredictor()
+    readings = _readings()
+    batches = [readings[i:i + BATCH_SIZE] for i in range(0, len(readings) - BATCH_SIZE + 1, BATCH_SIZE)]
+    return time_callable(
+        lambda i: predictor.predict_comprehensive_batch(batches[i % len(batches)]),
+        max(1, args.iterations // 10), warmup=2, calls_per_iteration=BATCH_SIZE
+    )
+
+
+def bench_basic_predict_risk(args):
+    """RiskPredictor.predict_risk"""
+    with quiet():
+        predictor = RiskPredictor()
+    readings = _readings()
+    return time_callable(lambda i: predictor.predict_risk(readings[i % len(readings)]), args.iterations)
+
+
+def bench_basic_risk_probability(args):
+    """RiskPredictor.get_risk_probability"""
+    with quiet():
+        predictor = RiskPredictor()
+    readings = _readings()
+    return time_callable(
+        lambda i: predictor.get_risk_probability(readings[i % len(readings)]), args.iterations
+    )
+
+
+def bench_recommendations(args):
+    """HealthRecommendations.get_recommendations"""
+    recommendations = HealthRecommendations()
+    readings = _readings()
+    levels = ['Normal', 'Medium', 'High']
+    return time_callable(
+        lambda i: recommendations.get_recommendations(levels[i % 3], readings[i % len(readings)]),
+        args.iterations
+    )
+
+
+def bench_weekly_guidance(args):
+    """PregnancyTracker.get_weekly_guidance over weeks 1-42"""
+    tracker = PregnancyTracker()
+    return time_callable(lambda i: tracker.get_weekly_guidance(i % 42 + 1), args.iterations)
+
+
+def bench_train_enhanced(args):
+    """Training the enhanced risk and condition models"""
+    def train(i):
+        with quiet():
+            EnhancedRiskPredictor(load=False)._train_model()
+    return time_callable(train, args.training_iterations, warmup=0)
+
+
+def bench_train_basic(args):
+    """Training the basic decision tree model"""
+    def train(i):
+        with quiet():
+            RiskPredictor(load=False)._train_model()
+    return time_callable(train, args.training_iterations, warmup=0)
+
+
+@contextlib.contextmanager
+def _test_client():
+    """Flask test client for app.py running against a throwaway SQLite database"""
+    tmp_dir = tempfile.mkdtemp(prefix='maternal-bench-')
+    if 'app' not in sys.modules:
+        # Importing app runs init_db() and migrations against DATABASE_URL, so
+        # point it (and every other file app.py writes) at the temp dir first
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp_dir, 'maternal_health.db')}"
+        os.environ['REPORT_CACHE_DIR'] = os.path.join(tmp_dir, 'report_cache')
+        os.environ['DASHBOARD_CACHE_PATH'] = ''
+    with quiet():
+        import app as app_module
+    previous_path = app_module.db.path
+    previous_report_dir = app_module.report_jobs.report_dir
+    app_module.db.set_path(os.path.join(tmp_dir, 'maternal_health.db'))
+    app_module.report_jobs.report_dir = os.path.join(tmp_dir, 'report_cache')
+    try:
+        with quiet():
+            app_module.init_db()
+        yield app_module.app.test_client()
+    finally:
+        app_module.db.set_path(previous_path)
+        app_module.report_jobs.report_dir = previous_report_dir
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def bench_handler_health_record(args):
+    """POST /api/health-record through the Flask test client"""
+    readings = _readings()
+    with _test_client() as client:
+        def post(i):
+            response = client.post('/api/health-record', json=readings[i % len(readings)])
+            assert response.status_code == 201, response.status_code
+        return time_callable(post, args.iterations)
+
+
+def bench_handler_dashboard(args):
+    """GET /api/dashboard for a user with stored readings and a pregnancy profile"""
+    readings = _readings(100)
+    with _test_client() as client:
+        client.post('/api/health-records/batch', json={'records': readings})
+        client.post('/api/pregnancy-profile', json={'last_menstrual_period': '2024-01-01'})
+
+        def dashboard(i):
+            response = client.get('/api/dashboard')
+            assert response.status_code == 200, response.status_code
+        return time_callable(dashboard, args.iterations)
+
+
+def bench_handler_pregnancy_guidance(args):
+    """GET /api/pregnancy-guidance/<week> over weeks 1-42"""
+    with _test_client() as client:
+        def guidance(i):
+            response = client.get(f'/api/pregnancy-guidance/{i % 42 + 1}')
+            assert response.status_code == 200, response.status_code
+        return time_callable(guidance, args.iterations)
+
+
+def _store_report_readings(client, args):
+    """Post --report-records readings for the demo user"""
+    readings = _readings(args.report_records)
+    for start in range(0, len(readings), 500):
+        client.post('/api/health-records/batch', json={'records': readings[start:start + 500]})
+
+
+def bench_handler_generate_report(args):
+    """GET /api/generate-report for a user with --report-records stored readings (cached PDF)"""
+    with _test_client() as client:
+        _store_report_readings(client, args)
+
+        def report(i):
+            response = client.get('/api/generate-report')
+            assert response.status_code == 200, response.status_code
+            response.close()
+        return time_callable(report, max(1, args.iterations // 10), warmup=2)
+
+
+def bench_render_health_report(args):
+    """Rendering the PDF report for a user with --report-records stored readings (uncached)"""
+    import report_renderer
+    with _test_client() as client:
+        _store_report_readings(client, args)
+        import app as app_module
+        conn = app_module.db.connection()
+        return time_callable(lambda i: report_renderer.render_health_report(conn, 1),
+                             max(1, args.iterations // 10), warmup=2)
+
+
+BENCHMARKS = {
+    'enhanced_predict_comprehensive': bench_enhanced_predict,
+    'enhanced_predict_comprehensive_cached': bench_enhanced_predict_cached,
+    'enhanced_predict_comprehensive_batch': bench_enhanced_predict_batch,
+    'basic_predict_risk': bench_basic_predict_risk,
+    'basic_get_risk_probability': bench_basic_risk_probability,
+    'health_recommendations': bench_recommendations,
+    'pregnancy_weekly_guidance': bench_weekly_guidance,
+    'train_enhanced_model': bench_train_enhanced,
+    'train_basic_model': bench_train_basic,
+    'handler_health_record': bench_handler_health_record,
+    'handler_dashboard': bench_handler_dashboard,
+    'handler_pregnancy_guidance': bench_handler_pregnancy_guidance,
+    'handler_generate_report': bench_handler_generate_report,
+    'render_health_report': bench_render_health_report
+}
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Run the backend benchmark suite')
+    parser.add_argument('--iterations', type=int, default=300, help='Timed iterations per benchmark')
+    parser.add_argument('--training-iterations', type=int, default=3, help='Timed runs of model training')
+    parser.add_argument('--report-records', type=int, default=200, help='Stored readings for the report benchmark')
+    parser.add_argument('--only', action='append', choices=sorted(BENCHMARKS), help='Run only these benchmarks')
+    parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+    parser.add_argument('--list', action='store_true', help='List benchmarks and exit')
+    args = parser.parse_args()
+
+    if args.list:
+        for name, bench in BENCHMARKS.items():
+            print(f"{name}: {bench.__doc__}")
+        return
+
+    results = {}
+    for name in args.only or BENCHMARKS:
+        print(f"Running {name}...", file=sys.stderr)
+        results[name] = BENCHMARKS[name](args)
+        results[name]['description'] = BENCHMARKS[name].__doc__
+
+    write_report({'environment': environment(), 'benchmarks': results}, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,265 @@
+"""
+Streaming bulk import of historical readings from CSV or NDJSON.
+
+The input is parsed row by row and handled in chunks: each chunk is scored
+with one batched model call and inserted with executemany in its own
+transaction, so memory stays bounded by the chunk size whatever the file
+size. Rows that fail validation are reported with their line number and
+skipped; the rest of the file is still imported. A chunk the database
+rejects is retried row by row, so only the offending rows are reported.
+
+CSV files need a header row with at least the required health parameters
+(systolic_bp, diastolic_bp, blood_sugar, body_weight, hemoglobin); optional
+columns are heart_rate, protein_urine, age, gestational_week and recorded_at.
+
+Usage (from the backend directory, after `python -m ml_model.train`):
+    python -m bulk_import readings.csv --user-id 42
+    python -m bulk_import clinic.ndjson --user-column   # user_id taken from each row
+"""
+
+import argparse
+import concurrent.futures
+import contextlib
+import csv
+import io
+import json
+import os
+import sqlite3
+import sys
+
+import migrations
+from database import ConnectionManager, database_path_from_url
+from ml_model.enhanced_risk_predictor import EnhancedRiskPredictor
+from records import REQUIRED_HEALTH_FIELDS, health_params_from_record, insert_health_records, parse_recorded_at
+
+NUMERIC_FIELDS = REQUIRED_HEALTH_FIELDS + ['heart_rate', 'protein_urine', 'age', 'gestational_week']
+FORMATS = ('csv', 'ndjson')
+
+
+def detect_format(filename=None, content_type=None):
+    """Guess the import format from a file name or content type"""
+    content_type = (content_type or '').split(';')[0].strip().lower()
+    if content_type in ('text/csv', 'application/csv'):
+        return 'csv'
+    if content_type in ('application/x-ndjson', 'application/ndjson', 'application/jsonl'):
+        return 'ndjson'
+    extension = os.path.splitext(filename or '')[1].lower()
+    if extension == '.csv':
+        return 'csv'
+    if extension in ('.ndjson', '.jsonl'):
+        return 'ndjson'
+    return None
+
+
+def _text_stream(stream):
+    """Decode a binary stream lazily; text streams are returned unchanged"""
+    if isinstance(stream, io.TextIOBase):
+        return stream
+    return io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+
+
+def _number(value):
+    """Parse a CSV cell as int or float"""
+    value = value.strip()
+    try:
+        return int(value)
+    except ValueError:
+        return float(value)
+
+
+def iter_csv(stream):
+    """Yield (line number, record or None, error or None) for each CSV data row"""
+    reader = csv.DictReader(_text_stream(stream))
+    for row in reader:
+        record = {}
+        try:
+            for field, value in row.items():
+                if field is None or value is None or value.strip() == '':
+                    continue
+                field = field.strip()
+                record[field] = _number(value) if field in NUMERIC_FIELDS or field == 'user_id' else value.strip()
+        except ValueError as e:
+            yield reader.line_num, None, f'Invalid number: {e}'
+            continue
+        yield reader.line_num, record, None
+
+
+def iter_ndjson(stream):
+    """Yield (line number, record or None, error or None) for each non-blank NDJSON line"""
+    for line_num, line in enumerate(_text_stream(stream), start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_num, None, f'Invalid JSON: {e}'
+            continue
+        if not isinstance(record, dict):
+            yield line_num, None, 'Each line must be a JSON object'
+            continue
+        yield line_num, record, None
+
+
+def iter_rows(stream, input_format):
+    """Row iterator for an import format"""
+    if input_format == 'csv':
+        return iter_csv(stream)
+    if input_format == 'ndjson':
+        return iter_ndjson(stream)
+    raise ValueError(f"Unsupported import format {input_format!r}, expected one of {', '.join(FORMATS)}")
+
+
+def _validate(record, user_id, user_column):
+    """Error message for a parsed record, or None when it can be imported (recorded_at is normalized)"""
+    missing = [field for field in REQUIRED_HEALTH_FIELDS if record.get(field) is None]
+    if missing:
+        return f"Missing required health parameters: {', '.join(missing)}"
+    for field in NUMERIC_FIELDS:
+        value = record.get(field)
+        if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+            return f'{field} must be a number'
+    if user_column and not isinstance(record.get('user_id', user_id), int):
+        return 'user_id must be an integer'
+    try:
+        record['recorded_at'] = parse_recorded_at(record.get('recorded_at'))
+    except ValueError as e:
+        return str(e)
+    return None
+
+
+def import_records(rows, predict_batch, conn, user_id=None, user_column=False,
+                   chunk_size=500, max_errors=1000):
+    """Import parsed rows chunk by chunk, yielding the running summary after each chunk.
+
+    ``predict_batch`` scores a list of health parameter dicts. Readings belong
+    to ``user_id``, or to each row's ``user_id`` column when ``user_column``
+    is set (falling back to ``user_id``). The same summary dict is updated and
+    yielded after every chunk; the last one has ``done`` set.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+
+    summary = {'rows': 0, 'imported': 0, 'failed': 0, 'chunks': 0, 'errors': [], 'done': False}
+
+    def fail(line, message):
+        summary['failed'] += 1
+        if max_errors is None or len(summary['errors']) < max_errors:
+            summary['errors'].append({'line': line, 'message': message})
+
+    def insert(groups):
+        """Insert (owner, items) groups in one transaction"""
+        cursor = conn.cursor()
+        try:
+            for owner, items in groups:
+                insert_health_records(
+                    cursor, owner,
+                    [params for _, _, params, _ in items],
+                    [ai_results for _, _, _, ai_results in items],
+                    [record.get('recorded_at') for _, record, _, _ in items]
+                )
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+    def flush(chunk):
+        health_params_list = [health_params_from_record(record) for _, record in chunk]
+        try:
+            ai_results_list = predict_batch(health_params_list)
+        except concurrent.futures.TimeoutError:
+            for line, _ in chunk:
+                fail(line, 'Health analysis timed out')
+            return
+
+        # Group by owner so each insert_health_records call gets one user_id
+        by_user = {}
+        for (line, record), params, ai_results in zip(chunk, health_params_list, ai_results_list):
+            owner = record.get('user_id', user_id) if user_column else user_id
+            by_user.setdefault(owner, []).append((line, record, params, ai_results))
+
+        try:
+            insert(list(by_user.items()))
+            summary['imported'] += len(chunk)
+        except sqlite3.Error:
+            # Find the offending rows: insert the chunk one row per transaction
+            for owner, items in by_user.items():
+                for item in items:
+                    try:
+                        insert([(owner, [item])])
+                        summary['imported'] += 1
+                    except sqlite3.Error as e:
+                        fail(item[0], f'Database error: {e}')
+
+    chunk = []
+    for line, record, error in rows:
+        summary['rows'] += 1
+        error = error or _validate(record, user_id, user_column)
+        if error:
+            fail(line, error)
+            continue
+        chunk.append((line, record))
+        if len(chunk) >= chunk_size:
+            flush(chunk)
+            chunk = []
+            summary['chunks'] += 1
+            yield summary
+
+    if chunk:
+        flush(chunk)
+        summary['chunks'] += 1
+    summary['done'] = True
+    yield summary
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Import historical readings from CSV or NDJSON')
+    parser.add_argument('file', help="Input file, or '-' for stdin")
+    parser.add_argument('--format', choices=FORMATS, help='Input format (default: from the file extension)')
+    parser.add_argument('--user-id', type=int, help='Owner of the imported readings')
+    parser.add_argument('--user-column', action='store_true',
+                        help="Take each reading's owner from its user_id column")
+    parser.add_argument('--chunk-size', type=int, default=500, help='Readings scored and inserted per transaction')
+    parser.add_argument('--database', default=database_path_from_url(
+        os.environ.get('DATABASE_URL', 'sqlite:///maternal_health.db')))
+    parser.add_argument('--errors-file', help='Write every row error as NDJSON to this file')
+    args = parser.parse_args()
+
+    input_format = args.format or detect_format(args.file)
+    if input_format is None:
+        parser.error('Cannot tell the format from the file name, pass --format')
+    if args.user_id is None and not args.user_column:
+        parser.error('Pass --user-id, --user-column or both')
+
+    db = ConnectionManager(args.database)
+    conn = db.connection()
+    # Keep stdout for the JSON summary
+    with contextlib.redirect_stdout(sys.stderr):
+        migrations.migrate(conn)
+        predictor = EnhancedRiskPredictor()
+
+    stream = sys.stdin.buffer if args.file == '-' else open(args.file, 'rb')
+    try:
+        for summary in import_records(
+            iter_rows(stream, input_format), predictor.predict_comprehensive_batch, conn,
+            user_id=args.user_id, user_column=args.user_column, chunk_size=args.chunk_size,
+            max_errors=None if args.errors_file else 1000
+        ):
+            print(f"Processed {summary['rows']} rows: {summary['imported']} imported, "
+                  f"{summary['failed']} failed", file=sys.stderr)
+    finally:
+        if stream is not sys.stdin.buffer:
+            stream.close()
+        db.close_all()
+
+    if args.errors_file:
+        with open(args.errors_file, 'w') as f:
+            for error in summary['errors']:
+                f.write(json.dumps(error) + '\n')
+        summary['errors'] = summary['errors'][:1000]
+    print(json.dumps(summary, indent=2))
+    sys.exit(1 if summary['failed'] else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from database import ConnectionManager
+
+
+class DashboardCache:
+    """Per-user cache of serialized dashboard responses with write-through invalidation.
+
+    The in-process tier is a bounded LRU of ``(generation, etag, body,
+    stored_at)`` entries. Every invalidation bumps the user's generation; a response built
+    from data read before an invalidation carries the old generation and is
+    not stored, so a slow reader cannot cache stale data over a newer write.
+    Generations are counted apart from the LRU, so evicting an entry never
+    takes a user's generation back to an older value.
+
+    With ``shared_path`` set, a SQLite table in that file is the source of
+    truth for every worker process: invalidations bump the generation there,
+    and a local entry is served only while its generation still matches the
+    shared one (a primary-key lookup instead of the dashboard queries).
+    Without it, invalidations only reach this process, so local entries
+    expire after ``ttl`` seconds: other worker processes serve a stale
+    dashboard for at most that long.
+    """
+
+    def __init__(self, max_size=1024, shared_path=None, ttl=None):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        # user_id -> local generation; never evicted (one int per user written to)
+        self._generations = {}
+        self._lock = threading.Lock()
+        self._shared = ConnectionManager(shared_path) if shared_path else None
+        self._shared_ready = False
+        self.hits = 0
+        self.misses = 0
+
+    def _shared_connection(self):
+        """Connection to the shared tier, creating its table on first use"""
+        conn = self._shared.connection()
+        if not self._shared_ready:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS dashboard_cache (
+                    user_id INTEGER PRIMARY KEY,
+                    generation INTEGER NOT NULL DEFAULT 0,
+                    etag TEXT,
+                    body BLOB
+                )
+            ''')
+            conn.commit()
+            self._shared_ready = True
+        return conn
+
+    def _store_local(self, user_id, entry, expected_generation=None):
+        """Insert an entry and evict the least recently used ones beyond max_size.
+
+        With ``expected_generation``, the entry is only stored if the user's
+        local generation still equals it.
+        """
+        with self._lock:
+            if expected_generation is not None and self._generations.get(user_id, 0) != expected_generation:
+                return False
+            self._entries[user_id] = entry
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return True
+
+    def generation(self, user_id):
+        """The user's current generation; read it before building a response and pass it to put()"""
+        if self._shared is not None:
+            row = self._shared_connection().execute(
+                'SELECT generation FROM dashboard_cache WHERE user_id = ?', (user_id,)
+            ).fetchone()
+            return row[0] if row else 0
+        with self._lock:
+            return self._generations.get(user_id, 0)
+
+    def get(self, user_id):
+        """Cached (etag, body) for a user, or None"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                self._entries.move_to_end(user_id)
+
+        if self._shared is not None:
+            row = self._shared_connection().execute(
+                'SELECT generation, etag, body FROM dashboard_cache WHERE user_id = ?', (user_id,)
+            ).fetchone()
+            if row is None or row[2] is None:
+                entry = None
+            elif entry is None or entry[0] != row[0]:
+                # Another worker built it, or ours is from an older generation
+                entry = (row[0], row[1], bytes(row[2]), time.monotonic())
+                self._store_local(user_id, entry)
+        elif entry is not None and self.ttl is not None and time.monotonic() - entry[3] > self.ttl:
+            entry = None
+
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[1], entry[2]
+
+    def put(self, user_id, generation, body):
+        """Cache a serialized response built at ``generation``; return its ETag"""
+        etag = hashlib.sha1(body).hexdigest()
+
+        if self._shared is not None:
+            conn = self._shared_connection()
+            # Stored only if nobody invalidated the user since `generation` was read
+            conn.execute('''
+                INSERT INTO dashboard_cache (user_id, generation, etag, body) VALUES (?, ?, ?, ?)
+                ON CONFLICT (user_id) DO UPDATE SET etag = excluded.etag, body = excluded.body
+                WHERE generation = excluded.generation
+            ''', (user_id, generation, etag, body))
+            conn.commit()
+            # get() revalidates local entries against the shared generation
+            self._store_local(user_id, (generation, etag, body, time.monotonic()))
+        else:
+            self._store_local(user_id, (generation, etag, body, time.monotonic()),
+                              expected_generation=generation)
+        return etag
+
+    def invalidate(self, user_id):
+        """Drop a user's cached response after their data changed"""
+        with self._lock:
+            # Puts from older generations are rejected from now on
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            self._entries.pop(user_id, None)
+
+        if self._shared is not None:
+            conn = self._shared_connection()
+            conn.execute('''
+                INSERT INTO dashboard_cache (user_id, generation) VALUES (?, 1)
+                ON CONFLICT (user_id) DO UPDATE SET
+                    generation = generation + 1, etag = NULL, body = NULL
+            ''', (user_id,))
+            conn.commit()
+
+    def stats(self):
+        """Hit/miss counters of this process"""
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'shared': self._shared is not None,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
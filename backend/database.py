@@ -0,0 +1,99 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+SQLITE_URL_PREFIX = 'sqlite:///'
+
+
+def database_path_from_url(url):
+    """Filesystem path of a sqlite:///path DATABASE_URL (a bare path is accepted too)"""
+    if url.startswith(SQLITE_URL_PREFIX):
+        return url[len(SQLITE_URL_PREFIX):]
+    if '://' in url:
+        raise ValueError(f"Unsupported DATABASE_URL {url!r}: only sqlite:/// is supported")
+    return url
+
+
+class ConnectionManager:
+    """Hands out one long-lived, tuned SQLite connection per thread.
+
+    Connections are opened once per thread instead of once per request, so
+    their page cache and prepared statement cache (``cached_statements``) stay
+    warm across requests. Every connection runs in WAL mode with
+    ``synchronous=NORMAL``, so readers never block the writer, and waits up to
+    ``busy_timeout_ms`` for the write lock instead of failing with
+    "database is locked" when several worker processes write at once.
+    """
+
+    def __init__(self, path, busy_timeout_ms=5000, cache_size_kib=16384, cached_statements=256):
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cache_size_kib = cache_size_kib
+        self.cached_statements = cached_statements
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def _connect(self):
+        """Open and configure a new connection"""
+        # Only the owning thread uses a connection; close_all may close it from another
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.busy_timeout_ms / 1000.0,
+            cached_statements=self.cached_statements,
+            check_same_thread=False
+        )
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f'PRAGMA cache_size=-{int(self.cache_size_kib)}')
+        conn.execute(f'PRAGMA busy_timeout={int(self.busy_timeout_ms)}')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        return conn
+
+    def connection(self):
+        """This thread's connection, opened on first use (and again after a fork)"""
+        if self._pid != os.getpid():
+            # Never share SQLite handles with a forked child
+            self._local = threading.local()
+            self._connections = []
+            self._pid = os.getpid()
+
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """Yield this thread's connection; commit on success, roll back on error"""
+        conn = self.connection()
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+    def release(self):
+        """Roll back anything a request left uncommitted so the connection can be reused"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and conn.in_transaction:
+            conn.rollback()
+
+    def close_all(self):
+        """Close every connection opened by this manager (threads reconnect on next use)"""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+    def set_path(self, path):
+        """Point the manager at another database file"""
+        self.close_all()
+        self.path = path
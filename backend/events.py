@@ -0,0 +1,159 @@
+"""
+In-process publish/subscribe hub for Server-Sent Events.
+
+Writes publish a compact event for the user they touched; every open
+/api/stream connection of that user has a subscription with a bounded queue.
+publish() never blocks: a subscriber whose queue is full is disconnected
+instead of buffering without limit; its stream ends with a resync event and
+the EventSource reconnects and reloads. The hub is shared by the threads of
+one worker process, so with several worker processes a client only hears
+about writes handled by the process serving its stream. Each open stream
+also holds one worker thread, so ``max_subscribers`` caps the streams of the
+whole process and subscribe() raises StreamLimitError past it, leaving the
+other threads free for ordinary requests.
+"""
+
+import itertools
+import json
+import queue
+import threading
+
+
+class StreamLimitError(RuntimeError):
+    """Raised when the process already has its maximum number of open streams"""
+
+
+class Subscription:
+    """One stream's queue of (event_id, event_type, data) tuples"""
+
+    def __init__(self, hub, user_id, max_queue):
+        self.hub = hub
+        self.user_id = user_id
+        self.overflowed = False
+        self.closed = False
+        self._queue = queue.Queue(maxsize=max_queue)
+
+    def offer(self, item):
+        """Queue an event without blocking; False once the subscriber cannot keep up"""
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except queue.Full:
+            self.overflowed = True
+            return False
+
+    def get(self, timeout):
+        """Next event, or None when none arrived within ``timeout`` seconds"""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        """Stop receiving events"""
+        self.hub.unsubscribe(self)
+
+    def _wake(self):
+        """Mark closed and wake a stream blocked in get(), so it frees its thread now"""
+        self.closed = True
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+
+
+class EventHub:
+    """Thread-safe map of user id to subscriptions"""
+
+    def __init__(self, max_queue=32, max_subscribers_per_user=5, max_subscribers=None):
+        if max_queue < 1:
+            raise ValueError("max_queue must be at least 1")
+        self.max_queue = max_queue
+        self.max_subscribers_per_user = max_subscribers_per_user
+        self.max_subscribers = max_subscribers
+        self._subscribers = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self.published = 0
+        self.dropped = 0
+        self.rejected = 0
+
+    def subscribe(self, user_id):
+        """New subscription for a user's events; the oldest one is closed past the per-user limit.
+
+        Raises StreamLimitError when ``max_subscribers`` streams are already
+        open and this user has none to give up.
+        """
+        subscription = Subscription(self, user_id, self.max_queue)
+        with self._lock:
+            open_count = sum(len(subscriptions) for subscriptions in self._subscribers.values())
+            at_user_limit = len(self._subscribers.get(user_id, ())) >= self.max_subscribers_per_user
+            if self.max_subscribers is not None and open_count >= self.max_subscribers and not at_user_limit:
+                self.rejected += 1
+                raise StreamLimitError(f"{open_count} event streams are already open")
+            subscriptions = self._subscribers.setdefault(user_id, [])
+            subscriptions.append(subscription)
+            while len(subscriptions) > self.max_subscribers_per_user:
+                subscriptions.pop(0)._wake()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """Remove a subscription (no-op when already removed)"""
+        with self._lock:
+            subscription._wake()
+            subscriptions = self._subscribers.get(subscription.user_id, [])
+            if subscription in subscriptions:
+                subscriptions.remove(subscription)
+            if not subscriptions:
+                self._subscribers.pop(subscription.user_id, None)
+
+    def publish(self, user_id, event_type, data):
+        """Send an event to the user's subscribers; returns how many received it"""
+        with self._lock:
+            subscriptions = list(self._subscribers.get(user_id, ()))
+            event_id = next(self._ids)
+            self.published += 1
+        item = (event_id, event_type, data)
+
+        delivered = 0
+        for subscription in subscriptions:
+            if subscription.offer(item):
+                delivered += 1
+            else:
+                self.dropped += 1
+                self.unsubscribe(subscription)
+        return delivered
+
+    def subscriber_count(self):
+        """Open subscriptions across all users"""
+        with self._lock:
+            return sum(len(subscriptions) for subscriptions in self._subscribers.values())
+
+
+def format_event(event_id, event_type, data):
+    """Server-Sent Events frame of an event"""
+    return f"id: {event_id}\nevent: {event_type}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+def stream(subscription, heartbeat=15, retry_ms=3000):
+    """Generate the SSE frames of a subscription until it is closed or overflows.
+
+    A comment line is sent every ``heartbeat`` seconds without events, which
+    keeps proxies from closing an idle connection and lets the server notice
+    a client that went away. An overflowed stream ends with a ``resync``
+    event, since some of its events were dropped.
+    """
+    try:
+        yield f'retry: {int(retry_ms)}\n: connected\n\n'
+        while not subscription.closed:
+            item = subscription.get(heartbeat)
+            if item is None:
+                if not subscription.closed:
+                    yield ': heartbeat\n\n'
+            else:
+                yield format_event(*item)
+        if subscription.overflowed:
+            # Events were lost: tell the client to reload before it reconnects
+            yield 'event: resync\ndata: {}\n\n'
+    finally:
+        subscription.close()
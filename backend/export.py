@@ -0,0 +1,76 @@
+import csv
+import io
+import json
+
+from records import RECORD_COLUMNS, fetch_record_page
+
+EXPORT_COLUMNS = RECORD_COLUMNS
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson'
+}
+
+
+def iter_record_pages(conn, user_id=None, since=None, until=None, page_size=500):
+    """Yield pages of health_records rows (as dicts) in (recorded_at, id) order.
+
+    Pages are fetched by keyset, so every page costs the same however deep
+    into the history it is, and only one page is held in memory at a time.
+    """
+    after = None
+    while True:
+        page = fetch_record_page(conn, EXPORT_COLUMNS, user_id, since, until, after, page_size)
+        if not page:
+            return
+        yield page
+        if len(page) < page_size:
+            return
+        after = (page[-1]['recorded_at'], page[-1]['id'])
+
+
+def _add_condition_probabilities(conn, page, conditions):
+    """Add one <condition>_probability field per condition from record_conditions"""
+    placeholders = ', '.join('?' * len(page))
+    probabilities = {}
+    for record_id, condition, probability in conn.execute(f'''
+        SELECT record_id, condition, probability FROM record_conditions
+        WHERE record_id IN ({placeholders})
+    ''', [record['id'] for record in page]):
+        probabilities[(record_id, condition)] = probability
+
+    for record in page:
+        for condition in conditions:
+            record[f'{condition}_probability'] = probabilities.get((record['id'], condition))
+
+
+def stream_export(conn, export_format, user_id=None, since=None, until=None,
+                  conditions=None, page_size=500):
+    """Generate the export body chunk by chunk (one chunk per page) as CSV or NDJSON text.
+
+    When ``conditions`` is given, each record also carries the predicted
+    probability of every listed condition.
+    """
+    if export_format not in FORMATS:
+        raise ValueError(f"Unsupported export format {export_format!r}")
+
+    fields = EXPORT_COLUMNS + [f'{condition}_probability' for condition in conditions or []]
+    buffer = io.StringIO()
+    writer = None
+    if export_format == 'csv':
+        writer = csv.DictWriter(buffer, fieldnames=fields, lineterminator='\n')
+        writer.writeheader()
+        yield buffer.getvalue()
+
+    for page in iter_record_pages(conn, user_id, since, until, page_size):
+        if conditions:
+            _add_condition_probabilities(conn, page, conditions)
+
+        buffer.seek(0)
+        buffer.truncate()
+        if writer is not None:
+            writer.writerows(page)
+        else:
+            for record in page:
+                record['detected_conditions'] = json.loads(record['detected_conditions'] or '[]')
+                buffer.write(json.dumps(record) + '\n')
+        yield buffer.getvalue()
@@ -0,0 +1,397 @@
+"""
+Versioned schema migrations for the SQLite database.
+
+The base tables are created idempotently before any migration runs; every
+later schema change is a numbered migration. Each migration runs once, in its
+own IMMEDIATE transaction, and is recorded in the schema_version table.
+Several workers may start at the same time: the write lock serializes them and
+the version is re-checked inside it, so each migration is applied exactly once.
+
+Usage (from the backend directory):
+    python -m migrations            # apply pending migrations
+    python -m migrations --status   # list applied and pending migrations
+"""
+
+import argparse
+import json
+import os
+
+from database import ConnectionManager, database_path_from_url
+
+
+def create_base_schema(conn):
+    """Create the original tables if they do not exist yet"""
+    # Users table
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            email TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            name TEXT NOT NULL,
+            age INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    # Health records table with additional parameters
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS health_records (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            systolic_bp INTEGER NOT NULL,
+            diastolic_bp INTEGER NOT NULL,
+            blood_sugar REAL NOT NULL,
+            body_weight REAL NOT NULL,
+            hemoglobin REAL NOT NULL,
+            heart_rate INTEGER DEFAULT 75,
+            protein_urine REAL DEFAULT 0.1,
+            age INTEGER DEFAULT 28,
+            gestational_week INTEGER DEFAULT 20,
+            risk_level TEXT NOT NULL,
+            detected_conditions TEXT DEFAULT '[]',
+            condition_details TEXT DEFAULT '{}',
+            recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+    
+    # Pregnancy profiles table
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS pregnancy_profiles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            last_menstrual_period DATE NOT NULL,
+            expected_due_date DATE NOT NULL,
+            current_week INTEGER,
+            is_active BOOLEAN DEFAULT TRUE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+    
+    # Applied migrations
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.commit()
+
+
+def _index_health_records_by_user(conn):
+    """Dashboard, report and history queries filter on user_id and sort by recorded_at"""
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_health_records_user_recorded
+        ON health_records (user_id, recorded_at DESC)
+    ''')
+
+
+def _index_active_pregnancy_profiles(conn):
+    """The active-profile lookup filters on user_id and is_active and sorts by created_at"""
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_pregnancy_profiles_user_active
+        ON pregnancy_profiles (user_id, is_active, created_at DESC)
+    ''')
+
+
+def _add_enhanced_health_record_columns(conn):
+    """Databases created before the enhanced model lack its extra columns"""
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(health_records)')}
+    for column, definition in [
+        ('heart_rate', 'INTEGER DEFAULT 75'),
+        ('protein_urine', 'REAL DEFAULT 0.1'),
+        ('age', 'INTEGER DEFAULT 28'),
+        ('gestational_week', 'INTEGER DEFAULT 20'),
+        ('detected_conditions', "TEXT DEFAULT '[]'"),
+        ('condition_details', "TEXT DEFAULT '{}'")
+    ]:
+        if column not in columns:
+            conn.execute(f'ALTER TABLE health_records ADD COLUMN {column} {definition}')
+
+
+def _create_record_conditions(conn):
+    """Per-condition predictions, one row per record and condition, indexed for triage queries"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS record_conditions (
+            record_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            condition TEXT NOT NULL,
+            probability REAL NOT NULL,
+            severity TEXT,
+            detected BOOLEAN NOT NULL DEFAULT FALSE,
+            PRIMARY KEY (record_id, condition),
+            FOREIGN KEY (record_id) REFERENCES health_records (id),
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_record_conditions_condition_probability
+        ON record_conditions (condition, probability)
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_record_conditions_user
+        ON record_conditions (user_id)
+    ''')
+
+
+def _backfill_record_conditions(conn, chunk_size=1000):
+    """Copy condition_details JSON from existing health_records rows into record_conditions"""
+    last_id = 0
+    while True:
+        rows = conn.execute('''
+            SELECT id, user_id, condition_details FROM health_records
+            WHERE id > ? AND condition_details IS NOT NULL AND condition_details NOT IN ('', '{}')
+            ORDER BY id
+            LIMIT ?
+        ''', (last_id, chunk_size)).fetchall()
+        if not rows:
+            break
+        
+        conn.executemany('''
+            INSERT OR IGNORE INTO record_conditions
+            (record_id, user_id, condition, probability, severity, detected)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', [
+            (record_id, user_id, condition, float(details['probability']),
+             details.get('severity'), bool(details.get('detected')))
+            for record_id, user_id, condition_details in rows
+            for condition, details in json.loads(condition_details).items()
+        ])
+        last_id = rows[-1][0]
+
+
+def _index_health_records_by_time(conn):
+    """Clinic-wide exports page through every user's records in (recorded_at, id) order"""
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_health_records_recorded
+        ON health_records (recorded_at)
+    ''')
+
+
+def _create_vital_rollups(conn):
+    """Daily and weekly vital-sign aggregates, backfilled from the existing history"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS vital_rollups (
+            user_id INTEGER NOT NULL,
+            period TEXT NOT NULL,
+            period_start DATE NOT NULL,
+            readings INTEGER NOT NULL DEFAULT 0,
+            systolic_bp_sum REAL,
+            systolic_bp_min REAL,
+            systolic_bp_max REAL,
+            diastolic_bp_sum REAL,
+            diastolic_bp_min REAL,
+            diastolic_bp_max REAL,
+            blood_sugar_sum REAL,
+            blood_sugar_min REAL,
+            blood_sugar_max REAL,
+            body_weight_sum REAL,
+            body_weight_min REAL,
+            body_weight_max REAL,
+            hemoglobin_sum REAL,
+            hemoglobin_min REAL,
+            hemoglobin_max REAL,
+            normal_count INTEGER NOT NULL DEFAULT 0,
+            medium_count INTEGER NOT NULL DEFAULT 0,
+            high_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, period, period_start),
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+    # Days, and ISO weeks starting on the Monday on or before the reading
+    for period, period_start in (('day', "date(recorded_at)"),
+                                 ('week', "date(recorded_at, '-6 days', 'weekday 1')")):
+        conn.execute(f'''
+            INSERT OR REPLACE INTO vital_rollups
+            (user_id, period, period_start, readings,
+             systolic_bp_sum, systolic_bp_min, systolic_bp_max,
+             diastolic_bp_sum, diastolic_bp_min, diastolic_bp_max,
+             blood_sugar_sum, blood_sugar_min, blood_sugar_max,
+             body_weight_sum, body_weight_min, body_weight_max,
+             hemoglobin_sum, hemoglobin_min, hemoglobin_max,
+             normal_count, medium_count, high_count)
+            SELECT user_id, '{period}', {period_start}, COUNT(*),
+                   SUM(systolic_bp), MIN(systolic_bp), MAX(systolic_bp),
+                   SUM(diastolic_bp), MIN(diastolic_bp), MAX(diastolic_bp),
+                   SUM(blood_sugar), MIN(blood_sugar), MAX(blood_sugar),
+                   SUM(body_weight), MIN(body_weight), MAX(body_weight),
+                   SUM(hemoglobin), MIN(hemoglobin), MAX(hemoglobin),
+                   SUM(risk_level = 'Normal'), SUM(risk_level = 'Medium'), SUM(risk_level = 'High')
+            FROM health_records
+            WHERE {period_start} IS NOT NULL
+            GROUP BY user_id, {period_start}
+        ''')
+
+
+def _index_health_records_by_user_id(conn):
+    """Report cache keys look up a user's latest record id"""
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_health_records_user_id
+        ON health_records (user_id, id)
+    ''')
+
+
+def _create_report_jobs(conn):
+    """Background PDF report jobs, shared by every worker process"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS report_jobs (
+            id TEXT PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            report_key TEXT NOT NULL,
+            status TEXT NOT NULL,
+            error TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_report_jobs_user_key
+        ON report_jobs (user_id, report_key)
+    ''')
+
+
+def _create_alerts(conn):
+    """Per-user deterioration alert state and the alerts it raises"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS alert_state (
+            user_id INTEGER PRIMARY KEY,
+            state TEXT NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS alerts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            record_id INTEGER NOT NULL,
+            alert_type TEXT NOT NULL,
+            severity TEXT NOT NULL,
+            message TEXT NOT NULL,
+            details TEXT DEFAULT '{}',
+            recorded_at TIMESTAMP,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id),
+            FOREIGN KEY (record_id) REFERENCES health_records (id)
+        )
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_alerts_user
+        ON alerts (user_id, id)
+    ''')
+
+
+def _clear_backfilled_condition_details(conn, chunk_size=500):
+    """Clear the condition_details JSON of records whose record_conditions rows match it.
+
+    A record whose rows are missing or differ keeps its JSON, so nothing is
+    lost if the backfill was incomplete.
+    """
+    last_id = 0
+    kept = 0
+    while True:
+        rows = conn.execute('''
+            SELECT id, condition_details FROM health_records
+            WHERE id > ? AND condition_details IS NOT NULL AND condition_details NOT IN ('', '{}')
+            ORDER BY id
+            LIMIT ?
+        ''', (last_id, chunk_size)).fetchall()
+        if not rows:
+            break
+
+        stored = {}
+        for record_id, condition, probability, severity, detected in conn.execute(f'''
+            SELECT record_id, condition, probability, severity, detected FROM record_conditions
+            WHERE record_id IN ({', '.join('?' * len(rows))})
+        ''', [record_id for record_id, _ in rows]):
+            stored.setdefault(record_id, {})[condition] = (probability, severity, bool(detected))
+
+        verified = []
+        for record_id, condition_details in rows:
+            expected = {
+                condition: (float(details['probability']), details.get('severity'), bool(details.get('detected')))
+                for condition, details in json.loads(condition_details).items()
+            }
+            if stored.get(record_id, {}) == expected:
+                verified.append((record_id,))
+            else:
+                kept += 1
+        conn.executemany("UPDATE health_records SET condition_details = '{}' WHERE id = ?", verified)
+        last_id = rows[-1][0]
+    if kept:
+        print(f"Kept condition_details of {kept} record(s) that do not match record_conditions")
+
+
+# (version, description, apply) in the order they must run; never renumber or edit
+# an applied migration, add a new one instead
+MIGRATIONS = [
+    (1, 'Index health_records on (user_id, recorded_at DESC)', _index_health_records_by_user),
+    (2, 'Index pregnancy_profiles on (user_id, is_active, created_at DESC)', _index_active_pregnancy_profiles),
+    (3, 'Add enhanced model columns to legacy health_records tables', _add_enhanced_health_record_columns),
+    (4, 'Create record_conditions with (condition, probability) and (user_id) indexes', _create_record_conditions),
+    (5, 'Backfill record_conditions from health_records.condition_details', _backfill_record_conditions),
+    (6, 'Index health_records on (recorded_at)', _index_health_records_by_time),
+    (7, 'Create and backfill vital_rollups', _create_vital_rollups),
+    (8, 'Index health_records on (user_id, id)', _index_health_records_by_user_id),
+    (9, 'Create report_jobs with a (user_id, report_key) index', _create_report_jobs),
+    (10, 'Create alert_state and alerts with a (user_id, id) index', _create_alerts),
+    (11, 'Clear health_records.condition_details copied into record_conditions', _clear_backfilled_condition_details)
+]
+
+
+def applied_versions(conn):
+    """Versions recorded in schema_version"""
+    create_base_schema(conn)
+    return {row[0] for row in conn.execute('SELECT version FROM schema_version')}
+
+
+def migrate(conn):
+    """Create the base tables, apply every pending migration and return the versions applied"""
+    if conn.in_transaction:
+        conn.commit()
+    create_base_schema(conn)
+
+    applied = []
+    for version, description, apply in MIGRATIONS:
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            done = conn.execute('SELECT 1 FROM schema_version WHERE version = ?', (version,)).fetchone()
+            if not done:
+                apply(conn)
+                conn.execute('INSERT INTO schema_version (version, description) VALUES (?, ?)',
+                             (version, description))
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+        if not done:
+            print(f"Applied migration {version}: {description}")
+            applied.append(version)
+    return applied
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Apply database schema migrations')
+    parser.add_argument('--database', default=database_path_from_url(
+        os.environ.get('DATABASE_URL', 'sqlite:///maternal_health.db')))
+    parser.add_argument('--status', action='store_true', help='List migrations without applying them')
+    args = parser.parse_args()
+
+    db = ConnectionManager(args.database)
+    conn = db.connection()
+    if args.status:
+        applied = applied_versions(conn)
+        for version, description, _ in MIGRATIONS:
+            print(f"{version:>4}  {'applied' if version in applied else 'pending'}  {description}")
+    else:
+        applied = migrate(conn)
+        print(f"{len(applied)} migration(s) applied")
+    db.close_all()
+
+
+if __name__ == '__main__':
+    main()
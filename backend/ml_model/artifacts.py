@@ -0,0 +1,201 @@
+import datetime
+import hashlib
+import json
+import os
+import platform
+import secrets
+import shutil
+
+import joblib
+import numpy as np
+import sklearn
+
+ARTIFACTS_DIR = os.environ.get(
+    'MODEL_ARTIFACTS_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'artifacts')
+)
+MANIFEST_FILE = 'manifest.json'
+CURRENT_FILE = 'CURRENT'
+HISTORY_FILE = 'HISTORY'
+
+# Artifact name -> file name inside a version directory
+ARTIFACT_FILES = {
+    'risk_model': 'enhanced_risk_model.joblib',
+    'condition_model': 'condition_model.joblib',
+    'scaler': 'enhanced_scaler.joblib'
+}
+
+
+class ArtifactError(RuntimeError):
+    """Raised when model artifacts are missing, corrupted or incompatible"""
+
+
+def _sha256(path):
+    """Compute the SHA-256 checksum of a file"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _write_atomic(path, text):
+    """Write a small text file so readers never observe a partial write"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def new_version():
+    """Create a sortable, unique version identifier for a training run.
+
+    UTC time to the microsecond, plus a random suffix so concurrent builds
+    (parallel CI jobs) never collide. Ids still sort by time, after the
+    second-resolution ids of older builds from the same second.
+    """
+    return f"{datetime.datetime.utcnow().strftime('%Y%m%d%H%M%S%f')}-{secrets.token_hex(2)}"
+
+
+def save_artifacts(models, metadata=None, version=None, activate=True, artifacts_dir=None):
+    """Write a versioned artifact set with a checksum manifest.
+
+    The files are written to a temporary directory that is renamed into place
+    once complete, so a half-written version is never visible to loaders.
+    """
+    artifacts_dir = artifacts_dir or ARTIFACTS_DIR
+    version = version or new_version()
+    version_dir = os.path.join(artifacts_dir, version)
+    if os.path.exists(version_dir):
+        raise ArtifactError(f"Model version {version} already exists")
+
+    tmp_dir = os.path.join(artifacts_dir, f".{version}.tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    files = {}
+    for name, file_name in ARTIFACT_FILES.items():
+        path = os.path.join(tmp_dir, file_name)
+        joblib.dump(models[name], path)
+        files[name] = {'file': file_name, 'sha256': _sha256(path)}
+
+    manifest = {
+        'version': version,
+        'created_at': datetime.datetime.utcnow().isoformat() + 'Z',
+        'python_version': platform.python_version(),
+        'sklearn_version': sklearn.__version__,
+        'numpy_version': np.__version__,
+        'files': files,
+        'metadata': metadata or {}
+    }
+    _write_atomic(os.path.join(tmp_dir, MANIFEST_FILE), json.dumps(manifest, indent=2))
+    os.rename(tmp_dir, version_dir)
+
+    if activate:
+        set_current_version(version, artifacts_dir)
+    return version
+
+
+def list_versions(artifacts_dir=None):
+    """List all complete artifact versions, oldest first"""
+    artifacts_dir = artifacts_dir or ARTIFACTS_DIR
+    if not os.path.isdir(artifacts_dir):
+        return []
+    return sorted(
+        name for name in os.listdir(artifacts_dir)
+        if os.path.isfile(os.path.join(artifacts_dir, name, MANIFEST_FILE))
+    )
+
+
+def current_version(artifacts_dir=None):
+    """Get the version marked as current, falling back to the newest one"""
+    artifacts_dir = artifacts_dir or ARTIFACTS_DIR
+    current_path = os.path.join(artifacts_dir, CURRENT_FILE)
+    if os.path.exists(current_path):
+        with open(current_path) as f:
+            return f.read().strip()
+
+    versions = list_versions(artifacts_dir)
+    return versions[-1] if versions else None
+
+
+def set_current_version(version, artifacts_dir=None):
+    """Mark an artifact version as the one loaded by default and record it in the history"""
+    artifacts_dir = artifacts_dir or ARTIFACTS_DIR
+    if version not in list_versions(artifacts_dir):
+        raise ArtifactError(f"Unknown model version: {version}")
+    history = activation_history(artifacts_dir)
+    if not history or history[-1] != version:
+        _write_atomic(os.path.join(artifacts_dir, HISTORY_FILE), '\n'.join(history + [version]) + '\n')
+    _write_atomic(os.path.join(artifacts_dir, CURRENT_FILE), version + '\n')
+
+
+def activation_history(artifacts_dir=None):
+    """Versions in the order they were made current, most recent last"""
+    artifacts_dir = artifacts_dir or ARTIFACTS_DIR
+    history_path = os.path.join(artifacts_dir, HISTORY_FILE)
+    if not os.path.exists(history_path):
+        return []
+    with open(history_path) as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def previous_version(artifacts_dir=None):
+    """The version that was current before the present one, or None"""
+    history = activation_history(artifacts_dir)
+    return history[-2] if len(history) > 1 else None
+
+
+def rollback_current_version(artifacts_dir=None):
+    """Make the previously current version current again and drop the latest history entry"""
+    artifacts_dir = artifacts_dir or ARTIFACTS_DIR
+    history = activation_history(artifacts_dir)
+    if len(history) < 2:
+        raise ArtifactError("No previous model version to roll back to")
+    _write_atomic(os.path.join(artifacts_dir, HISTORY_FILE), '\n'.join(history[:-1]) + '\n')
+    _write_atomic(os.path.join(artifacts_dir, CURRENT_FILE), history[-2] + '\n')
+    return history[-2]
+
+
+def read_manifest(version, artifacts_dir=None):
+    """Read the manifest of an artifact version"""
+    artifacts_dir = artifacts_dir or ARTIFACTS_DIR
+    manifest_path = os.path.join(artifacts_dir, version, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        raise ArtifactError(f"Model version {version} not found in {artifacts_dir}")
+    with open(manifest_path) as f:
+        return json.load(f)
+
+
+def load_artifacts(version=None, artifacts_dir=None):
+    """Load and verify an artifact set. Never trains a model.
+
+    Returns a ``(models, manifest)`` tuple. Raises ``ArtifactError`` if the
+    artifacts are missing, fail their checksum or were built with a different
+    scikit-learn version.
+    """
+    artifacts_dir = artifacts_dir or ARTIFACTS_DIR
+    version = version or current_version(artifacts_dir)
+    if version is None:
+        raise ArtifactError(
+            f"No model artifacts found in {artifacts_dir}. "
+            "Build them with `python -m ml_model.train` before starting the server."
+        )
+
+    manifest = read_manifest(version, artifacts_dir)
+    if manifest['sklearn_version'] != sklearn.__version__:
+        raise ArtifactError(
+            f"Model version {version} was built with scikit-learn {manifest['sklearn_version']} "
+            f"but {sklearn.__version__} is installed. Rebuild with `python -m ml_model.train`."
+        )
+
+    models = {}
+    for name, entry in manifest['files'].items():
+        path = os.path.join(artifacts_dir, version, entry['file'])
+        if not os.path.exists(path):
+            raise ArtifactError(f"Missing artifact {entry['file']} for model version {version}")
+        if _sha256(path) != entry['sha256']:
+            raise ArtifactError(f"Checksum mismatch for {entry['file']} in model version {version}")
+        models[name] = joblib.load(path)
+
+    return models, manifest
@@ -0,0 +1,124 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+
+
+class MicroBatchScheduler:
+    """Coalesces concurrent single-reading predictions into batched calls.
+
+    Callers submit one reading and get a ``Future``. A worker thread collects
+    readings until ``max_batch_size`` is reached or ``max_wait_ms`` has passed
+    since the first one arrived, scores them with one ``predict_batch`` call
+    and resolves every caller's future with its own result.
+    """
+
+    def __init__(self, predict_batch, max_batch_size=32, max_wait_ms=2.0):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+        self._worker_pid = None
+        self._closed = False
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+
+    def _ensure_worker(self):
+        """Start the worker thread lazily, and again in a forked child process"""
+        if self._worker is not None and self._worker_pid == os.getpid() and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is not None and self._worker_pid == os.getpid() and self._worker.is_alive():
+                return
+            if self._worker_pid != os.getpid():
+                self._queue = queue.Queue()
+            self._worker = threading.Thread(target=self._run, name='inference-microbatch', daemon=True)
+            self._worker_pid = os.getpid()
+            self._worker.start()
+
+    def submit(self, health_params):
+        """Queue one reading for scoring and return a Future for its result"""
+        if self._closed:
+            raise RuntimeError("Scheduler is closed")
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((health_params, future))
+        return future
+
+    def predict(self, health_params, timeout=None):
+        """Score one reading through the scheduler and wait for the result.
+
+        On timeout the reading is cancelled if its batch has not started;
+        otherwise the batch runs to completion and the result is discarded.
+        """
+        future = self.submit(health_params)
+        try:
+            return future.result(timeout=timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    def close(self):
+        """Stop accepting readings; queued readings are still scored"""
+        self._closed = True
+        self._queue.put(None)
+
+    def stats(self):
+        """Batching counters"""
+        return {
+            'batches': self.batches,
+            'items': self.items,
+            'largest_batch': self.largest_batch,
+            'mean_batch_size': self.items / self.batches if self.batches else 0.0,
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000.0
+        }
+
+    def _collect(self, first):
+        """Gather readings that arrive within the wait window after the first one"""
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._closed = True
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        """Worker loop: collect a batch, score it, resolve the futures"""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [
+                (health_params, future) for health_params, future in self._collect(item)
+                if future.set_running_or_notify_cancel()
+            ]
+            if batch:
+                try:
+                    results = self.predict_batch([health_params for health_params, _ in batch])
+                except Exception as e:
+                    for _, future in batch:
+                        future.set_exception(e)
+                else:
+                    for (_, future), result in zip(batch, results):
+                        future.set_result(result)
+                self.batches += 1
+                self.items += len(batch)
+                self.largest_batch = max(self.largest_batch, len(batch))
+            if self._closed and self._queue.empty():
+                return
@@ -0,0 +1,105 @@
+"""
+Compare the two condition-model backends on the same synthetic data.
+
+'multioutput' wraps one RandomForestClassifier per condition in a
+MultiOutputClassifier; 'native' fits one RandomForestClassifier on all seven
+condition columns. For each backend this reports held-out accuracy, memory
+footprint (pickled model and compiled node arrays) and per-call latency for a
+single reading through sklearn and through the compiled evaluator.
+
+Usage (from the backend directory):
+    python -m ml_model.compare_condition_backends [--n-samples N] [--seed SEED]
+"""
+
+import argparse
+import contextlib
+import json
+import pickle
+import sys
+import time
+
+import numpy as np
+
+from ml_model.compiled_forest import CompiledForest
+from ml_model.enhanced_risk_predictor import EnhancedRiskPredictor
+
+
+def _latency_ms(fn, repeats):
+    """Median wall time of fn() in milliseconds"""
+    fn()
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return float(np.median(timings) * 1000)
+
+
+def _compiled_nbytes(engine):
+    """Bytes held by a compiled evaluator's node and leaf arrays"""
+    total = (engine.feature.nbytes + engine.threshold.nbytes + engine.left.nbytes + engine.right.nbytes
+             + engine.missing_left.nbytes)
+    for forest in engine.forests:
+        total += sum(values.nbytes for values in forest['leaf_values'])
+    return total
+
+
+def evaluate_backend(backend, n_samples, seed, repeats):
+    """Train one backend and measure accuracy, memory and latency"""
+    predictor = EnhancedRiskPredictor(load=False)
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(sys.stderr):  # Keep stdout clean for the JSON report
+        predictor._train_model(n_samples=n_samples, seed=seed, condition_backend=backend)
+    training_seconds = time.perf_counter() - started
+
+    X_test, _, y_test = predictor._generate_training_data(n_samples=n_samples, seed=seed + 1)
+    X_test_scaled = predictor.scaler.transform(X_test)
+    y_pred = predictor.condition_model.predict(X_test_scaled)
+
+    condition_forests = predictor._compiled_forests()[1:]
+    compiled = CompiledForest(condition_forests, predictor.scaler)
+    row = X_test[:1]
+    row_scaled = X_test_scaled[:1]
+
+    return {
+        'backend': backend,
+        'trees': sum(len(forest.estimators_) for forest in condition_forests),
+        'training_seconds': round(training_seconds, 3),
+        'accuracy': {
+            'per_condition': {
+                condition: float(np.mean(y_pred[:, i] == y_test[:, i]))
+                for i, condition in enumerate(predictor.conditions)
+            },
+            'mean_per_condition': float(np.mean(y_pred == y_test)),
+            'exact_match': float(np.mean(np.all(y_pred == y_test, axis=1)))
+        },
+        'memory_bytes': {
+            'pickled_model': len(pickle.dumps(predictor.condition_model)),
+            'compiled_arrays': _compiled_nbytes(compiled)
+        },
+        'latency_ms': {
+            'sklearn_single_row': _latency_ms(
+                lambda: predictor.condition_model.predict_proba(row_scaled), repeats
+            ),
+            'compiled_single_row': _latency_ms(lambda: compiled.predict_proba(row), repeats * 10)
+        }
+    }
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Compare condition-model backends')
+    parser.add_argument('--n-samples', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeats', type=int, default=20, help='Timed calls per latency measurement')
+    args = parser.parse_args()
+
+    results = [
+        evaluate_backend(backend, args.n_samples, args.seed, args.repeats)
+        for backend in ('multioutput', 'native')
+    ]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
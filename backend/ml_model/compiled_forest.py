@@ -0,0 +1,227 @@
+import numpy as np
+import sklearn
+
+# scikit-learn < 1.4 stores class counts in tree_.value and normalizes them in
+# predict_proba; later versions store the normalized fractions directly.
+_NORMALIZE_LEAF_VALUES = tuple(int(part) for part in sklearn.__version__.split('.')[:2]) < (1, 4)
+
+_SIGN_MASK = np.int64(0x7FFFFFFFFFFFFFFF)
+
+
+def _to_ordered(values):
+    """Map float64 values to int64 keys that sort in the same order"""
+    bits = np.ascontiguousarray(values, dtype=np.float64).view(np.int64)
+    return bits ^ ((bits >> 63) & _SIGN_MASK)
+
+
+def _from_ordered(keys):
+    """Inverse of ``_to_ordered``"""
+    bits = keys ^ ((keys >> 63) & _SIGN_MASK)
+    return bits.view(np.float64)
+
+
+def _fold_thresholds(thresholds, features, mean, scale):
+    """Move split thresholds from scaled feature space into raw feature space.
+
+    sklearn scales a raw value ``x`` as ``(x - mean) / scale`` in float64,
+    casts it to float32 and then tests ``value <= threshold``. That test is
+    monotone in ``x``, so for every split there is a largest float64 ``x``
+    that still goes left. A bisection over the ordered float64 bit patterns
+    finds it exactly, which keeps ``x <= folded_threshold`` bit-identical to
+    the sklearn decision for every possible input.
+    """
+    mean = mean[features]
+    scale = scale[features]
+
+    def goes_left(x):
+        scaled = ((x - mean) / scale).astype(np.float32)
+        return scaled.astype(np.float64) <= thresholds
+
+    lo = np.full(thresholds.shape, _to_ordered(np.array([-np.inf]))[0])
+    hi = np.full(thresholds.shape, _to_ordered(np.array([np.inf]))[0])
+    with np.errstate(over='ignore', invalid='ignore'):
+        for _ in range(66):
+            mid = (lo >> 1) + (hi >> 1) + (lo & hi & 1)
+            left = goes_left(_from_ordered(mid))
+            lo = np.where(left, mid, lo)
+            hi = np.where(left, hi, mid)
+    return _from_ordered(lo)
+
+
+def _leaf_probabilities(tree, n_classes):
+    """Per-node class probabilities for each output, as sklearn's predict_proba returns them"""
+    outputs = []
+    for k, n_classes_k in enumerate(n_classes):
+        proba = np.array(tree.value[:, k, :n_classes_k], dtype=np.float64)
+        if _NORMALIZE_LEAF_VALUES:
+            normalizer = proba.sum(axis=1)[:, np.newaxis]
+            normalizer[normalizer == 0.0] = 1.0
+            proba /= normalizer
+        outputs.append(proba)
+    return outputs
+
+
+class CompiledForest:
+    """Flat NumPy evaluator for fitted random forest classifiers.
+
+    All trees of all given forests are exported into one contiguous node pool
+    (feature, threshold, children, leaf values) with the ``StandardScaler``
+    folded into the thresholds, so raw feature rows can be scored against every
+    forest in a single vectorized walk. Probabilities are bit-identical to
+    ``forest.predict_proba(scaler.transform(X))``.
+    """
+
+    def __init__(self, forests, scaler=None):
+        self.n_features = forests[0].n_features_in_
+        if scaler is not None and getattr(scaler, 'mean_', None) is not None:
+            mean = np.asarray(scaler.mean_, dtype=np.float64)
+        else:
+            mean = np.zeros(self.n_features)
+        if scaler is not None and getattr(scaler, 'scale_', None) is not None:
+            scale = np.asarray(scaler.scale_, dtype=np.float64)
+        else:
+            scale = np.ones(self.n_features)
+
+        features, thresholds, lefts, rights, missing_lefts, roots = [], [], [], [], [], []
+        self.forests = []
+        node_offset = 0
+        tree_offset = 0
+        max_depth = 0
+
+        for forest in forests:
+            n_outputs = forest.n_outputs_
+            n_classes = list(np.atleast_1d(forest.n_classes_))
+            classes = forest.classes_ if n_outputs > 1 else [forest.classes_]
+            forest_node_offset = node_offset
+            leaf_values = [[] for _ in range(n_outputs)]
+
+            for estimator in forest.estimators_:
+                tree = estimator.tree_
+                node_ids = np.arange(tree.node_count)
+                is_leaf = tree.children_left == -1
+
+                # Leaves point at themselves so every row can take max_depth steps
+                features.append(np.where(is_leaf, 0, tree.feature).astype(np.intp))
+                thresholds.append(np.where(is_leaf, 0.0, tree.threshold))
+                lefts.append(np.where(is_leaf, node_ids, tree.children_left).astype(np.intp) + node_offset)
+                rights.append(np.where(is_leaf, node_ids, tree.children_right).astype(np.intp) + node_offset)
+                # scikit-learn >= 1.3 sends NaN to the child recorded in missing_go_to_left
+                # (the one with more samples when training saw no missing values)
+                missing_left = getattr(tree, 'missing_go_to_left', None)
+                missing_lefts.append(np.zeros(tree.node_count, dtype=bool) if missing_left is None
+                                     else np.asarray(missing_left, dtype=bool))
+                roots.append(node_offset)
+
+                for k, proba in enumerate(_leaf_probabilities(tree, n_classes)):
+                    leaf_values[k].append(proba)
+
+                node_offset += tree.node_count
+                max_depth = max(max_depth, tree.max_depth)
+
+            self.forests.append({
+                'tree_start': tree_offset,
+                'tree_stop': tree_offset + len(forest.estimators_),
+                'node_offset': forest_node_offset,
+                'leaf_values': [np.concatenate(values) for values in leaf_values],
+                'classes': [np.asarray(c) for c in classes],
+                'multi_output': n_outputs > 1
+            })
+            tree_offset += len(forest.estimators_)
+
+        self.feature = np.concatenate(features)
+        self.left = np.concatenate(lefts)
+        self.right = np.concatenate(rights)
+        self.missing_left = np.concatenate(missing_lefts)
+        self.roots = np.asarray(roots, dtype=np.intp)
+        self.max_depth = max_depth
+        self.threshold = _fold_thresholds(np.concatenate(thresholds), self.feature, mean, scale)
+
+    def apply(self, X):
+        """Return the leaf node index reached by every row in every tree, shape (n_trees, n_rows)"""
+        X = np.asarray(X, dtype=np.float64)
+        rows = np.arange(X.shape[0])
+        nodes = np.repeat(self.roots[:, np.newaxis], X.shape[0], axis=1)
+        has_missing = bool(np.isnan(X).any())
+        for _ in range(self.max_depth):
+            values = X[rows, self.feature[nodes]]
+            go_left = values <= self.threshold[nodes]
+            if has_missing:
+                go_left |= np.isnan(values) & self.missing_left[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def predict_proba(self, X):
+        """Class probabilities for every forest, in the order the forests were given.
+
+        Each entry matches sklearn's ``predict_proba``: an array for single-output
+        forests and a list of arrays for multi-output forests.
+        """
+        leaves = self.apply(X)
+        results = []
+        for forest in self.forests:
+            forest_leaves = leaves[forest['tree_start']:forest['tree_stop']] - forest['node_offset']
+            n_trees = forest_leaves.shape[0]
+            outputs = []
+            for leaf_values in forest['leaf_values']:
+                # Sequential accumulation over trees, the same order sklearn sums them in
+                proba = np.add.accumulate(leaf_values[forest_leaves], axis=0)[-1]
+                proba /= n_trees
+                outputs.append(proba)
+            results.append(outputs if forest['multi_output'] else outputs[0])
+        return results
+
+    def predict(self, X):
+        """Class predictions for every forest (argmax of the probabilities)"""
+        predictions = []
+        for forest, proba in zip(self.forests, self.predict_proba(X)):
+            outputs = proba if forest['multi_output'] else [proba]
+            labels = [
+                classes.take(np.argmax(output, axis=1))
+                for classes, output in zip(forest['classes'], outputs)
+            ]
+            predictions.append(np.stack(labels, axis=1) if forest['multi_output'] else labels[0])
+        return predictions
+
+    def boundary_samples(self, X, max_rows=2000, seed=0):
+        """Build rows that sit exactly on, and one ulp either side of, folded split thresholds.
+
+        These are the inputs most likely to expose a rounding mismatch, so they
+        are the core of the parity check.
+        """
+        X = np.asarray(X, dtype=np.float64)
+        rng = np.random.default_rng(seed)
+        split_nodes = np.flatnonzero(self.left != np.arange(self.left.shape[0]))
+        chosen = rng.choice(split_nodes, size=min(max_rows, split_nodes.shape[0]), replace=False)
+        base = X[rng.integers(0, X.shape[0], size=chosen.shape[0])]
+        samples = []
+        for direction in (-np.inf, None, np.inf):
+            rows = base.copy()
+            values = self.threshold[chosen]
+            if direction is not None:
+                values = np.nextafter(values, direction)
+            rows[np.arange(chosen.shape[0]), self.feature[chosen]] = values
+            samples.append(rows)
+        return np.concatenate(samples)
+
+
+def verify_parity(compiled, forests, scaler, X):
+    """Check that the compiled evaluator reproduces sklearn's probabilities bit for bit.
+
+    Raises ``AssertionError`` describing the first mismatching forest.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    X = np.concatenate([X, compiled.boundary_samples(X)])
+    X_scaled = scaler.transform(X) if scaler is not None else X
+
+    compiled_probabilities = compiled.predict_proba(X)
+    for i, (forest, proba) in enumerate(zip(forests, compiled_probabilities)):
+        expected = forest.predict_proba(X_scaled)
+        expected = expected if isinstance(expected, list) else [expected]
+        actual = proba if isinstance(proba, list) else [proba]
+        for k, (e, a) in enumerate(zip(expected, actual)):
+            if not np.array_equal(e, a):
+                mismatched = int(np.sum(np.any(e != a, axis=1)))
+                raise AssertionError(
+                    f"Compiled forest {i} output {k} differs from sklearn on {mismatched} of {X.shape[0]} rows"
+                )
+    return X.shape[0]
@@ -1,193 +1,79 @@
+import copy
+
 import numpy as np
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import StandardScaler
 from sklearn.multioutput import MultiOutputClassifier
-import joblib
-import os
+
+from ml_model import artifacts, synthetic_data
+from ml_model.compiled_forest import CompiledForest
+from ml_model.prediction_cache import PredictionCache
 
 class EnhancedRiskPredictor:
-    def __init__(self):
+    def __init__(self, version=None, load=True, cache_size=0):
         self.risk_model = None
         self.condition_model = None
+        self.engine = None
         self.scaler = StandardScaler()
         self.feature_names = [
             'systolic_bp', 'diastolic_bp', 'blood_sugar', 'body_weight', 
             'hemoglobin', 'heart_rate', 'protein_urine', 'age', 'gestational_week'
         ]
+        # Decimal places each feature is rounded to for prediction cache keys;
+        # finer than any device or form records them
+        self.feature_precision = [1, 1, 1, 1, 2, 1, 2, 1, 1]
         self.risk_levels = ['Normal', 'Medium', 'High']
         self.conditions = [
             'gestational_diabetes', 'preeclampsia', 'anemia', 'hypertension',
             'preterm_labor_risk', 'fetal_growth_restriction', 'placental_issues'
         ]
+        self.model_version = None
+        self.manifest = None
+        self.cache = PredictionCache(cache_size) if cache_size else None
         
-        # Load or train model
-        self._load_or_train_model()
+        # Load prebuilt model artifacts (built with `python -m ml_model.train`)
+        if load:
+            self._load_model(version)
     
-    def _load_or_train_model(self):
-        """Load existing model or train a new one with synthetic data"""
-        risk_model_path = 'ml_model/enhanced_risk_model.joblib'
-        condition_model_path = 'ml_model/condition_model.joblib'
-        scaler_path = 'ml_model/enhanced_scaler.joblib'
-        
-        if (os.path.exists(risk_model_path) and 
-            os.path.exists(condition_model_path) and 
-            os.path.exists(scaler_path)):
-            self.risk_model = joblib.load(risk_model_path)
-            self.condition_model = joblib.load(condition_model_path)
-            self.scaler = joblib.load(scaler_path)
-        else:
-            self._train_model()
-            self._save_model()
+    def _load_model(self, version=None):
+        """Load a prebuilt, checksum-verified artifact set. Never trains."""
+        models, manifest = artifacts.load_artifacts(version)
+        self.risk_model = models['risk_model']
+        self.condition_model = models['condition_model']
+        self.scaler = models['scaler']
+        self.model_version = manifest['version']
+        self.manifest = manifest
+        self._compile_model()
+    
+    @property
+    def condition_backend(self):
+        """Which condition model layout is loaded: 'multioutput' or 'native'"""
+        if isinstance(self.condition_model, MultiOutputClassifier):
+            return 'multioutput'
+        return 'native'
+    
+    def _compiled_forests(self):
+        """Forests evaluated per request: the risk forest, then the condition forest(s)"""
+        if self.condition_backend == 'native':
+            return [self.risk_model, self.condition_model]
+        return [self.risk_model] + list(self.condition_model.estimators_)
     
-    def _generate_training_data(self):
+    def _compile_model(self):
+        """Export every fitted tree into one flat-array evaluator with the scaler folded in"""
+        self.engine = CompiledForest(self._compiled_forests(), self.scaler)
+    
+    def _generate_training_data(self, n_samples=2000, seed=42):
         """Generate comprehensive training data for multiple conditions"""
-        np.random.seed(42)
-        n_samples = 2000
-        
-        data = []
-        risk_labels = []
-        condition_labels = []
-        
-        for _ in range(n_samples):
-            # Generate base parameters
-            age = np.random.normal(28, 6)  # Age 18-40
-            gestational_week = np.random.uniform(8, 40)  # Pregnancy week
-            
-            # Generate correlated health parameters
-            scenario = np.random.choice([
-                'normal', 'gestational_diabetes', 'preeclampsia', 'anemia',
-                'hypertension', 'preterm_risk', 'fetal_growth_issues', 'multiple_conditions'
-            ], p=[0.4, 0.15, 0.12, 0.1, 0.08, 0.06, 0.05, 0.04])
-            
-            # Initialize condition flags
-            conditions = [0] * len(self.conditions)  # All conditions start as 0 (no condition)
-            
-            if scenario == 'normal':
-                systolic_bp = np.random.normal(115, 8)
-                diastolic_bp = np.random.normal(75, 6)
-                blood_sugar = np.random.normal(88, 10)
-                body_weight = np.random.normal(65, 8)
-                hemoglobin = np.random.normal(12.2, 0.8)
-                heart_rate = np.random.normal(75, 10)
-                protein_urine = np.random.normal(0.1, 0.05)  # Normal: <0.3
-                risk = 0
-                
-            elif scenario == 'gestational_diabetes':
-                systolic_bp = np.random.normal(125, 12)
-                diastolic_bp = np.random.normal(82, 8)
-                blood_sugar = np.random.normal(140, 20)  # High glucose
-                body_weight = np.random.normal(75, 12)
-                hemoglobin = np.random.normal(11.5, 1.0)
-                heart_rate = np.random.normal(80, 12)
-                protein_urine = np.random.normal(0.2, 0.1)
-                conditions[0] = 1  # gestational_diabetes
-                risk = 1 if blood_sugar < 160 else 2
-                
-            elif scenario == 'preeclampsia':
-                systolic_bp = np.random.normal(150, 15)  # High BP
-                diastolic_bp = np.random.normal(95, 10)  # High BP
-                blood_sugar = np.random.normal(100, 15)
-                body_weight = np.random.normal(78, 15)
-                hemoglobin = np.random.normal(11.0, 1.2)
-                heart_rate = np.random.normal(85, 15)
-                protein_urine = np.random.normal(1.5, 0.8)  # High protein
-                conditions[1] = 1  # preeclampsia
-                conditions[3] = 1  # hypertension (often co-occurs)
-                risk = 2
-                
-            elif scenario == 'anemia':
-                systolic_bp = np.random.normal(110, 12)
-                diastolic_bp = np.random.normal(70, 8)
-                blood_sugar = np.random.normal(92, 12)
-                body_weight = np.random.normal(62, 10)
-                hemoglobin = np.random.normal(8.5, 1.0)  # Low hemoglobin
-                heart_rate = np.random.normal(90, 15)  # Higher heart rate
-                protein_urine = np.random.normal(0.15, 0.08)
-                conditions[2] = 1  # anemia
-                risk = 1 if hemoglobin > 9 else 2
-                
-            elif scenario == 'hypertension':
-                systolic_bp = np.random.normal(145, 12)
-                diastolic_bp = np.random.normal(92, 8)
-                blood_sugar = np.random.normal(105, 18)
-                body_weight = np.random.normal(72, 12)
-                hemoglobin = np.random.normal(11.8, 1.0)
-                heart_rate = np.random.normal(82, 12)
-                protein_urine = np.random.normal(0.4, 0.2)
-                conditions[3] = 1  # hypertension
-                risk = 1 if systolic_bp < 160 else 2
-                
-            elif scenario == 'preterm_risk':
-                systolic_bp = np.random.normal(130, 15)
-                diastolic_bp = np.random.normal(85, 10)
-                blood_sugar = np.random.normal(110, 20)
-                body_weight = np.random.normal(68, 12)
-                hemoglobin = np.random.normal(10.8, 1.2)
-                heart_rate = np.random.normal(88, 15)
-                protein_urine = np.random.normal(0.6, 0.3)
-                conditions[4] = 1  # preterm_labor_risk
-                risk = 2
-                
-            elif scenario == 'fetal_growth_issues':
-                systolic_bp = np.random.normal(135, 12)
-                diastolic_bp = np.random.normal(88, 10)
-                blood_sugar = np.random.normal(95, 15)
-                body_weight = np.random.normal(58, 8)  # Lower weight
-                hemoglobin = np.random.normal(10.2, 1.0)
-                heart_rate = np.random.normal(85, 12)
-                protein_urine = np.random.normal(0.8, 0.4)
-                conditions[5] = 1  # fetal_growth_restriction
-                risk = 2
-                
-            elif scenario == 'multiple_conditions':
-                # Multiple conditions scenario
-                systolic_bp = np.random.normal(155, 18)
-                diastolic_bp = np.random.normal(98, 12)
-                blood_sugar = np.random.normal(145, 25)
-                body_weight = np.random.normal(82, 15)
-                hemoglobin = np.random.normal(9.2, 1.2)
-                heart_rate = np.random.normal(95, 18)
-                protein_urine = np.random.normal(2.0, 1.0)
-                # Multiple conditions
-                conditions[0] = 1  # gestational_diabetes
-                conditions[1] = 1  # preeclampsia
-                conditions[2] = 1  # anemia
-                conditions[3] = 1  # hypertension
-                conditions[6] = 1  # placental_issues
-                risk = 2
-            
-            # Ensure realistic bounds
-            age = max(16, min(45, age))
-            systolic_bp = max(80, min(200, systolic_bp))
-            diastolic_bp = max(50, min(120, diastolic_bp))
-            blood_sugar = max(60, min(300, blood_sugar))
-            body_weight = max(40, min(150, body_weight))
-            hemoglobin = max(6, min(18, hemoglobin))
-            heart_rate = max(50, min(150, heart_rate))
-            protein_urine = max(0, min(5, protein_urine))
-            
-            # Add some realistic noise
-            features = [
-                systolic_bp + np.random.normal(0, 2),
-                diastolic_bp + np.random.normal(0, 1.5),
-                blood_sugar + np.random.normal(0, 3),
-                body_weight + np.random.normal(0, 1),
-                hemoglobin + np.random.normal(0, 0.2),
-                heart_rate + np.random.normal(0, 3),
-                protein_urine + np.random.normal(0, 0.1),
-                age + np.random.normal(0, 0.5),
-                gestational_week + np.random.normal(0, 0.5)
-            ]
-            
-            data.append(features)
-            risk_labels.append(risk)
-            condition_labels.append(conditions)
-        
-        return np.array(data), np.array(risk_labels), np.array(condition_labels)
+        return synthetic_data.generate_enhanced_data(n_samples=n_samples, seed=seed)
     
-    def _train_model(self):
-        """Train both risk and condition prediction models"""
-        X, y_risk, y_conditions = self._generate_training_data()
+    def _train_model(self, n_samples=2000, seed=42, condition_backend='multioutput'):
+        """Train both risk and condition prediction models.
+        
+        ``condition_backend`` selects the condition model layout: 'multioutput'
+        fits one forest per condition, 'native' fits a single forest on all
+        seven condition columns so each tree is stored and walked once.
+        """
+        X, y_risk, y_conditions = self._generate_training_data(n_samples, seed)
         
         # Scale features
         X_scaled = self.scaler.fit_transform(X)
@@ -203,15 +89,19 @@ class EnhancedRiskPredictor:
         self.risk_model.fit(X_scaled, y_risk)
         
         # Train condition prediction model (multi-output)
-        self.condition_model = MultiOutputClassifier(
-            RandomForestClassifier(
-                n_estimators=100,
-                max_depth=8,
-                min_samples_split=15,
-                min_samples_leaf=8,
-                random_state=42
-            )
+        condition_forest = RandomForestClassifier(
+            n_estimators=100,
+            max_depth=8,
+            min_samples_split=15,
+            min_samples_leaf=8,
+            random_state=42
         )
+        if condition_backend == 'native':
+            self.condition_model = condition_forest
+        elif condition_backend == 'multioutput':
+            self.condition_model = MultiOutputClassifier(condition_forest)
+        else:
+            raise ValueError(f"Unknown condition backend: {condition_backend}")
         self.condition_model.fit(X_scaled, y_conditions)
         
         print("Enhanced models trained successfully!")
@@ -223,20 +113,19 @@ class EnhancedRiskPredictor:
         for i, feature in enumerate(self.feature_names):
             print(f"{feature}: {importance[i]:.3f}")
     
-    def _save_model(self):
-        """Save the trained models and scaler"""
-        os.makedirs('ml_model', exist_ok=True)
-        joblib.dump(self.risk_model, 'ml_model/enhanced_risk_model.joblib')
-        joblib.dump(self.condition_model, 'ml_model/condition_model.joblib')
-        joblib.dump(self.scaler, 'ml_model/enhanced_scaler.joblib')
+    def _save_model(self, metadata=None, activate=True):
+        """Save the trained models and scaler as a new versioned artifact set"""
+        self.model_version = artifacts.save_artifacts({
+            'risk_model': self.risk_model,
+            'condition_model': self.condition_model,
+            'scaler': self.scaler
+        }, metadata=metadata, activate=activate)
+        self.manifest = artifacts.read_manifest(self.model_version)
+        return self.model_version
     
-    def predict_comprehensive(self, health_params):
-        """Predict both risk level and specific conditions"""
-        if self.risk_model is None or self.condition_model is None:
-            raise ValueError("Models not loaded or trained")
-        
-        # Extract features in correct order
-        features = [
+    def _extract_features(self, health_params):
+        """Extract model features from a health parameter dict in the correct order"""
+        return [
             health_params.get('systolic_bp', 120),
             health_params.get('diastolic_bp', 80),
             health_params.get('blood_sugar', 90),
@@ -247,27 +136,99 @@ class EnhancedRiskPredictor:
             health_params.get('age', 28),
             health_params.get('gestational_week', 20)
         ]
+    
+    def predict_comprehensive(self, health_params):
+        """Predict both risk level and specific conditions"""
+        return self.predict_comprehensive_batch([health_params])[0]
+    
+    def predict_comprehensive_batch(self, health_params_list):
+        """Predict risk level and conditions for many readings in one pass.
         
-        # Scale features
-        features_scaled = self.scaler.transform([features])
+        Accepts a list of health parameter dicts or a 2-D array whose columns
+        follow ``feature_names``. The scaler and every forest run once over the
+        whole matrix instead of once per reading.
+        """
+        if self.engine is None:
+            raise ValueError("Models not loaded or trained")
+        
+        rows = list(health_params_list)
+        if not rows:
+            return []
+        if isinstance(rows[0], dict):
+            rows = [self._extract_features(health_params) for health_params in rows]
+        
+        if self.cache is None:
+            return self._predict_rows(rows)
         
-        # Predict risk level
-        risk_prediction = self.risk_model.predict(features_scaled)[0]
-        risk_probabilities = self.risk_model.predict_proba(features_scaled)[0]
+        # Serve repeated readings from the cache and score only the distinct misses
+        keys = [self._cache_key(row) for row in rows]
+        results = [self.cache.get(key) for key in keys]
+        missing = {}
+        for key, result in zip(keys, results):
+            if result is None and key not in missing:
+                missing[key] = list(key[1])
         
-        # Predict conditions
-        condition_predictions = self.condition_model.predict(features_scaled)[0]
-        condition_probabilities = []
+        if missing:
+            computed = dict(zip(missing, self._predict_rows(list(missing.values()))))
+            for key, result in computed.items():
+                self.cache.put(key, result)
+            results = [
+                result if result is not None else copy.deepcopy(computed[key])
+                for key, result in zip(keys, results)
+            ]
+        return results
+    
+    def _cache_key(self, features):
+        """Cache key: model version plus the features rounded to their recording precision"""
+        return (self.model_version, tuple(
+            round(float(value), precision)
+            for value, precision in zip(features, self.feature_precision)
+        ))
+    
+    def cache_stats(self):
+        """Get prediction cache counters, or None when caching is disabled"""
+        return self.cache.stats() if self.cache is not None else None
+    
+    def _predict_rows(self, rows):
+        """Score a list of feature rows with the compiled forests"""
+        X = np.asarray(rows, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != len(self.feature_names):
+            raise ValueError(f"Expected rows of {len(self.feature_names)} features")
+        
+        # Walk every tree of every forest in one vectorized pass (scaling is
+        # folded into the compiled split thresholds)
+        probabilities = self.engine.predict_proba(X)
         
-        # Get probabilities for each condition
-        for i, estimator in enumerate(self.condition_model.estimators_):
-            prob = estimator.predict_proba(features_scaled)[0]
-            if len(prob) > 1:  # If condition is possible
-                condition_probabilities.append(prob[1])  # Probability of having condition
-            else:
-                condition_probabilities.append(0.0)
+        # Predict risk levels (predict is the argmax of predict_proba)
+        risk_probabilities = probabilities[0]
+        risk_predictions = self.risk_model.classes_.take(np.argmax(risk_probabilities, axis=1))
         
-        # Create detailed results
+        # Predict conditions from each condition output's probabilities
+        if self.condition_backend == 'native':
+            condition_outputs = zip(self.condition_model.classes_, probabilities[1])
+        else:
+            condition_outputs = (
+                (estimator.classes_, prob)
+                for estimator, prob in zip(self.condition_model.estimators_, probabilities[1:])
+            )
+        condition_predictions = np.zeros((X.shape[0], len(self.conditions)), dtype=int)
+        condition_probabilities = np.zeros((X.shape[0], len(self.conditions)))
+        for i, (classes, prob) in enumerate(condition_outputs):
+            condition_predictions[:, i] = classes.take(np.argmax(prob, axis=1))
+            if prob.shape[1] > 1:  # If condition is possible
+                condition_probabilities[:, i] = prob[:, 1]  # Probability of having condition
+        
+        return [
+            self._build_result(
+                rows[row], risk_predictions[row], risk_probabilities[row],
+                condition_predictions[row], condition_probabilities[row]
+            )
+            for row in range(X.shape[0])
+        ]
+    
+    def _build_result(self, features, risk_prediction, risk_probabilities,
+                      condition_predictions, condition_probabilities):
+        """Assemble the prediction response for a single reading"""
         detected_conditions = []
         condition_details = {}
         
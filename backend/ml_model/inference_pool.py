@@ -0,0 +1,139 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+
+from ml_model import artifacts
+from ml_model.enhanced_risk_predictor import EnhancedRiskPredictor
+
+# Loaded once per worker process by the pool initializer
+_worker_predictor = None
+
+
+def _init_worker(version, cache_size):
+    """Pool initializer: load the artifact set once and keep it warm"""
+    global _worker_predictor
+    _worker_predictor = EnhancedRiskPredictor(version=version, cache_size=cache_size)
+
+
+def _predict_in_worker(health_params_list):
+    """Score a batch of readings inside a worker process"""
+    return _worker_predictor.predict_comprehensive_batch(health_params_list)
+
+
+def _worker_version():
+    """Report which model version a worker process has loaded"""
+    return _worker_predictor.model_version
+
+
+class InferencePool:
+    """Runs EnhancedRiskPredictor in a pool of warm worker processes.
+
+    Forest evaluation then happens outside the web process, so request
+    threads only wait on a future and release the GIL for other work. The
+    pool is pinned to one model version; asking for another version replaces
+    the pool and lets the old one finish its in-flight batches. prepare()
+    starts and warms the next version's pool ahead of time, so the switch
+    does not make requests wait for worker processes to load the model.
+    """
+
+    def __init__(self, max_workers=None, version=None, cache_size=0):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.cache_size = cache_size
+        self.version = version or artifacts.current_version()
+        self._executor = None
+        self._executor_pid = None
+        # (version, executor, pid) warmed by prepare() for an upcoming switch
+        self._prepared = None
+        self._lock = threading.Lock()
+
+    def _start_executor(self, version):
+        """A new pool of worker processes that load ``version``"""
+        # 'spawn' avoids forking a multi-threaded web worker
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(version, self.cache_size)
+        )
+
+    def _warm(self, executor, timeout=None):
+        """Start every worker process of a pool and wait until each has loaded the model"""
+        futures = [executor.submit(_worker_version) for _ in range(self.max_workers)]
+        return [future.result(timeout=timeout) for future in futures]
+
+    def _get_executor(self, version=None):
+        """Return the pool for a model version, (re)starting it when needed"""
+        version = version or self.version
+        with self._lock:
+            if self._executor is not None and self._executor_pid == os.getpid() and version == self.version:
+                return self._executor
+
+            stale = [self._executor] if self._executor_pid == os.getpid() else []
+            prepared, self._prepared = self._prepared, None
+            if prepared is not None and prepared[2] != os.getpid():
+                prepared = None
+            if prepared is not None and prepared[0] == version:
+                self._executor = prepared[1]
+            else:
+                if prepared is not None:
+                    stale.append(prepared[1])
+                self._executor = self._start_executor(version)
+            self._executor_pid = os.getpid()
+            self.version = version
+        for executor in stale:
+            if executor is not None:
+                executor.shutdown(wait=False)
+        return self._executor
+
+    def warm_up(self, timeout=None):
+        """Start every worker process and wait until each has loaded the model"""
+        return self._warm(self._get_executor(), timeout)
+
+    def prepare(self, version, timeout=None):
+        """Start and warm a pool for ``version``; the first request for that version switches to it"""
+        with self._lock:
+            if version == self.version and self._executor is not None and self._executor_pid == os.getpid():
+                return
+        executor = self._start_executor(version)
+        try:
+            self._warm(executor, timeout)
+        except Exception:
+            executor.shutdown(wait=False)
+            raise
+        with self._lock:
+            previous, self._prepared = self._prepared, (version, executor, os.getpid())
+        if previous is not None and previous[2] == os.getpid():
+            previous[1].shutdown(wait=False)
+
+    def submit_batch(self, health_params_list, version=None):
+        """Queue a batch of readings for scoring and return a Future for the result list"""
+        return self._get_executor(version).submit(_predict_in_worker, list(health_params_list))
+
+    def predict_batch(self, health_params_list, version=None, timeout=None):
+        """Score a batch of readings in a worker process and wait for the results.
+
+        On timeout a batch still waiting for a worker is cancelled; one a
+        worker already picked up cannot be interrupted and runs to completion,
+        its result discarded.
+        """
+        future = self.submit_batch(health_params_list, version)
+        try:
+            return future.result(timeout=timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    def predict(self, health_params, version=None, timeout=None):
+        """Score one reading in a worker process and wait for the result"""
+        return self.predict_batch([health_params], version, timeout)[0]
+
+    def close(self):
+        """Shut the worker processes down"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+            prepared, self._prepared = self._prepared, None
+        if prepared is not None and prepared[2] == os.getpid():
+            prepared[1].shutdown(wait=True)
+        if executor is not None and self._executor_pid == os.getpid():
+            executor.shutdown(wait=True)
@@ -0,0 +1,197 @@
+import datetime
+import threading
+import time
+import uuid
+
+import numpy as np
+
+from ml_model import artifacts, synthetic_data
+from ml_model.compiled_forest import verify_parity
+from ml_model.enhanced_risk_predictor import EnhancedRiskPredictor
+
+SMOKE_SAMPLES = 500
+SMOKE_SEED = 20240101
+MIN_SMOKE_RISK_ACCURACY = 0.8
+MAX_JOBS_KEPT = 20
+
+
+class ModelValidationError(RuntimeError):
+    """Raised when a candidate model fails the smoke checks"""
+
+
+def validate_predictor(predictor):
+    """Smoke-test a freshly loaded predictor before it serves traffic.
+
+    Scores a fixed synthetic data set and checks that outputs are well formed,
+    that the compiled evaluator matches sklearn exactly and that risk accuracy
+    is above ``MIN_SMOKE_RISK_ACCURACY``. Returns a summary dict.
+    """
+    X, y_risk, _ = synthetic_data.generate_enhanced_data(n_samples=SMOKE_SAMPLES, seed=SMOKE_SEED)
+    results = predictor._predict_rows(X)
+
+    for result in results:
+        probabilities = list(result['risk_probabilities'].values())
+        if not np.isclose(sum(probabilities), 1.0) or min(probabilities) < 0 or max(probabilities) > 1:
+            raise ModelValidationError("Risk probabilities are not a valid distribution")
+        if set(result['condition_details']) != set(predictor.conditions):
+            raise ModelValidationError("Condition details do not cover every condition")
+
+    try:
+        verify_parity(predictor.engine, predictor._compiled_forests(), predictor.scaler, X)
+    except AssertionError as e:
+        raise ModelValidationError(str(e))
+
+    predicted = np.array([predictor.risk_levels.index(result['risk_level']) for result in results])
+    accuracy = float(np.mean(predicted == y_risk))
+    if accuracy < MIN_SMOKE_RISK_ACCURACY:
+        raise ModelValidationError(
+            f"Smoke risk accuracy {accuracy:.3f} is below {MIN_SMOKE_RISK_ACCURACY}"
+        )
+    return {'rows': SMOKE_SAMPLES, 'risk_accuracy': accuracy}
+
+
+class ModelRegistry:
+    """Owns the active EnhancedRiskPredictor and hot-swaps artifact versions.
+
+    New versions are loaded and validated on a background thread, then made
+    active with a single reference assignment. Requests read ``active`` once
+    and keep that predictor until they finish, so a swap never disturbs
+    in-flight work. Activations are written to the artifacts' CURRENT file,
+    and every registry polls that file so all workers follow a swap.
+    ``before_swap``, when set, is called with a validated version before it
+    becomes active (e.g. to warm worker processes); if it raises, the
+    activation fails and the current version stays active.
+    """
+
+    def __init__(self, version=None, cache_size=0, poll_interval=30):
+        self.cache_size = cache_size
+        self.poll_interval = poll_interval
+        self.before_swap = None
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._loading = None
+        self._failed_version = None
+        self._last_poll = time.monotonic()
+
+        # The first load is synchronous so a broken artifact set stops startup
+        self._active = EnhancedRiskPredictor(version=version, cache_size=cache_size)
+
+    @property
+    def active(self):
+        """The predictor that new requests should use"""
+        if self.poll_interval and time.monotonic() - self._last_poll >= self.poll_interval:
+            self._last_poll = time.monotonic()
+            self._follow_current_version()
+        return self._active
+
+    def _follow_current_version(self):
+        """Start loading the CURRENT version if another worker activated it"""
+        try:
+            version = artifacts.current_version()
+        except OSError:
+            return
+        if version and version != self._active.model_version and version != self._failed_version:
+            self.activate(version, persist=False)
+
+    def list_versions(self):
+        """Describe every artifact version and which one is active"""
+        current = artifacts.current_version()
+        versions = []
+        for version in artifacts.list_versions():
+            manifest = artifacts.read_manifest(version)
+            versions.append({
+                'version': version,
+                'created_at': manifest['created_at'],
+                'sklearn_version': manifest['sklearn_version'],
+                'metadata': manifest.get('metadata', {}),
+                'active': version == self._active.model_version,
+                'current': version == current
+            })
+        return {
+            'active_version': self._active.model_version,
+            'current_version': current,
+            'rollback_version': artifacts.previous_version(),
+            'versions': versions,
+            'jobs': self.jobs()
+        }
+
+    def jobs(self):
+        """Recent activation jobs, newest first"""
+        with self._lock:
+            return sorted(
+                (dict(job) for job in self._jobs.values()),
+                key=lambda job: job['requested_at'], reverse=True
+            )
+
+    def activate(self, version, persist=True):
+        """Load, validate and swap in a version in the background. Returns the job."""
+        if version not in artifacts.list_versions():
+            raise artifacts.ArtifactError(f"Unknown model version: {version}")
+
+        with self._lock:
+            if self._loading is not None:
+                return dict(self._jobs[self._loading])
+            job = {
+                'id': uuid.uuid4().hex,
+                'version': version,
+                'status': 'loading',
+                'error': None,
+                'validation': None,
+                'requested_at': datetime.datetime.utcnow().isoformat() + 'Z',
+                'finished_at': None
+            }
+            self._jobs[job['id']] = job
+            self._loading = job['id']
+            for old_id in sorted(self._jobs, key=lambda i: self._jobs[i]['requested_at'])[:-MAX_JOBS_KEPT]:
+                del self._jobs[old_id]
+
+        threading.Thread(
+            target=self._run_activation, args=(job['id'], version, persist), daemon=True
+        ).start()
+        return dict(job)
+
+    def rollback(self):
+        """Reactivate the version that was current before the present one"""
+        version = artifacts.previous_version()
+        if version is None:
+            raise artifacts.ArtifactError("No previous model version to roll back to")
+        return self.activate(version, persist='rollback')
+
+    def _update_job(self, job_id, **changes):
+        """Change a job's fields under the lock, so jobs() never sees a half-updated job"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(changes)
+
+    def _run_activation(self, job_id, version, persist):
+        """Background worker: load, validate, persist and swap"""
+        changes = {}
+        try:
+            candidate = EnhancedRiskPredictor(version=version, cache_size=self.cache_size)
+            self._update_job(job_id, status='validating')
+            validation = validate_predictor(candidate)
+            self._update_job(job_id, validation=validation)
+            if self.before_swap is not None:
+                self.before_swap(version)
+
+            if persist == 'rollback':
+                artifacts.rollback_current_version()
+            elif persist:
+                artifacts.set_current_version(version)
+
+            # Atomic swap: in-flight requests keep the predictor they already hold
+            self._active = candidate
+            self._failed_version = None
+            changes = {'status': 'active'}
+            print(f"Model version {version} is now active")
+        except Exception as e:
+            self._failed_version = version
+            changes = {'status': 'failed', 'error': str(e)}
+            print(f"Model version {version} failed to activate: {e}")
+        finally:
+            changes['finished_at'] = datetime.datetime.utcnow().isoformat() + 'Z'
+            with self._lock:
+                if job_id in self._jobs:
+                    self._jobs[job_id].update(changes)
+                self._loading = None
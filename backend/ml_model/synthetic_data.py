@@ -0,0 +1,182 @@
+"""
+Vectorized synthetic training data for the maternal health risk models.
+
+Each clinical scenario is described once as a table of vital-sign
+distributions. Rows are drawn a whole scenario block at a time with
+``np.random.default_rng``, so generation cost is a handful of NumPy calls per
+chunk rather than Python work per row. Large data sets can be streamed in
+fixed-size chunks or written straight into preallocated arrays.
+"""
+
+import numpy as np
+
+DEFAULT_CHUNK_SIZE = 100_000
+
+ENHANCED_CONDITIONS = [
+    'gestational_diabetes', 'preeclampsia', 'anemia', 'hypertension',
+    'preterm_labor_risk', 'fetal_growth_restriction', 'placental_issues'
+]
+
+# (mean, std) per vital sign, in the order: systolic_bp, diastolic_bp,
+# blood_sugar, body_weight, hemoglobin, heart_rate, protein_urine.
+# ``risk`` is either a fixed label or a function of the raw (pre-bounds,
+# pre-noise) vitals block, matching how the labels were originally assigned.
+ENHANCED_SCENARIOS = [
+    {
+        'name': 'normal', 'probability': 0.4,
+        'vitals': [(115, 8), (75, 6), (88, 10), (65, 8), (12.2, 0.8), (75, 10), (0.1, 0.05)],
+        'conditions': [], 'risk': 0
+    },
+    {
+        'name': 'gestational_diabetes', 'probability': 0.15,
+        'vitals': [(125, 12), (82, 8), (140, 20), (75, 12), (11.5, 1.0), (80, 12), (0.2, 0.1)],
+        'conditions': ['gestational_diabetes'],
+        'risk': lambda vitals: np.where(vitals[:, 2] < 160, 1, 2)
+    },
+    {
+        'name': 'preeclampsia', 'probability': 0.12,
+        'vitals': [(150, 15), (95, 10), (100, 15), (78, 15), (11.0, 1.2), (85, 15), (1.5, 0.8)],
+        'conditions': ['preeclampsia', 'hypertension'], 'risk': 2
+    },
+    {
+        'name': 'anemia', 'probability': 0.1,
+        'vitals': [(110, 12), (70, 8), (92, 12), (62, 10), (8.5, 1.0), (90, 15), (0.15, 0.08)],
+        'conditions': ['anemia'],
+        'risk': lambda vitals: np.where(vitals[:, 4] > 9, 1, 2)
+    },
+    {
+        'name': 'hypertension', 'probability': 0.08,
+        'vitals': [(145, 12), (92, 8), (105, 18), (72, 12), (11.8, 1.0), (82, 12), (0.4, 0.2)],
+        'conditions': ['hypertension'],
+        'risk': lambda vitals: np.where(vitals[:, 0] < 160, 1, 2)
+    },
+    {
+        'name': 'preterm_risk', 'probability': 0.06,
+        'vitals': [(130, 15), (85, 10), (110, 20), (68, 12), (10.8, 1.2), (88, 15), (0.6, 0.3)],
+        'conditions': ['preterm_labor_risk'], 'risk': 2
+    },
+    {
+        'name': 'fetal_growth_issues', 'probability': 0.05,
+        'vitals': [(135, 12), (88, 10), (95, 15), (58, 8), (10.2, 1.0), (85, 12), (0.8, 0.4)],
+        'conditions': ['fetal_growth_restriction'], 'risk': 2
+    },
+    {
+        'name': 'multiple_conditions', 'probability': 0.04,
+        'vitals': [(155, 18), (98, 12), (145, 25), (82, 15), (9.2, 1.2), (95, 18), (2.0, 1.0)],
+        'conditions': ['gestational_diabetes', 'preeclampsia', 'anemia', 'hypertension', 'placental_issues'],
+        'risk': 2
+    }
+]
+
+# Feature order: the seven vitals above, then age and gestational_week
+ENHANCED_BOUNDS = [(80, 200), (50, 120), (60, 300), (40, 150), (6, 18), (50, 150), (0, 5), (16, 45), (-np.inf, np.inf)]
+ENHANCED_NOISE = [2, 1.5, 3, 1, 0.2, 3, 0.1, 0.5, 0.5]
+
+# Basic model: 50% normal, then 85/15 medium/high of the remainder, each
+# with four equally likely sub-scenarios. Vitals order: systolic_bp,
+# diastolic_bp, blood_sugar, body_weight, hemoglobin.
+BASIC_SCENARIOS = [
+    {'name': 'normal', 'probability': 0.5, 'risk': 0,
+     'vitals': [(115, 8), (75, 6), (88, 12), (65, 10), (12.2, 0.8)]},
+    {'name': 'bp_elevated', 'probability': 0.5 * 0.85 / 4, 'risk': 1,
+     'vitals': [(135, 10), (88, 8), (95, 15), (70, 12), (11.8, 1.0)]},
+    {'name': 'sugar_high', 'probability': 0.5 * 0.85 / 4, 'risk': 1,
+     'vitals': [(125, 12), (82, 8), (115, 15), (72, 15), (11.5, 1.2)]},
+    {'name': 'anemia', 'probability': 0.5 * 0.85 / 4, 'risk': 1,
+     'vitals': [(120, 10), (78, 8), (92, 12), (68, 12), (10.2, 0.8)]},
+    {'name': 'weight_gain', 'probability': 0.5 * 0.85 / 4, 'risk': 1,
+     'vitals': [(128, 12), (85, 10), (105, 18), (78, 15), (11.0, 1.0)]},
+    {'name': 'preeclampsia', 'probability': 0.5 * 0.15 / 4, 'risk': 2,
+     'vitals': [(155, 15), (98, 12), (110, 20), (82, 18), (10.8, 1.2)]},
+    {'name': 'gestational_diabetes', 'probability': 0.5 * 0.15 / 4, 'risk': 2,
+     'vitals': [(140, 15), (92, 10), (145, 25), (85, 20), (11.2, 1.0)]},
+    {'name': 'severe_anemia', 'probability': 0.5 * 0.15 / 4, 'risk': 2,
+     'vitals': [(125, 15), (80, 12), (100, 20), (70, 15), (8.5, 1.0)]},
+    {'name': 'multiple_risks', 'probability': 0.5 * 0.15 / 4, 'risk': 2,
+     'vitals': [(148, 18), (95, 12), (135, 25), (88, 22), (9.8, 1.2)]}
+]
+
+BASIC_BOUNDS = [(85, 200), (50, 120), (60, 300), (45, 150), (6, 18)]
+BASIC_NOISE = [2, 1.5, 3, 1, 0.2]
+
+
+def _draw_scenarios(rng, n_rows, scenarios, n_features):
+    """Draw scenario assignments and each scenario's vitals block in one call per scenario"""
+    probabilities = np.array([scenario['probability'] for scenario in scenarios])
+    assignment = rng.choice(len(scenarios), size=n_rows, p=probabilities / probabilities.sum())
+
+    features = np.empty((n_rows, n_features))
+    risk = np.empty(n_rows, dtype=np.int64)
+    for index, scenario in enumerate(scenarios):
+        rows = np.flatnonzero(assignment == index)
+        if rows.size == 0:
+            continue
+        means, stds = np.array(scenario['vitals'], dtype=np.float64).T
+        vitals = rng.normal(means, stds, size=(rows.size, means.size))
+        features[rows, :means.size] = vitals
+        risk[rows] = scenario['risk'](vitals) if callable(scenario['risk']) else scenario['risk']
+    return assignment, features, risk
+
+
+def _finish_features(rng, features, bounds, noise):
+    """Clip to realistic bounds, then add measurement noise (in place)"""
+    lower, upper = np.array(bounds, dtype=np.float64).T
+    np.clip(features, lower, upper, out=features)
+    features += rng.normal(0.0, noise, size=features.shape)
+    return features
+
+
+def _chunk_sizes(n_samples, chunk_size):
+    """Split n_samples into consecutive chunk sizes"""
+    if n_samples < 1 or chunk_size < 1:
+        raise ValueError("n_samples and chunk_size must be positive")
+    for start in range(0, n_samples, chunk_size):
+        yield min(chunk_size, n_samples - start)
+
+
+def iter_enhanced_chunks(n_samples, seed=42, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Stream enhanced-model training data as ``(X, y_risk, y_conditions)`` chunks"""
+    rng = np.random.default_rng(seed)
+    condition_index = {name: i for i, name in enumerate(ENHANCED_CONDITIONS)}
+    condition_matrix = np.zeros((len(ENHANCED_SCENARIOS), len(ENHANCED_CONDITIONS)), dtype=np.int64)
+    for index, scenario in enumerate(ENHANCED_SCENARIOS):
+        for name in scenario['conditions']:
+            condition_matrix[index, condition_index[name]] = 1
+
+    for size in _chunk_sizes(n_samples, chunk_size):
+        assignment, X, y_risk = _draw_scenarios(rng, size, ENHANCED_SCENARIOS, len(ENHANCED_NOISE))
+        X[:, 7] = rng.normal(28, 6, size=size)      # Age 18-40
+        X[:, 8] = rng.uniform(8, 40, size=size)     # Pregnancy week
+        yield _finish_features(rng, X, ENHANCED_BOUNDS, ENHANCED_NOISE), y_risk, condition_matrix[assignment]
+
+
+def iter_basic_chunks(n_samples, seed=42, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Stream basic-model training data as ``(X, y)`` chunks"""
+    rng = np.random.default_rng(seed)
+    for size in _chunk_sizes(n_samples, chunk_size):
+        _, X, y = _draw_scenarios(rng, size, BASIC_SCENARIOS, len(BASIC_NOISE))
+        yield _finish_features(rng, X, BASIC_BOUNDS, BASIC_NOISE), y
+
+
+def _collect(chunks, n_samples):
+    """Copy streamed chunks into preallocated arrays"""
+    arrays = None
+    offset = 0
+    for chunk in chunks:
+        if arrays is None:
+            arrays = [np.empty((n_samples,) + part.shape[1:], dtype=part.dtype) for part in chunk]
+        size = chunk[0].shape[0]
+        for target, part in zip(arrays, chunk):
+            target[offset:offset + size] = part
+        offset += size
+    return tuple(arrays)
+
+
+def generate_enhanced_data(n_samples=2000, seed=42, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Generate enhanced-model training data as ``(X, y_risk, y_conditions)`` arrays"""
+    return _collect(iter_enhanced_chunks(n_samples, seed, chunk_size), n_samples)
+
+
+def generate_basic_data(n_samples=1500, seed=42, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Generate basic-model training data as ``(X, y)`` arrays"""
+    return _collect(iter_basic_chunks(n_samples, seed, chunk_size), n_samples)
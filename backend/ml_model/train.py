@@ -0,0 +1,72 @@
+"""
+Build-time training step for the enhanced risk models.
+
+Trains the risk and condition models, verifies that the compiled forest
+evaluator reproduces sklearn's probabilities exactly, writes the models as a
+versioned artifact set with a checksum manifest and marks that version as
+current. The web server only ever loads these artifacts.
+
+Usage (from the backend directory):
+    python -m ml_model.train [--n-samples N] [--seed SEED]
+                             [--condition-backend multioutput|native] [--no-activate]
+"""
+
+import argparse
+import time
+
+from ml_model import artifacts
+from ml_model.compiled_forest import verify_parity
+from ml_model.enhanced_risk_predictor import EnhancedRiskPredictor
+
+
+def build_artifacts(activate=True, n_samples=2000, seed=42, condition_backend='multioutput'):
+    """Train the enhanced models and save them as a new artifact version"""
+    started = time.time()
+    predictor = EnhancedRiskPredictor(load=False)
+    predictor._train_model(n_samples=n_samples, seed=seed, condition_backend=condition_backend)
+    training_seconds = time.time() - started
+
+    # The compiled evaluator serves every request, so refuse to ship a model
+    # whose compiled probabilities differ from sklearn's in any bit
+    predictor._compile_model()
+    X, _, _ = predictor._generate_training_data(n_samples=min(n_samples, 2000), seed=seed + 1)
+    parity_rows = verify_parity(predictor.engine, predictor._compiled_forests(), predictor.scaler, X)
+    print(f"Compiled forest parity verified on {parity_rows} rows")
+
+    version = predictor._save_model(metadata={
+        'training_samples': n_samples,
+        'training_seed': seed,
+        'training_seconds': round(training_seconds, 3),
+        'parity_rows': parity_rows,
+        'condition_backend': condition_backend,
+        'condition_trees': sum(len(forest.estimators_) for forest in predictor._compiled_forests()[1:]),
+        'risk_trees': len(predictor.risk_model.estimators_)
+    }, activate=activate)
+
+    # Round-trip the artifacts through the runtime loader so a broken build fails here
+    EnhancedRiskPredictor(version=version)
+    return version
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Train and save enhanced risk model artifacts')
+    parser.add_argument('--no-activate', action='store_true',
+                        help='Save the new version without marking it as current')
+    parser.add_argument('--n-samples', type=int, default=2000,
+                        help='Number of synthetic training rows to generate')
+    parser.add_argument('--seed', type=int, default=42,
+                        help='Random seed for the synthetic training data')
+    parser.add_argument('--condition-backend', choices=['multioutput', 'native'], default='multioutput',
+                        help='One forest per condition, or one multi-output forest for all conditions')
+    args = parser.parse_args()
+
+    version = build_artifacts(
+        activate=not args.no_activate, n_samples=args.n_samples, seed=args.seed,
+        condition_backend=args.condition_backend
+    )
+    print(f"Model artifacts saved as version {version} in {artifacts.ARTIFACTS_DIR}")
+
+
+if __name__ == '__main__':
+    main()
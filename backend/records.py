@@ -0,0 +1,141 @@
+import datetime
+import json
+
+import alerts
+import rollups
+
+REQUIRED_HEALTH_FIELDS = ['systolic_bp', 'diastolic_bp', 'blood_sugar', 'body_weight', 'hemoglobin']
+RECORD_COLUMNS = [
+    'id', 'user_id', 'systolic_bp', 'diastolic_bp', 'blood_sugar', 'body_weight', 'hemoglobin',
+    'heart_rate', 'protein_urine', 'age', 'gestational_week', 'risk_level', 'detected_conditions',
+    'recorded_at'
+]
+
+
+def health_params_from_record(record):
+    """Health parameters for AI analysis, with defaults for the optional ones"""
+    return {
+        'systolic_bp': record['systolic_bp'],
+        'diastolic_bp': record['diastolic_bp'],
+        'blood_sugar': record['blood_sugar'],
+        'body_weight': record['body_weight'],
+        'hemoglobin': record['hemoglobin'],
+        'heart_rate': record.get('heart_rate', 75),
+        'protein_urine': record.get('protein_urine', 0.1),
+        'age': record.get('age', 28),
+        'gestational_week': record.get('gestational_week', 20)
+    }
+
+
+def parse_recorded_at(value):
+    """Normalize a recorded_at value to 'YYYY-MM-DD HH:MM:SS' (UTC), like CURRENT_TIMESTAMP.
+
+    Accepts ISO 8601 dates and date-times, with a UTC offset or 'Z'; None or
+    '' means now. Raises ValueError for anything SQLite's date functions
+    could not read back.
+    """
+    if value is None or value == '':
+        return None
+    if not isinstance(value, str):
+        raise ValueError('recorded_at must be an ISO 8601 date or date-time string')
+    text = value.strip()
+    if text.endswith(('Z', 'z')):
+        text = text[:-1] + '+00:00'
+    try:
+        moment = datetime.datetime.fromisoformat(text)
+    except ValueError:
+        raise ValueError(f'Invalid recorded_at {value!r}, expected an ISO 8601 date or date-time')
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return moment.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def condition_rows(record_id, user_id, condition_details):
+    """record_conditions rows for one record's per-condition predictions"""
+    return [
+        (record_id, user_id, condition, float(details['probability']),
+         details.get('severity'), bool(details.get('detected')))
+        for condition, details in condition_details.items()
+    ]
+
+
+def insert_health_records(cursor, user_id, health_params_list, ai_results_list, recorded_at_list=None):
+    """Insert scored readings and their per-condition predictions; return the new record ids.
+
+    Runs inside the caller's transaction: the caller commits. Per-condition
+    probabilities go to the indexed record_conditions table instead of a JSON
+    column on every row, and the new readings are folded into vital_rollups
+    and the user's deterioration alert state.
+    """
+    recorded_at_list = recorded_at_list or [None] * len(health_params_list)
+    cursor.executemany('''
+        INSERT INTO health_records
+        (user_id, systolic_bp, diastolic_bp, blood_sugar, body_weight, hemoglobin,
+         heart_rate, protein_urine, age, gestational_week, risk_level,
+         detected_conditions, recorded_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))
+    ''', [
+        (user_id,
+         params['systolic_bp'], params['diastolic_bp'], params['blood_sugar'],
+         params['body_weight'], params['hemoglobin'], params['heart_rate'],
+         params['protein_urine'], params['age'],
+         params['gestational_week'], ai_results['risk_level'],
+         json.dumps(ai_results['detected_conditions']),
+         recorded_at)
+        for params, ai_results, recorded_at in zip(health_params_list, ai_results_list, recorded_at_list)
+    ])
+
+    # AUTOINCREMENT ids are consecutive within a single write transaction
+    cursor.execute('SELECT last_insert_rowid()')
+    last_id = cursor.fetchone()[0]
+    record_ids = list(range(last_id - len(health_params_list) + 1, last_id + 1))
+
+    cursor.executemany('''
+        INSERT INTO record_conditions
+        (record_id, user_id, condition, probability, severity, detected)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', [
+        row
+        for record_id, ai_results in zip(record_ids, ai_results_list)
+        for row in condition_rows(record_id, user_id, ai_results['condition_details'])
+    ])
+
+    rollups.update_rollups(cursor, record_ids[0], record_ids[-1], user_id)
+    alerts.update_alerts(cursor, user_id, record_ids, health_params_list, recorded_at_list)
+    return record_ids
+
+
+def fetch_record_page(conn, columns=RECORD_COLUMNS, user_id=None, since=None, until=None,
+                      after=None, limit=500, descending=False):
+    """One keyset page of health_records rows as dicts, ordered by (recorded_at, id).
+
+    ``after`` is the (recorded_at, id) of the last row of the previous page;
+    the page resumes strictly after it (before it when ``descending``)
+    instead of using OFFSET, so deep pages cost the same as the first one.
+    ``id`` and ``recorded_at`` are always selected since they form the key.
+    """
+    columns = ['id', 'recorded_at'] + [column for column in columns if column not in ('id', 'recorded_at')]
+    filters = []
+    params = []
+    if user_id is not None:
+        filters.append('user_id = ?')
+        params.append(user_id)
+    if since:
+        filters.append('recorded_at >= ?')
+        params.append(since)
+    if until:
+        filters.append('recorded_at < ?')
+        params.append(until)
+    if after is not None:
+        filters.append('(recorded_at, id) < (?, ?)' if descending else '(recorded_at, id) > (?, ?)')
+        params.extend(after)
+    where = f"WHERE {' AND '.join(filters)}" if filters else ''
+    order = 'DESC' if descending else 'ASC'
+
+    rows = conn.execute(f'''
+        SELECT {', '.join(columns)} FROM health_records
+        {where}
+        ORDER BY recorded_at {order}, id {order}
+        LIMIT ?
+    ''', params + [limit]).fetchall()
+    return [dict(zip(columns, row)) for row in rows]
@@ -0,0 +1,205 @@
+"""
+Batch PDF health reports for many patients, rendered across a process pool.
+
+Report rendering is CPU-bound pure Python, so a clinic-wide bundle fans the
+patients out over worker processes, one report per task, and writes each PDF
+into a zip archive as soon as it completes. Reports already in the report
+cache are read from disk instead of being rendered again, and new renders are
+stored there for later downloads.
+
+Usage (from the backend directory):
+    python -m report_batch reports.zip                      # every patient with readings
+    python -m report_batch reports.zip --since 2024-06-01   # patients with readings since a date
+    python -m report_batch - --user-id 3 --user-id 7 > reports.zip
+"""
+
+import argparse
+import concurrent.futures
+import contextlib
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import zipfile
+
+import migrations
+import report_worker
+from database import ConnectionManager, database_path_from_url
+
+
+def patient_ids(conn, since=None):
+    """Ids of users with at least one health record (recorded on or after ``since``)"""
+    if since:
+        rows = conn.execute('''
+            SELECT DISTINCT user_id FROM health_records WHERE recorded_at >= ? ORDER BY user_id
+        ''', (since,))
+    else:
+        rows = conn.execute('''
+            SELECT id FROM users
+            WHERE EXISTS (SELECT 1 FROM health_records WHERE user_id = users.id)
+            ORDER BY id
+        ''')
+    return [row[0] for row in rows]
+
+
+class ReportPool:
+    """Long-lived pool of report worker processes, started on first use.
+
+    Starting spawn processes and importing the renderer in each costs far
+    more than a typical batch, so the web app keeps one pool for all batch
+    requests. Workers run report_worker, which imports nothing of the app.
+    """
+
+    def __init__(self, database_path, report_dir=None, max_workers=None):
+        self.database_path = database_path
+        self.report_dir = report_dir
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._executor = None
+        self._executor_pid = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        """Return the pool, starting it (again in a forked child process) when needed"""
+        with self._lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                # 'spawn' avoids forking a multi-threaded web worker
+                self._executor = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=report_worker.init_worker,
+                    initargs=(self.database_path, self.report_dir)
+                )
+                self._executor_pid = os.getpid()
+            return self._executor
+
+    def render(self, user_ids):
+        """Yield (user_id, pdf or None, error or None) for each patient, in completion order.
+
+        At most two reports per worker are in flight for one call, so memory
+        stays bounded however many patients are in the batch.
+        """
+        executor = self._get_executor()
+        user_ids = iter(user_ids)
+        pending = {}
+        try:
+            while True:
+                for user_id in user_ids:
+                    pending[executor.submit(report_worker.report_pdf, user_id)] = user_id
+                    if len(pending) >= 2 * self.max_workers:
+                        break
+                if not pending:
+                    return
+
+                done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    user_id = pending.pop(future)
+                    try:
+                        yield user_id, future.result(), None
+                    except Exception as e:
+                        yield user_id, None, str(e) or type(e).__name__
+        finally:
+            # A client that disconnects mid-download leaves nothing queued behind it
+            for future in pending:
+                future.cancel()
+
+    def close(self):
+        """Shut the worker processes down"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None and self._executor_pid == os.getpid():
+            executor.shutdown(wait=True)
+
+
+def render_reports(database_path, user_ids, report_dir=None, max_workers=None):
+    """Yield (user_id, pdf or None, error or None) for each patient from a pool used once"""
+    pool = ReportPool(database_path, report_dir, max_workers)
+    try:
+        yield from pool.render(user_ids)
+    finally:
+        pool.close()
+
+
+class _ChunkSink:
+    """Write-only file object that hands back what was written since the last drain"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_zip(results):
+    """Generate a zip archive chunk by chunk from (user_id, pdf, error) results.
+
+    Each report becomes patient_<user_id>.pdf; failed patients are listed in
+    errors.json at the end of the archive.
+    """
+    sink = _ChunkSink()
+    errors = []
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for user_id, pdf, error in results:
+            if error:
+                errors.append({'user_id': user_id, 'error': error})
+            else:
+                archive.writestr(f'patient_{user_id}.pdf', pdf)
+            yield sink.drain()
+        if errors:
+            archive.writestr('errors.json', json.dumps(errors, indent=2))
+    yield sink.drain()
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Render PDF health reports for many patients into a zip')
+    parser.add_argument('output', help="Zip file to write, or '-' for stdout")
+    parser.add_argument('--user-id', type=int, action='append', help='Patient to include (default: all with readings)')
+    parser.add_argument('--since', help='Only patients with readings on or after this date')
+    parser.add_argument('--workers', type=int, help='Rendering processes (default: CPU count)')
+    parser.add_argument('--report-dir', default=os.environ.get('REPORT_CACHE_DIR', 'report_cache'),
+                        help="Report cache directory ('' disables the cache)")
+    parser.add_argument('--database', default=database_path_from_url(
+        os.environ.get('DATABASE_URL', 'sqlite:///maternal_health.db')))
+    args = parser.parse_args()
+
+    db = ConnectionManager(args.database)
+    conn = db.connection()
+    # Keep stdout for the archive
+    with contextlib.redirect_stdout(sys.stderr):
+        migrations.migrate(conn)
+    user_ids = args.user_id or patient_ids(conn, args.since)
+    db.close_all()
+
+    failed = []
+
+    def with_progress(results):
+        for count, (user_id, pdf, error) in enumerate(results, start=1):
+            if error:
+                failed.append(user_id)
+                print(f"Report for patient {user_id} failed: {error}", file=sys.stderr)
+            print(f"Rendered {count}/{len(user_ids)} reports", file=sys.stderr)
+            yield user_id, pdf, error
+
+    output = sys.stdout.buffer if args.output == '-' else open(args.output, 'wb')
+    try:
+        results = render_reports(args.database, user_ids, args.report_dir or None, args.workers)
+        for chunk in stream_zip(with_progress(results)):
+            output.write(chunk)
+    finally:
+        if output is not sys.stdout.buffer:
+            output.close()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+"""
+Background PDF report jobs with an on-disk cache of rendered reports.
+
+A report is cached as ``<report_dir>/<user_id>/<key>.pdf`` where the key is
+built from the user's latest health record id and pregnancy profile id, the
+renderer's layout version and the date (the report prints its render date),
+so it changes exactly when something shown in the report does. Requesting a report whose file already exists costs two
+index lookups and a file read; otherwise a job is queued and rendered by a
+small thread pool outside the request. Job state lives in the report_jobs
+table so any worker process can answer status and download requests.
+"""
+
+import concurrent.futures
+import datetime
+import os
+import tempfile
+import uuid
+
+import report_renderer
+
+def report_key(conn, user_id):
+    """Cache key of a user's report; changes whenever a reading or pregnancy profile is added, and daily"""
+    last_record = conn.execute('SELECT MAX(id) FROM health_records WHERE user_id = ?', (user_id,)).fetchone()[0]
+    last_profile = conn.execute('SELECT MAX(id) FROM pregnancy_profiles WHERE user_id = ?', (user_id,)).fetchone()[0]
+    # Same clock as the renderer's "Report Date"
+    today = datetime.datetime.now().strftime('%Y%m%d')
+    return f'r{last_record or 0}-p{last_profile or 0}-v{report_renderer.LAYOUT_VERSION}-d{today}'
+
+
+def report_file(report_dir, user_id, key):
+    """File of a user's cached report for a cache key"""
+    return os.path.join(report_dir, str(int(user_id)), f'{key}.pdf')
+
+
+def store_report(report_dir, user_id, key, pdf):
+    """Write a rendered report atomically, delete the user's older reports and return its path"""
+    path = report_file(report_dir, user_id, key)
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(pdf)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+    for name in os.listdir(directory):
+        if name.endswith('.pdf') and name != os.path.basename(path):
+            try:
+                os.unlink(os.path.join(directory, name))
+            except FileNotFoundError:
+                pass
+    return path
+
+
+class ReportJobs:
+    """Queue of report renders for a ConnectionManager-backed database.
+
+    ``render(conn, user_id)`` returns PDF bytes. Jobs for a report that is
+    already queued, running or on disk are not duplicated: submit() returns
+    the existing job. Queued or running jobs not updated for
+    ``stale_after`` seconds (their worker process died) are submitted again.
+    """
+
+    def __init__(self, db, report_dir, render=report_renderer.render_health_report,
+                 max_workers=2, stale_after=600):
+        self.db = db
+        self.report_dir = report_dir
+        self.render = render
+        self.stale_after = stale_after
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='report-job'
+        )
+
+    def path(self, user_id, key):
+        """File of a user's report for a cache key"""
+        return report_file(self.report_dir, user_id, key)
+
+    def report_path(self, user_id):
+        """Path of the user's up-to-date report, rendered in the calling thread on a cache miss"""
+        conn = self.db.connection()
+        key = report_key(conn, user_id)
+        path = self.path(user_id, key)
+        if os.path.exists(path):
+            return path
+        return store_report(self.report_dir, user_id, key, self.render(conn, user_id))
+
+    def _job_dict(self, row):
+        """API representation of a report_jobs row"""
+        job_id, user_id, key, status, error, created_at, updated_at = row
+        return {
+            'job_id': job_id,
+            'status': status,
+            'error': error,
+            'created_at': created_at,
+            'updated_at': updated_at,
+            'report_key': key
+        }
+
+    def _fetch(self, conn, where, params):
+        """First report_jobs row matching a WHERE clause"""
+        return conn.execute(f'''
+            SELECT id, user_id, report_key, status, error, created_at, updated_at
+            FROM report_jobs WHERE {where}
+        ''', params).fetchone()
+
+    def _set_status(self, job_id, status, error=None, key=None):
+        """Record a job's progress; ``key`` replaces its report key"""
+        conn = self.db.connection()
+        conn.execute('''
+            UPDATE report_jobs
+            SET status = ?, error = ?, report_key = COALESCE(?, report_key), updated_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+        ''', (status, error, key, job_id))
+        conn.commit()
+
+    def submit(self, user_id):
+        """Queue a render of the user's report unless an equivalent job exists; returns the job"""
+        conn = self.db.connection()
+        key = report_key(conn, user_id)
+        cached = os.path.exists(self.path(user_id, key))
+
+        existing = self._fetch(conn, '''
+            user_id = ? AND report_key = ? AND (
+                (status = 'done' AND ?) OR
+                (status IN ('queued', 'running') AND updated_at > datetime('now', ?))
+            )
+            ORDER BY created_at DESC LIMIT 1
+        ''', (user_id, key, cached, f'-{int(self.stale_after)} seconds'))
+        if existing:
+            return self._job_dict(existing)
+
+        job_id = uuid.uuid4().hex
+        # Finished jobs are only useful for a while; drop the user's old ones
+        conn.execute('''
+            DELETE FROM report_jobs
+            WHERE user_id = ? AND created_at < datetime('now', '-7 days')
+        ''', (user_id,))
+        conn.execute('''
+            INSERT INTO report_jobs (id, user_id, report_key, status)
+            VALUES (?, ?, ?, ?)
+        ''', (job_id, user_id, key, 'done' if cached else 'queued'))
+        conn.commit()
+
+        if not cached:
+            self._executor.submit(self._run, job_id, user_id)
+        return self.get(job_id, user_id)
+
+    def _run(self, job_id, user_id):
+        """Render one job on a pool thread"""
+        try:
+            self._set_status(job_id, 'running')
+            conn = self.db.connection()
+            # Readings added since the job was queued are included in this render
+            current_key = report_key(conn, user_id)
+            pdf = self.render(conn, user_id)
+            store_report(self.report_dir, user_id, current_key, pdf)
+            self._set_status(job_id, 'done', key=current_key)
+        except Exception as e:
+            print(f"Report job {job_id} failed: {e}")
+            self.db.release()
+            self._set_status(job_id, 'failed', str(e))
+
+    def get(self, job_id, user_id):
+        """A user's job as a dict, or None"""
+        row = self._fetch(self.db.connection(), 'id = ? AND user_id = ?', (job_id, user_id))
+        return self._job_dict(row) if row else None
+
+    def job_path(self, user_id, job):
+        """Report file of a user's finished job, or None once a newer report replaced it"""
+        path = self.path(user_id, job['report_key'])
+        return path if os.path.exists(path) else None
+
+    def shutdown(self, wait=True):
+        """Stop the render threads"""
+        self._executor.shutdown(wait=wait)
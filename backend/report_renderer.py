@@ -0,0 +1,387 @@
+import datetime
+import io
+import math
+from array import array
+
+import numpy as np
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.lib import colors
+from reportlab.graphics.shapes import Drawing, String
+from reportlab.graphics.charts.lineplots import LinePlot
+
+from utils.health_recommendations import HealthRecommendations
+
+# Bump when the report layout changes so cached reports are rendered again
+LAYOUT_VERSION = 2
+
+# Most points drawn per chart line, whatever the number of readings
+CHART_POINTS = 300
+
+# (column, table label, unit) of the charted vital signs, in query order
+VITALS = [
+    ('systolic_bp', 'Systolic BP', 'mmHg'),
+    ('diastolic_bp', 'Diastolic BP', 'mmHg'),
+    ('blood_sugar', 'Blood Sugar', 'mg/dL'),
+    ('body_weight', 'Weight', 'kg'),
+    ('hemoglobin', 'Hemoglobin', 'g/dL'),
+]
+
+# (title, vitals drawn) per trend chart
+CHARTS = [
+    ('Blood Pressure (mmHg)', ['systolic_bp', 'diastolic_bp']),
+    ('Blood Sugar (mg/dL)', ['blood_sugar']),
+    ('Body Weight (kg)', ['body_weight']),
+    ('Hemoglobin (g/dL)', ['hemoglobin']),
+]
+CHART_COLORS = [colors.HexColor('#667eea'), colors.HexColor('#48bb78')]
+
+# Styles are immutable once built, so every report shares them
+STYLES = getSampleStyleSheet()
+TITLE_STYLE = ParagraphStyle(
+    'CustomTitle',
+    parent=STYLES['Heading1'],
+    fontSize=24,
+    spaceAfter=30,
+    textColor=colors.HexColor('#667eea'),
+    alignment=1  # Center alignment
+)
+FOOTER_STYLE = ParagraphStyle(
+    'Footer',
+    parent=STYLES['Normal'],
+    fontSize=8,
+    textColor=colors.grey,
+    alignment=1
+)
+PATIENT_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f7fafc')),
+    ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#e2e8f0'))
+])
+LATEST_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#667eea')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 9),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f7fafc')])
+])
+SUMMARY_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#48bb78')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 9),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black)
+])
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+
+health_recommendations = HealthRecommendations()
+
+
+def _day_date(days):
+    """datetime of a day number (days since the epoch)"""
+    return _EPOCH + datetime.timedelta(days=days)
+
+
+class RecordSummary:
+    """Readings seen one at a time in recorded_at order, kept as compact columns.
+
+    Each reading appends its timestamp (days since the epoch, NaN when it
+    cannot be parsed) and one float per vital to typed arrays, 48 bytes per
+    reading instead of a row object, and updates the risk level counts and
+    the last two readings. Statistics are computed over the arrays in NumPy.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.dated = 0
+        self.latest = None
+        self.previous = None
+        self.risk_levels = {}
+        self.days = array('d')
+        self.series = {column: array('d') for column, _, _ in VITALS}
+        self._appends = [self.series[column].append for column, _, _ in VITALS]
+
+    def add(self, row):
+        """Fold in one (systolic_bp, diastolic_bp, blood_sugar, body_weight, hemoglobin, risk_level, recorded_at, day) row"""
+        self.count += 1
+        self.previous, self.latest = self.latest, row
+        self.risk_levels[row[5]] = self.risk_levels.get(row[5], 0) + 1
+        if row[7] is None:
+            self.days.append(math.nan)
+        else:
+            self.dated += 1
+            self.days.append(row[7])
+        for append, value in zip(self._appends, row):
+            append(value)
+
+    def stats(self, column):
+        """Mean, min, max and sample standard deviation of a vital"""
+        values = np.frombuffer(self.series[column])
+        return {
+            'mean': float(values.mean()),
+            'min': float(values.min()),
+            'max': float(values.max()),
+            'std_dev': float(values.std(ddof=1)) if len(values) > 1 else 0.0
+        }
+
+    def timeline(self, column):
+        """(days, values) of a vital for the readings with a parseable timestamp"""
+        days = np.frombuffer(self.days)
+        values = np.frombuffer(self.series[column])
+        dated = ~np.isnan(days)
+        return days[dated], values[dated]
+
+    def period(self):
+        """(first, last) reading datetimes, or None when no timestamp could be parsed"""
+        if not self.dated:
+            return None
+        days = np.frombuffer(self.days)
+        days = days[~np.isnan(days)]
+        return _day_date(float(days.min())), _day_date(float(days.max()))
+
+
+def largest_triangle_three_buckets(xs, ys, threshold):
+    """Downsample a series to ``threshold`` (x, y) points keeping its visual shape.
+
+    Largest-Triangle-Three-Buckets: the first and last points are kept and
+    every bucket in between contributes the point forming the largest
+    triangle with the previously chosen point and the next bucket's average.
+    """
+    xs = np.asarray(xs, dtype=float)
+    ys = np.asarray(ys, dtype=float)
+    n = len(xs)
+    if threshold >= n or threshold < 3:
+        return list(zip(xs.tolist(), ys.tolist()))
+
+    # Bucket i holds points edges[i]..edges[i + 1] - 1; the first and last points are their own
+    edges = (np.arange(threshold - 1) * ((n - 2) / (threshold - 2))).astype(int) + 1
+    sizes = np.diff(edges)
+    # Average of the next bucket, the last point for the final bucket
+    next_x = np.append((np.add.reduceat(xs[:n - 1], edges[:-1]) / sizes)[1:], xs[-1])
+    next_y = np.append((np.add.reduceat(ys[:n - 1], edges[:-1]) / sizes)[1:], ys[-1])
+
+    selected = [0]
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        ax, ay = xs[a], ys[a]
+        areas = np.abs((ax - next_x[i]) * (ys[start:end] - ay) - (ax - xs[start:end]) * (next_y[i] - ay))
+        a = start + int(np.argmax(areas))
+        selected.append(a)
+    selected.append(n - 1)
+    return list(zip(xs[selected].tolist(), ys[selected].tolist()))
+
+
+def _day_label(days):
+    """Axis label for a chart x value (days since the epoch)"""
+    return _day_date(days).strftime('%b %d, %y')
+
+
+def _trend_chart(summary, title, columns):
+    """Line chart of one or more vitals over time, downsampled to CHART_POINTS per line"""
+    drawing = Drawing(6.5 * inch, 2.1 * inch)
+    drawing.add(String(0, 1.95 * inch, title, fontName='Helvetica-Bold', fontSize=10))
+
+    plot = LinePlot()
+    plot.x = 0.5 * inch
+    plot.y = 0.35 * inch
+    plot.width = 5.8 * inch
+    plot.height = 1.45 * inch
+    plot.data = [
+        largest_triangle_three_buckets(*summary.timeline(column), CHART_POINTS)
+        for column in columns
+    ]
+    for i, column in enumerate(columns):
+        plot.lines[i].strokeColor = CHART_COLORS[i % len(CHART_COLORS)]
+        plot.lines[i].strokeWidth = 1
+    plot.xValueAxis.labelTextFormat = _day_label
+    plot.xValueAxis.labels.fontSize = 7
+    plot.yValueAxis.labels.fontSize = 7
+    plot.xValueAxis.maximumTicks = 6
+    drawing.add(plot)
+
+    if len(columns) > 1:
+        labels = dict((column, label) for column, label, _ in VITALS)
+        for i, column in enumerate(columns):
+            drawing.add(String(3.5 * inch + i * 1.3 * inch, 1.95 * inch, f"— {labels[column]}",
+                               fontSize=8, fillColor=CHART_COLORS[i % len(CHART_COLORS)]))
+    return drawing
+
+
+def _sample_records():
+    """Demo readings shown when a user has no records yet"""
+    now = datetime.datetime.now()
+    readings = [
+        ((118, 78, 88, 65.0, 12.3, 'Normal'), now - datetime.timedelta(days=14)),
+        ((125, 85, 110, 66.2, 11.8, 'Medium'), now - datetime.timedelta(days=7)),
+        ((120, 80, 95, 65.5, 12.1, 'Normal'), now),
+    ]
+    return [
+        values + (recorded_at.isoformat(), (recorded_at - _EPOCH).total_seconds() / 86400)
+        for values, recorded_at in readings
+    ]
+
+
+def render_health_report(conn, user_id):
+    """Render a user's comprehensive health report; returns the PDF bytes.
+
+    Readings are streamed from the cursor in recorded_at order into a
+    RecordSummary, so the cost is one pass over the history; the charts are
+    downsampled to CHART_POINTS, so the PDF size does not grow with it.
+    """
+    cursor = conn.cursor()
+
+    # Get user info
+    cursor.execute('SELECT name, email FROM users WHERE id = ?', (user_id,))
+    user_info = cursor.fetchone()
+
+    # Get pregnancy profile
+    cursor.execute('''
+        SELECT current_week, expected_due_date, last_menstrual_period
+        FROM pregnancy_profiles
+        WHERE user_id = ? AND is_active = TRUE
+        ORDER BY created_at DESC
+        LIMIT 1
+    ''', (user_id,))
+
+    pregnancy_profile = cursor.fetchone()
+
+    # Stream all health records, oldest first
+    summary = RecordSummary()
+    for row in cursor.execute('''
+        SELECT systolic_bp, diastolic_bp, blood_sugar, body_weight,
+               hemoglobin, risk_level, recorded_at, julianday(recorded_at) - 2440587.5
+        FROM health_records
+        WHERE user_id = ?
+        ORDER BY recorded_at, id
+    ''', (user_id,)):
+        summary.add(row)
+
+    # If no records exist, use some sample data for demo
+    if not summary.count:
+        for row in _sample_records():
+            summary.add(row)
+
+    # Create PDF report
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4)
+    story = []
+
+    # Title
+    story.append(Paragraph("Maternal Health Report", TITLE_STYLE))
+    story.append(Spacer(1, 20))
+
+    # Patient Information
+    story.append(Paragraph("Patient Information", STYLES['Heading2']))
+    patient_data = [
+        ['Name:', user_info[0] if user_info else 'Demo User'],
+        ['Email:', user_info[1] if user_info else 'demo@maternalcare.ai'],
+        ['Report Date:', datetime.datetime.now().strftime('%B %d, %Y')],
+    ]
+
+    if pregnancy_profile:
+        patient_data.extend([
+            ['Current Week:', f"Week {pregnancy_profile[0]}"],
+            ['Expected Due Date:', pregnancy_profile[1]],
+            ['Last Menstrual Period:', pregnancy_profile[2]]
+        ])
+
+    patient_table = Table(patient_data, colWidths=[2*inch, 4*inch])
+    patient_table.setStyle(PATIENT_TABLE_STYLE)
+    story.append(patient_table)
+    story.append(Spacer(1, 20))
+
+    # Health Records Summary
+    story.append(Paragraph("Health Records Summary", STYLES['Heading2']))
+
+    # Latest record
+    latest = summary.latest
+    latest_date = _day_date(latest[7]).strftime('%B %d, %Y') if latest[7] is not None else latest[6]
+    story.append(Paragraph(f"<b>Latest Assessment ({latest_date}):</b>", STYLES['Normal']))
+
+    latest_data = [
+        ['Parameter', 'Value', 'Status'],
+        ['Systolic Blood Pressure', f"{latest[0]} mmHg", 'Normal' if latest[0] < 140 else 'Elevated'],
+        ['Diastolic Blood Pressure', f"{latest[1]} mmHg", 'Normal' if latest[1] < 90 else 'Elevated'],
+        ['Blood Sugar', f"{latest[2]} mg/dL", 'Normal' if latest[2] < 125 else 'Elevated'],
+        ['Body Weight', f"{latest[3]} kg", 'Monitored'],
+        ['Hemoglobin', f"{latest[4]} g/dL", 'Normal' if latest[4] >= 11 else 'Low'],
+        ['Risk Level', latest[5], latest[5]]
+    ]
+
+    health_table = Table(latest_data, colWidths=[2.5*inch, 1.5*inch, 1.5*inch])
+    health_table.setStyle(LATEST_TABLE_STYLE)
+    story.append(health_table)
+    story.append(Spacer(1, 20))
+
+    # Summary statistics over the whole history
+    story.append(Paragraph("Summary Statistics", STYLES['Heading3']))
+    period = ''
+    if summary.period():
+        first_at, last_at = summary.period()
+        period = f" from {first_at.strftime('%B %d, %Y')} to {last_at.strftime('%B %d, %Y')}"
+    risk_counts = ', '.join(f"{level} {count}" for level, count in sorted(summary.risk_levels.items()))
+    story.append(Paragraph(f"{summary.count} readings{period}. Risk levels: {risk_counts}.", STYLES['Normal']))
+    story.append(Spacer(1, 6))
+
+    summary_data = [['Parameter', 'Mean', 'Min', 'Max', 'Std Dev', 'Last Change']]
+    for i, (column, label, unit) in enumerate(VITALS):
+        stats = summary.stats(column)
+        change = ''
+        if summary.previous is not None:
+            delta = latest[i] - summary.previous[i]
+            change = f"{delta:+.1f} {'↑' if delta > 0 else '↓' if delta < 0 else '→'}"
+        summary_data.append([
+            f"{label} ({unit})", f"{stats['mean']:.1f}", f"{stats['min']:.1f}", f"{stats['max']:.1f}",
+            f"{stats['std_dev']:.1f}", change
+        ])
+    summary_table = Table(summary_data)
+    summary_table.setStyle(SUMMARY_TABLE_STYLE)
+    story.append(summary_table)
+    story.append(Spacer(1, 20))
+
+    # Trend charts
+    if summary.dated > 1:
+        story.append(Paragraph("Health Trends", STYLES['Heading3']))
+        for title, columns in CHARTS:
+            story.append(_trend_chart(summary, title, columns))
+            story.append(Spacer(1, 8))
+        story.append(Spacer(1, 12))
+
+    # Recommendations
+    health_params = {
+        'systolic_bp': latest[0],
+        'diastolic_bp': latest[1],
+        'blood_sugar': latest[2],
+        'body_weight': latest[3],
+        'hemoglobin': latest[4]
+    }
+
+    recommendations = health_recommendations.get_recommendations(latest[5], health_params)
+
+    story.append(Paragraph("AI-Generated Recommendations", STYLES['Heading2']))
+
+    for category, items in recommendations.items():
+        if isinstance(items, list) and items:
+            story.append(Paragraph(f"<b>{category.replace('_', ' ').title()}:</b>", STYLES['Normal']))
+            for item in items:
+                story.append(Paragraph(f"• {item}", STYLES['Normal']))
+            story.append(Spacer(1, 10))
+
+    # Footer
+    story.append(Spacer(1, 30))
+    story.append(Paragraph("This report is generated by AI-Powered Maternal Health Monitoring System", FOOTER_STYLE))
+    story.append(Paragraph("Please consult with your healthcare provider for medical decisions", FOOTER_STYLE))
+
+    # Build PDF
+    doc.build(story)
+    return buffer.getvalue()
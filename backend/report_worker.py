@@ -0,0 +1,43 @@
+"""
+Entry points of the batch report worker processes.
+
+The pool's spawned processes unpickle these functions by module name, so
+this module imports only what rendering a report needs: the database
+wrapper, the report cache helpers and the renderer. Keep web app, model and
+migration imports out of it.
+"""
+
+import os
+
+from database import ConnectionManager
+from report_jobs import report_file, report_key, store_report
+from report_renderer import render_health_report
+
+# Opened once per worker process by the pool initializer
+_worker_db = None
+_worker_report_dir = None
+
+
+def init_worker(database_path, report_dir):
+    """Pool initializer: open the database for this worker process"""
+    global _worker_db, _worker_report_dir
+    _worker_db = ConnectionManager(database_path)
+    _worker_report_dir = report_dir
+
+
+def report_pdf(user_id):
+    """A patient's report PDF, read from the report cache or rendered and cached"""
+    conn = _worker_db.connection()
+    if conn.execute('SELECT 1 FROM users WHERE id = ?', (user_id,)).fetchone() is None:
+        raise LookupError(f'No user with id {user_id}')
+    key = report_key(conn, user_id)
+    if _worker_report_dir:
+        path = report_file(_worker_report_dir, user_id, key)
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                return f.read()
+
+    pdf = render_health_report(conn, user_id)
+    if _worker_report_dir:
+        store_report(_worker_report_dir, user_id, key, pdf)
+    return pdf
@@ -0,0 +1,153 @@
+"""
+Daily and weekly vital-sign rollups maintained alongside health_records.
+
+Each vital_rollups row holds, for one user and one day or ISO week (weeks
+start on Monday), the reading count, the sum, min and max of every vital
+sign and the number of readings at each risk level. New readings are folded
+in with an UPSERT in the same transaction that inserts them, so trend charts
+read one row per period instead of every reading.
+
+Usage (from the backend directory), to rebuild after a backfill or repair:
+    python -m rollups                 # every user
+    python -m rollups --user-id 42    # one user
+"""
+
+import argparse
+import os
+
+from database import ConnectionManager, database_path_from_url
+
+VITALS = ['systolic_bp', 'diastolic_bp', 'blood_sugar', 'body_weight', 'hemoglobin']
+RISK_LEVELS = ['Normal', 'Medium', 'High']
+PERIODS = {
+    'day': 'date(recorded_at)',
+    # Monday on or before the reading
+    'week': "date(recorded_at, '-6 days', 'weekday 1')"
+}
+
+_aggregate_columns = ['readings'] + [
+    f'{vital}_{stat}' for vital in VITALS for stat in ('sum', 'min', 'max')
+] + [f'{level.lower()}_count' for level in RISK_LEVELS]
+
+_aggregate_exprs = ['COUNT(*)'] + [
+    f'{stat.upper()}({vital})' for vital in VITALS for stat in ('sum', 'min', 'max')
+] + [f"SUM(risk_level = '{level}')" for level in RISK_LEVELS]
+
+_merge = [
+    f'{column} = MIN({column}, excluded.{column})' if column.endswith('_min') else
+    f'{column} = MAX({column}, excluded.{column})' if column.endswith('_max') else
+    f'{column} = {column} + excluded.{column}'
+    for column in _aggregate_columns
+]
+
+
+def update_rollups(cursor, first_id, last_id, user_id=None):
+    """Fold the health_records rows with ids first_id..last_id into vital_rollups.
+
+    Runs in the caller's transaction; cost is proportional to the number of
+    new rows, not to the user's history.
+    """
+    user_filter = 'AND user_id = ?' if user_id is not None else ''
+    params = [first_id, last_id] + ([user_id] if user_id is not None else [])
+    for period, period_start in PERIODS.items():
+        cursor.execute(f'''
+            INSERT INTO vital_rollups (user_id, period, period_start, {', '.join(_aggregate_columns)})
+            SELECT user_id, '{period}', {period_start}, {', '.join(_aggregate_exprs)}
+            FROM health_records
+            WHERE id BETWEEN ? AND ? {user_filter} AND {period_start} IS NOT NULL
+            GROUP BY user_id, {period_start}
+            ON CONFLICT (user_id, period, period_start) DO UPDATE SET {', '.join(_merge)}
+        ''', params)
+
+
+def fill_rollups(conn, user_id=None, chunk_size=50000):
+    """Replace the rollups of all users (or one) with ones computed from health_records.
+
+    Runs in the caller's transaction, folding the history in id-range chunks.
+    """
+    if user_id is None:
+        conn.execute('DELETE FROM vital_rollups')
+        bounds = conn.execute('SELECT MIN(id), MAX(id) FROM health_records').fetchone()
+    else:
+        conn.execute('DELETE FROM vital_rollups WHERE user_id = ?', (user_id,))
+        bounds = conn.execute('SELECT MIN(id), MAX(id) FROM health_records WHERE user_id = ?',
+                              (user_id,)).fetchone()
+
+    if bounds[0] is not None:
+        cursor = conn.cursor()
+        for start in range(bounds[0], bounds[1] + 1, chunk_size):
+            update_rollups(cursor, start, min(start + chunk_size - 1, bounds[1]), user_id)
+
+
+def rebuild_rollups(conn, user_id=None, chunk_size=50000):
+    """Recompute vital_rollups from health_records (all users or one) in a single transaction"""
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        fill_rollups(conn, user_id, chunk_size)
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+
+
+def fetch_rollups(conn, user_id, period='day', since=None, until=None):
+    """Rollup rows for a user as dicts with min/max/mean per vital and risk level counts"""
+    if period not in PERIODS:
+        raise ValueError(f"period must be one of {', '.join(PERIODS)}")
+
+    filters = ['user_id = ?', 'period = ?']
+    params = [user_id, period]
+    if since:
+        filters.append('period_start >= ?')
+        params.append(since)
+    if until:
+        filters.append('period_start < ?')
+        params.append(until)
+
+    rows = conn.execute(f'''
+        SELECT period_start, {', '.join(_aggregate_columns)}
+        FROM vital_rollups
+        WHERE {' AND '.join(filters)}
+        ORDER BY period_start
+    ''', params).fetchall()
+
+    result = []
+    for row in rows:
+        values = dict(zip(['period_start'] + _aggregate_columns, row))
+        readings = values['readings']
+        entry = {'period_start': values['period_start'], 'readings': readings}
+        for vital in VITALS:
+            entry[vital] = {
+                'min': values[f'{vital}_min'],
+                'max': values[f'{vital}_max'],
+                'mean': values[f'{vital}_sum'] / readings if readings else None
+            }
+        entry['risk_levels'] = {level: values[f'{level.lower()}_count'] for level in RISK_LEVELS}
+        result.append(entry)
+    return result
+
+
+def main():
+    """Command line entry point"""
+    # Imported here because migrations imports this module (through records)
+    import migrations
+
+    parser = argparse.ArgumentParser(description='Rebuild the vital_rollups table from health_records')
+    parser.add_argument('--user-id', type=int, help='Rebuild only this user')
+    parser.add_argument('--database', default=database_path_from_url(
+        os.environ.get('DATABASE_URL', 'sqlite:///maternal_health.db')))
+    args = parser.parse_args()
+
+    db = ConnectionManager(args.database)
+    conn = db.connection()
+    migrations.migrate(conn)
+    rebuild_rollups(conn, args.user_id)
+    count = conn.execute('SELECT COUNT(*) FROM vital_rollups').fetchone()[0]
+    print(f"Rebuilt rollups: {count} rows")
+    db.close_all()
+
+
+if __name__ == '__main__':
+    main()
@@ -13,25 +13,18 @@ def install_requirements():
     subprocess.check_call([sys.executable, "-m", "pip", "install", "-r", "requirements.txt"])
 
 def initialize_database():
-    """Initialize the SQLite database"""
+    """Initialize the SQLite database and apply pending schema migrations"""
     print("Initializing database...")
     from app import init_db
     init_db()
     print("Database initialized successfully!")
 
 def train_ml_model():
-    """Train the enhanced ML model"""
+    """Train the enhanced ML model and save versioned artifacts"""
     print("Training Enhanced ML model...")
-    try:
-        from ml_model.enhanced_risk_predictor import EnhancedRiskPredictor
-        predictor = EnhancedRiskPredictor()
-        print("Enhanced ML model trained and saved successfully!")
-    except Exception as e:
-        print(f"Error training enhanced model: {e}")
-        print("Falling back to basic model...")
-        from ml_model.risk_predictor import RiskPredictor
-        predictor = RiskPredictor()
-        print("Basic ML model trained and saved successfully!")
+    from ml_model.train import build_artifacts
+    version = build_artifacts()
+    print(f"Enhanced ML model trained and saved as version {version}!")
 
 def main():
     """Main setup function"""
@@ -39,8 +32,9 @@ def main():
     
     try:
         install_requirements()
-        initialize_database()
+        # Artifacts must exist before app.py (imported by initialize_database) loads them
         train_ml_model()
+        initialize_database()
         
         print("\n✅ Backend setup completed successfully!")
         print("\nTo start the server, run:")
@@ -0,0 +1,23 @@
+import os
+import sys
+
+import pytest
+
+# Tests import backend modules (ml_model, records, ...) the way app.py does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import migrations
+from database import ConnectionManager
+
+
+@pytest.fixture
+def db(tmp_path):
+    """ConnectionManager of a fully migrated database file with users 1 and 2"""
+    manager = ConnectionManager(str(tmp_path / 'maternal_health.db'))
+    conn = manager.connection()
+    migrations.migrate(conn)
+    conn.executemany('INSERT INTO users (id, email, password_hash, name) VALUES (?, ?, ?, ?)',
+                     [(1, 'one@example.com', 'x', 'One'), (2, 'two@example.com', 'x', 'Two')])
+    conn.commit()
+    yield manager
+    manager.close_all()
@@ -0,0 +1,195 @@
+"""
+Deterioration alert rules and the incremental alert state.
+
+Readings go through insert_health_records, so every test sees the state as
+it is stored between transactions. Times are relative to now because
+readings older than ALERT_MAX_AGE_DAYS never alert.
+"""
+
+import datetime
+import json
+import random
+
+import pytest
+
+import alerts
+from records import insert_health_records
+
+NORMAL = (118, 76)
+
+
+def _at(days_ago):
+    """recorded_at of a reading ``days_ago`` days before now"""
+    moment = datetime.datetime.utcnow() - datetime.timedelta(days=days_ago)
+    return moment.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _params(systolic, diastolic, protein_urine=0.1, gestational_week=24):
+    """Health parameters of a reading"""
+    return {
+        'systolic_bp': systolic, 'diastolic_bp': diastolic, 'blood_sugar': 95, 'body_weight': 65,
+        'hemoglobin': 12, 'heart_rate': 75, 'protein_urine': protein_urine, 'age': 28,
+        'gestational_week': gestational_week
+    }
+
+
+def _insert(conn, readings, user_id=1):
+    """Insert (params, recorded_at) readings in one transaction; return the alert types raised"""
+    before = conn.execute('SELECT COALESCE(MAX(id), 0) FROM alerts').fetchone()[0]
+    insert_health_records(
+        conn.cursor(), user_id,
+        [params for params, _ in readings],
+        [{'risk_level': 'Normal', 'detected_conditions': [], 'condition_details': {}} for _ in readings],
+        [recorded_at for _, recorded_at in readings]
+    )
+    conn.commit()
+    return [row[0] for row in conn.execute(
+        'SELECT alert_type FROM alerts WHERE id > ? ORDER BY id', (before,))]
+
+
+def _insert_each(conn, readings, user_id=1):
+    """Insert readings one transaction each; return the alert types each one raised"""
+    return [_insert(conn, [reading], user_id) for reading in readings]
+
+
+def _state(conn, user_id=1):
+    """A user's stored alert state"""
+    return json.loads(conn.execute('SELECT state FROM alert_state WHERE user_id = ?', (user_id,)).fetchone()[0])
+
+
+def test_ewma_follows_each_reading(db):
+    conn = db.connection()
+    systolic = [120, 150, 130, 160, 110]
+    _insert_each(conn, [(_params(value, 80), _at(5 - index)) for index, value in enumerate(systolic)])
+
+    expected = float(systolic[0])
+    for value in systolic[1:]:
+        expected += alerts.EWMA_ALPHA * (value - expected)
+    state = _state(conn)
+    assert state['ewma_systolic'] == pytest.approx(expected)
+    assert state['ewma_diastolic'] == pytest.approx(80)
+    assert state['readings'] == len(systolic)
+
+
+def test_late_reading_enters_the_ewma_with_decayed_weight(db):
+    conn = db.connection()
+    _insert_each(conn, [(_params(120, 80), _at(1)), (_params(120, 80), _at(0))])
+    _insert(conn, [(_params(150, 80), _at(3))])
+
+    weight = alerts._decay(3)
+    assert _state(conn)['ewma_systolic'] == pytest.approx(120 + alerts.EWMA_ALPHA * weight * 30)
+
+
+@pytest.mark.parametrize('systolic, diastolic, alerting', [
+    (alerts.SEVERE_SYSTOLIC, 80, True),
+    (alerts.SEVERE_SYSTOLIC - 1, 80, False),
+    (120, alerts.SEVERE_DIASTOLIC, True),
+    (120, alerts.SEVERE_DIASTOLIC - 1, False)
+])
+def test_severe_hypertension_threshold(db, systolic, diastolic, alerting):
+    raised = _insert(db.connection(), [(_params(systolic, diastolic), _at(0))])
+    assert ('severe_hypertension' in raised) == alerting
+
+
+@pytest.mark.parametrize('protein_urine, gestational_week, alerting', [
+    (alerts.PROTEINURIA, alerts.PREECLAMPSIA_FROM_WEEK, True),
+    (alerts.PROTEINURIA - 0.01, alerts.PREECLAMPSIA_FROM_WEEK, False),
+    (alerts.PROTEINURIA, alerts.PREECLAMPSIA_FROM_WEEK - 1, False)
+])
+def test_preeclampsia_threshold(db, protein_urine, gestational_week, alerting):
+    params = _params(alerts.HYPERTENSION_SYSTOLIC, 80, protein_urine, gestational_week)
+    raised = _insert(db.connection(), [(params, _at(0))])
+    assert ('preeclampsia_warning' in raised) == alerting
+
+
+def test_sustained_hypertension_alerts_once_per_episode(db):
+    conn = db.connection()
+    high = _params(alerts.HYPERTENSION_SYSTOLIC, 85)
+    diastolic_high = _params(125, alerts.HYPERTENSION_DIASTOLIC)
+    raised = _insert_each(conn, [
+        (high, _at(6)), (diastolic_high, _at(5.5)), (high, _at(5)),  # third in a row: alert
+        (high, _at(4.5)),                                            # same episode: quiet
+        (_params(*NORMAL), _at(4)),                                  # episode ends
+        (high, _at(3.5)), (high, _at(3)), (high, _at(2.5))           # new episode: alert again
+    ])
+    sustained = [index for index, types in enumerate(raised) if 'sustained_hypertension' in types]
+    assert sustained == [2, 7]
+
+
+@pytest.mark.parametrize('per_day, alerting', [(1.0, True), (0.5, False)])
+def test_rising_blood_pressure_slope_threshold(db, per_day, alerting):
+    conn = db.connection()
+    # 1 mmHg/day is 7 mmHg/week, above RISING_SLOPE_PER_WEEK; 0.5 is 3.5, below it
+    readings = [(_params(132 + per_day * day, 80), _at(6 - day)) for day in range(7)]
+    raised = _insert_each(conn, readings)
+
+    assert alerts.systolic_slope_per_week(_state(conn)) == pytest.approx(per_day * 7)
+    assert any('rising_blood_pressure' in types for types in raised) == alerting
+
+
+def test_rising_blood_pressure_needs_an_elevated_average(db):
+    conn = db.connection()
+    readings = [(_params(100 + 2 * day, 70), _at(6 - day)) for day in range(7)]
+    raised = _insert_each(conn, readings)
+
+    assert alerts.systolic_slope_per_week(_state(conn)) >= alerts.RISING_SLOPE_PER_WEEK
+    assert _state(conn)['ewma_systolic'] < alerts.RISING_FROM_SYSTOLIC
+    assert not any('rising_blood_pressure' in types for types in raised)
+
+
+def test_old_readings_update_the_state_without_alerting(db):
+    conn = db.connection()
+    old = alerts.ALERT_MAX_AGE_DAYS + 1
+    raised = _insert(conn, [(_params(170, 115, 0.5, 30), _at(old + day / 10)) for day in range(5)])
+
+    assert raised == []
+    assert _state(conn)['readings'] == 5
+    assert len(_state(conn)['recent']) == 5
+
+
+def _series(seed=0):
+    """Three weeks of readings, drifting into hypertension, in time order"""
+    rng = random.Random(seed)
+    return [
+        (_params(round(112 + 2.2 * day + rng.uniform(-6, 6)), round(72 + day + rng.uniform(-5, 5)),
+                 rng.choice([0.1, 0.2, 0.4]), 22), _at(21 - day))
+        for day in range(21)
+    ]
+
+
+def test_time_order_does_not_change_slope_or_recent_readings(db):
+    conn = db.connection()
+    readings = _series()
+    _insert_each(conn, readings, user_id=1)
+    shuffled = readings[:]
+    random.Random(1).shuffle(shuffled)
+    _insert_each(conn, shuffled, user_id=2)
+
+    in_order, out_of_order = _state(conn, 1), _state(conn, 2)
+    assert out_of_order['day'] == pytest.approx(in_order['day'])
+    assert out_of_order['slope_sums'] == pytest.approx(in_order['slope_sums'])
+    assert out_of_order['recent'] == in_order['recent']
+
+
+@pytest.mark.parametrize('lost', ['row', 'version'])
+def test_restored_state_gives_the_same_alerts(db, lost):
+    conn = db.connection()
+    readings = _series()
+    history, recent = readings[:15], readings[15:]
+    _insert_each(conn, history, user_id=1)
+    _insert_each(conn, history, user_id=2)
+
+    # User 2's state is lost (no row, or one from an older layout) and rebuilt from history
+    if lost == 'row':
+        conn.execute('DELETE FROM alert_state WHERE user_id = 2')
+    else:
+        conn.execute("UPDATE alert_state SET state = json_set(state, '$.version', 1) WHERE user_id = 2")
+    conn.commit()
+
+    assert _insert_each(conn, recent, user_id=2) == _insert_each(conn, recent, user_id=1)
+    kept, restored = _state(conn, 1), _state(conn, 2)
+    assert restored['readings'] == kept['readings'] == len(readings)
+    assert restored['active'] == kept['active']
+    assert restored['recent'] == kept['recent']
+    assert restored['slope_sums'] == pytest.approx(kept['slope_sums'])
+    assert restored['ewma_systolic'] == pytest.approx(kept['ewma_systolic'])
@@ -0,0 +1,121 @@
+"""
+Per-row error reporting of the streaming bulk import.
+
+Rows that fail parsing or validation, and rows the database rejects, are
+reported with their line number; every other row of the file is imported,
+including the rest of a chunk the database rejected. Scoring is replaced by
+a stub so the tests need no trained model.
+"""
+
+import concurrent.futures
+import io
+import json
+
+import bulk_import
+
+HEADER = 'systolic_bp,diastolic_bp,blood_sugar,body_weight,hemoglobin,recorded_at\n'
+
+
+def _score(health_params_list):
+    """Stand-in for predict_comprehensive_batch"""
+    return [{
+        'risk_level': 'High' if params['systolic_bp'] >= 140 else 'Normal',
+        'detected_conditions': [],
+        'condition_details': {'anemia': {'probability': 0.1, 'severity': None, 'detected': False}}
+    } for params in health_params_list]
+
+
+def _import(conn, text, input_format='csv', **kwargs):
+    """Final summary of importing ``text``"""
+    rows = bulk_import.iter_rows(io.BytesIO(text.encode()), input_format)
+    *_, summary = bulk_import.import_records(rows, _score, conn, **kwargs)
+    return summary
+
+
+def _stored_systolic(conn, user_id=1):
+    """Systolic pressure of a user's stored readings, in insert order"""
+    return [row[0] for row in conn.execute(
+        'SELECT systolic_bp FROM health_records WHERE user_id = ? ORDER BY id', (user_id,))]
+
+
+def test_invalid_rows_are_reported_by_line_and_skipped(db):
+    conn = db.connection()
+    summary = _import(conn, HEADER + (
+        '120,80,95,62,12,2024-03-04T08:00:00Z\n'
+        'abc,80,95,62,12,\n'
+        '122,80,,62,12,\n'
+        '124,80,95,62,12,04/03/2024\n'
+        '126,80,95,62,12,2024-03-05\n'
+    ), user_id=1, chunk_size=2)
+
+    assert summary['done']
+    assert (summary['rows'], summary['imported'], summary['failed']) == (5, 2, 3)
+    assert [error['line'] for error in summary['errors']] == [3, 4, 5]
+    assert summary['errors'][0]['message'].startswith('Invalid number')
+    assert 'blood_sugar' in summary['errors'][1]['message']
+    assert 'recorded_at' in summary['errors'][2]['message']
+    assert _stored_systolic(conn) == [120, 126]
+    # recorded_at is stored in CURRENT_TIMESTAMP's UTC format
+    assert [row[0] for row in conn.execute('SELECT recorded_at FROM health_records ORDER BY id')] == [
+        '2024-03-04 08:00:00', '2024-03-05 00:00:00'
+    ]
+
+
+def test_rows_the_database_rejects_fail_alone(db):
+    conn = db.connection()
+    conn.execute('''
+        CREATE TRIGGER reject_implausible BEFORE INSERT ON health_records
+        WHEN NEW.systolic_bp > 300 BEGIN SELECT RAISE(ABORT, 'implausible systolic_bp'); END
+    ''')
+    conn.commit()
+    summary = _import(conn, HEADER + '\n'.join(
+        f'{systolic},80,95,62,12,2024-03-0{day}' for day, systolic in enumerate([120, 999, 130, 140, 998], start=1)
+    ) + '\n', user_id=1, chunk_size=3)
+
+    assert (summary['imported'], summary['failed'], summary['chunks']) == (3, 2, 2)
+    assert [error['line'] for error in summary['errors']] == [3, 6]
+    assert all('implausible systolic_bp' in error['message'] for error in summary['errors'])
+    assert _stored_systolic(conn) == [120, 130, 140]
+    # The retried rows were folded into the rollups exactly once
+    assert conn.execute("SELECT SUM(readings) FROM vital_rollups WHERE period = 'day'").fetchone() == (3,)
+    assert not conn.in_transaction
+
+
+def test_scoring_timeout_fails_the_chunk_only(db):
+    conn = db.connection()
+    calls = []
+
+    def score(health_params_list):
+        calls.append(len(health_params_list))
+        if len(calls) == 1:
+            raise concurrent.futures.TimeoutError()
+        return _score(health_params_list)
+
+    rows = bulk_import.iter_rows(io.BytesIO((HEADER + '120,80,95,62,12,\n' * 3).encode()), 'csv')
+    *_, summary = bulk_import.import_records(rows, score, conn, user_id=1, chunk_size=2)
+
+    assert (summary['imported'], summary['failed']) == (1, 2)
+    assert [error['message'] for error in summary['errors']] == ['Health analysis timed out'] * 2
+
+
+def test_ndjson_rows_go_to_their_user_column(db):
+    conn = db.connection()
+    lines = [
+        {'user_id': 1, 'systolic_bp': 120, 'diastolic_bp': 80, 'blood_sugar': 95, 'body_weight': 62, 'hemoglobin': 12},
+        {'user_id': 2, 'systolic_bp': 150, 'diastolic_bp': 95, 'blood_sugar': 95, 'body_weight': 70, 'hemoglobin': 11},
+        {'user_id': 'two', 'systolic_bp': 150, 'diastolic_bp': 95, 'blood_sugar': 95, 'body_weight': 70, 'hemoglobin': 11}
+    ]
+    text = '\n'.join(json.dumps(line) for line in lines) + '\n{not json\n'
+    summary = _import(conn, text, input_format='ndjson', user_column=True)
+
+    assert (summary['imported'], summary['failed']) == (2, 2)
+    assert [error['line'] for error in summary['errors']] == [3, 4]
+    assert _stored_systolic(conn, 1) == [120]
+    assert _stored_systolic(conn, 2) == [150]
+
+
+def test_error_list_is_capped_but_failures_are_counted(db):
+    summary = _import(db.connection(), HEADER + 'x,80,95,62,12,\n' * 5, user_id=1, max_errors=2)
+
+    assert summary['failed'] == 5
+    assert len(summary['errors']) == 2
@@ -0,0 +1,119 @@
+"""
+Parity of the compiled forest evaluator with scikit-learn's predict_proba.
+
+Small forests are trained for both condition backends ('multioutput': one
+forest per condition, 'native': one forest over every condition column),
+with a condition that never occurs so one output has a single class. The
+compiled probabilities must equal sklearn's bit for bit on random rows,
+rows exactly on and one ulp either side of every split, and rows with NaN.
+"""
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.multioutput import MultiOutputClassifier
+from sklearn.preprocessing import StandardScaler
+
+from ml_model.compiled_forest import CompiledForest, verify_parity
+
+N_FEATURES = 9
+BACKENDS = ['multioutput', 'native']
+
+
+def _training_data(n_samples=400, seed=0):
+    """Vital-sign-like rows with a risk label and four condition columns, the last never set"""
+    rng = np.random.default_rng(seed)
+    centers = np.array([120, 80, 100, 65, 12, 75, 0.2, 28, 24], dtype=float)
+    spreads = np.array([15, 10, 25, 10, 1.5, 10, 0.2, 5, 8], dtype=float)
+    X = centers + rng.normal(size=(n_samples, N_FEATURES)) * spreads
+    y_risk = np.digitize(X[:, 0] + X[:, 2] / 4, [140, 160])
+    y_conditions = np.stack([
+        (X[:, 0] >= 140) | (X[:, 1] >= 90),
+        X[:, 2] >= 126,
+        X[:, 4] < 11,
+        np.zeros(n_samples, dtype=bool)
+    ], axis=1).astype(int)
+    return X, y_risk, y_conditions
+
+
+def _fit(backend, seed=0):
+    """(forests as the predictor compiles them, scaler, training rows) for a backend"""
+    X, y_risk, y_conditions = _training_data(seed=seed)
+    scaler = StandardScaler().fit(X)
+    X_scaled = scaler.transform(X)
+
+    risk_model = RandomForestClassifier(n_estimators=8, max_depth=6, random_state=seed)
+    risk_model.fit(X_scaled, y_risk)
+    condition_forest = RandomForestClassifier(n_estimators=6, max_depth=5, random_state=seed)
+    if backend == 'native':
+        condition_forest.fit(X_scaled, y_conditions)
+        return [risk_model, condition_forest], scaler, X
+    condition_model = MultiOutputClassifier(condition_forest).fit(X_scaled, y_conditions)
+    return [risk_model] + list(condition_model.estimators_), scaler, X
+
+
+def _assert_same_probabilities(compiled, forests, scaler, X):
+    """Compiled probabilities equal sklearn's exactly for every forest and output"""
+    X_scaled = scaler.transform(X)
+    for forest, actual in zip(forests, compiled.predict_proba(X)):
+        expected = forest.predict_proba(X_scaled)
+        expected = expected if isinstance(expected, list) else [expected]
+        actual = actual if isinstance(actual, list) else [actual]
+        assert len(actual) == len(expected)
+        for e, a in zip(expected, actual):
+            assert e.shape == a.shape
+            assert np.array_equal(e, a)
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_random_rows(backend):
+    forests, scaler, X = _fit(backend)
+    compiled = CompiledForest(forests, scaler)
+    rows = _training_data(n_samples=2000, seed=1)[0]
+    _assert_same_probabilities(compiled, forests, scaler, rows)
+    _assert_same_probabilities(compiled, forests, scaler, X)
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_rows_on_split_thresholds(backend):
+    forests, scaler, X = _fit(backend)
+    compiled = CompiledForest(forests, scaler)
+    # Every split, exactly at and one ulp either side of its threshold
+    rows = compiled.boundary_samples(X, max_rows=100000)
+    split_count = int(np.sum(compiled.left != np.arange(compiled.left.shape[0])))
+    assert rows.shape[0] == 3 * split_count
+    _assert_same_probabilities(compiled, forests, scaler, rows)
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_rows_with_missing_values(backend):
+    forests, scaler, X = _fit(backend)
+    if not hasattr(forests[0].estimators_[0].tree_, 'missing_go_to_left'):
+        pytest.skip('this scikit-learn version rejects NaN inputs')
+    compiled = CompiledForest(forests, scaler)
+    rows = _training_data(n_samples=500, seed=2)[0]
+    rng = np.random.default_rng(3)
+    rows[rng.random(rows.shape) < 0.2] = np.nan
+    rows[0, :] = np.nan
+    _assert_same_probabilities(compiled, forests, scaler, rows)
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_single_class_condition(backend):
+    forests, scaler, X = _fit(backend)
+    compiled = CompiledForest(forests, scaler)
+    never = compiled.predict_proba(X)[-1]
+    # The last condition never occurred in training: one class, probability 1
+    never = never[-1] if isinstance(never, list) else never
+    assert never.shape == (X.shape[0], 1)
+    assert np.all(never == 1.0)
+    labels = compiled.predict(X)[-1]
+    if backend == 'native':
+        labels = labels[:, -1]
+    assert np.all(labels == 0)
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_verify_parity(backend):
+    forests, scaler, X = _fit(backend)
+    assert verify_parity(CompiledForest(forests, scaler), forests, scaler, X) > X.shape[0]
@@ -0,0 +1,190 @@
+"""
+The schema migration runner on databases created before any migration.
+
+A legacy database has the original health_records table without the
+enhanced model columns. Migrations must apply in order, each recorded once
+in schema_version, leave the database unchanged when run again, resume
+after the versions already applied and roll a failing migration back.
+"""
+
+import json
+
+import pytest
+
+import migrations
+from database import ConnectionManager
+
+VERSIONS = [version for version, _, _ in migrations.MIGRATIONS]
+
+CONDITION_DETAILS = {
+    'gestational_diabetes': {'probability': 0.72, 'severity': 'moderate', 'detected': True},
+    'anemia': {'probability': 0.08, 'severity': None, 'detected': False}
+}
+
+
+def _legacy_database(tmp_path):
+    """Database with the pre-migration users and health_records tables and three readings"""
+    db = ConnectionManager(str(tmp_path / 'legacy.db'))
+    conn = db.connection()
+    conn.execute('''
+        CREATE TABLE users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            email TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            name TEXT NOT NULL,
+            age INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE health_records (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            systolic_bp INTEGER NOT NULL,
+            diastolic_bp INTEGER NOT NULL,
+            blood_sugar REAL NOT NULL,
+            body_weight REAL NOT NULL,
+            hemoglobin REAL NOT NULL,
+            risk_level TEXT NOT NULL,
+            recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+    conn.execute("INSERT INTO users (email, password_hash, name) VALUES ('a@example.com', 'x', 'A')")
+    conn.executemany('''
+        INSERT INTO health_records
+        (user_id, systolic_bp, diastolic_bp, blood_sugar, body_weight, hemoglobin, risk_level, recorded_at)
+        VALUES (1, ?, 80, 95, 62, 12, ?, ?)
+    ''', [(118, 'Normal', '2024-03-04 08:00:00'),
+          (126, 'Normal', '2024-03-04 20:00:00'),
+          (152, 'High', '2024-03-12 08:00:00')])
+    conn.commit()
+    return db
+
+
+def _dump(conn):
+    """Every schema object and row of the database, for before/after comparisons"""
+    return list(conn.iterdump())
+
+
+def test_legacy_database_gets_every_migration_in_order(tmp_path):
+    db = _legacy_database(tmp_path)
+    conn = db.connection()
+
+    assert migrations.migrate(conn) == VERSIONS
+    assert conn.execute('SELECT version, description FROM schema_version ORDER BY version').fetchall() == [
+        (version, description) for version, description, _ in migrations.MIGRATIONS
+    ]
+
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(health_records)')}
+    assert {'heart_rate', 'protein_urine', 'age', 'gestational_week',
+            'detected_conditions', 'condition_details'} <= columns
+    indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {'idx_health_records_user_recorded', 'idx_pregnancy_profiles_user_active',
+            'idx_record_conditions_condition_probability', 'idx_health_records_recorded',
+            'idx_health_records_user_id', 'idx_report_jobs_user_key', 'idx_alerts_user'} <= indexes
+
+    # Migration 7 backfills the rollups of the existing readings
+    rollups = conn.execute('''
+        SELECT period, period_start, readings, systolic_bp_min, systolic_bp_max, normal_count, high_count
+        FROM vital_rollups ORDER BY period, period_start
+    ''').fetchall()
+    assert rollups == [
+        ('day', '2024-03-04', 2, 118, 126, 2, 0),
+        ('day', '2024-03-12', 1, 152, 152, 0, 1),
+        ('week', '2024-03-04', 2, 118, 126, 2, 0),
+        ('week', '2024-03-11', 1, 152, 152, 0, 1)
+    ]
+    db.close_all()
+
+
+def test_running_again_changes_nothing(tmp_path):
+    db = _legacy_database(tmp_path)
+    conn = db.connection()
+    migrations.migrate(conn)
+    before = _dump(conn)
+
+    assert migrations.migrate(conn) == []
+    assert _dump(conn) == before
+    assert migrations.applied_versions(conn) == set(VERSIONS)
+    db.close_all()
+
+
+def test_resumes_after_the_applied_versions(tmp_path, monkeypatch):
+    db = _legacy_database(tmp_path)
+    conn = db.connection()
+    monkeypatch.setattr(migrations, 'MIGRATIONS', migrations.MIGRATIONS[:4])
+    assert migrations.migrate(conn) == VERSIONS[:4]
+
+    monkeypatch.undo()
+    assert migrations.migrate(conn) == VERSIONS[4:]
+    assert migrations.applied_versions(conn) == set(VERSIONS)
+    db.close_all()
+
+
+def test_failing_migration_is_rolled_back(tmp_path, monkeypatch):
+    db = _legacy_database(tmp_path)
+    conn = db.connection()
+
+    def broken(conn):
+        conn.execute('CREATE TABLE half_done (id INTEGER)')
+        raise RuntimeError('broken migration')
+
+    monkeypatch.setattr(migrations, 'MIGRATIONS', migrations.MIGRATIONS + [(999, 'Broken', broken)])
+    with pytest.raises(RuntimeError):
+        migrations.migrate(conn)
+
+    # Earlier migrations stay applied; nothing of the failed one is left
+    assert migrations.applied_versions(conn) == set(VERSIONS)
+    assert conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'half_done'").fetchone() is None
+    assert not conn.in_transaction
+    db.close_all()
+
+
+def _database_with_condition_details(tmp_path):
+    """Database with the enhanced columns and two readings whose predictions are JSON only"""
+    db = ConnectionManager(str(tmp_path / 'details.db'))
+    conn = db.connection()
+    migrations.create_base_schema(conn)
+    conn.executemany('''
+        INSERT INTO health_records
+        (user_id, systolic_bp, diastolic_bp, blood_sugar, body_weight, hemoglobin, risk_level, condition_details)
+        VALUES (1, 120, 80, 95, 62, 12, 'Normal', ?)
+    ''', [(json.dumps(CONDITION_DETAILS),), (json.dumps(CONDITION_DETAILS),)])
+    conn.commit()
+    return db
+
+
+def test_condition_details_move_to_record_conditions(tmp_path):
+    db = _database_with_condition_details(tmp_path)
+    conn = db.connection()
+    migrations.migrate(conn)
+
+    assert conn.execute('''
+        SELECT record_id, user_id, condition, probability, severity, detected
+        FROM record_conditions ORDER BY record_id, condition
+    ''').fetchall() == [
+        (1, 1, 'anemia', 0.08, None, 0), (1, 1, 'gestational_diabetes', 0.72, 'moderate', 1),
+        (2, 1, 'anemia', 0.08, None, 0), (2, 1, 'gestational_diabetes', 0.72, 'moderate', 1)
+    ]
+    assert conn.execute('SELECT condition_details FROM health_records').fetchall() == [('{}',), ('{}',)]
+    db.close_all()
+
+
+def test_condition_details_kept_when_record_conditions_differ(tmp_path, monkeypatch):
+    db = _database_with_condition_details(tmp_path)
+    conn = db.connection()
+    # Up to the backfill (migration 5), which leaves the JSON in place
+    monkeypatch.setattr(migrations, 'MIGRATIONS', migrations.MIGRATIONS[:5])
+    migrations.migrate(conn)
+    assert conn.execute("SELECT COUNT(*) FROM health_records WHERE condition_details != '{}'").fetchone() == (2,)
+
+    conn.execute("DELETE FROM record_conditions WHERE record_id = 2 AND condition = 'anemia'")
+    conn.commit()
+    monkeypatch.undo()
+    migrations.migrate(conn)
+
+    details = dict(conn.execute('SELECT id, condition_details FROM health_records'))
+    assert details[1] == '{}'
+    assert json.loads(details[2]) == CONDITION_DETAILS
+    db.close_all()
@@ -0,0 +1,117 @@
+"""
+Incremental vital_rollups updates against a full rebuild.
+
+Readings are inserted the way the API does, in several transactions, out
+of time order, for two users and across day and ISO week boundaries. The
+rollups folded in by update_rollups must equal the ones rebuild_rollups
+computes from health_records.
+"""
+
+import random
+
+import pytest
+
+import rollups
+from records import insert_health_records
+
+
+def _reading(rng):
+    """Random health parameters and a matching stand-in model result"""
+    params = {
+        'systolic_bp': rng.randint(100, 170), 'diastolic_bp': rng.randint(60, 110),
+        'blood_sugar': round(rng.uniform(70, 180), 1), 'body_weight': round(rng.uniform(50, 90), 1),
+        'hemoglobin': round(rng.uniform(9, 14), 1), 'heart_rate': 75, 'protein_urine': 0.1,
+        'age': 28, 'gestational_week': 20
+    }
+    ai_results = {
+        'risk_level': rng.choice(rollups.RISK_LEVELS),
+        'detected_conditions': [],
+        'condition_details': {}
+    }
+    return params, ai_results
+
+
+def _insert_history(conn, seed=0):
+    """Insert batches of readings for users 1 and 2 over three weeks, newest and oldest mixed"""
+    rng = random.Random(seed)
+    for batch in range(12):
+        user_id = 1 + batch % 2
+        readings = [_reading(rng) for _ in range(rng.randint(1, 6))]
+        recorded_at = [
+            f'2024-03-{rng.randint(1, 21):02d} {rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00'
+            for _ in readings
+        ]
+        insert_health_records(conn.cursor(), user_id,
+                              [params for params, _ in readings],
+                              [ai_results for _, ai_results in readings],
+                              recorded_at)
+        conn.commit()
+
+
+def _rollups(conn):
+    """vital_rollups as {(user_id, period, period_start): row}"""
+    columns = [row[1] for row in conn.execute('PRAGMA table_info(vital_rollups)')]
+    return {
+        (row[0], row[1], row[2]): dict(zip(columns, row))
+        for row in conn.execute('SELECT * FROM vital_rollups')
+    }
+
+
+def _assert_same_rollups(actual, expected):
+    """Equal keys and counts; sums equal up to floating point summation order"""
+    assert actual.keys() == expected.keys()
+    for key, row in expected.items():
+        assert actual[key] == pytest.approx(row, rel=1e-12), key
+
+
+def test_incremental_updates_equal_a_rebuild(db):
+    conn = db.connection()
+    _insert_history(conn)
+    incremental = _rollups(conn)
+    assert incremental
+
+    rollups.rebuild_rollups(conn)
+    _assert_same_rollups(incremental, _rollups(conn))
+    # The rebuild is chunked by id range; chunk boundaries do not matter
+    rollups.rebuild_rollups(conn, chunk_size=7)
+    _assert_same_rollups(incremental, _rollups(conn))
+
+
+def test_rebuilding_one_user_leaves_the_others(db):
+    conn = db.connection()
+    _insert_history(conn)
+    incremental = _rollups(conn)
+
+    conn.execute('UPDATE vital_rollups SET readings = 0 WHERE user_id = 2')
+    conn.commit()
+    rollups.rebuild_rollups(conn, user_id=1)
+    after = _rollups(conn)
+    assert all(after[key]['readings'] == 0 for key in after if key[0] == 2)
+
+    rollups.rebuild_rollups(conn, user_id=2)
+    _assert_same_rollups(_rollups(conn), incremental)
+
+
+def test_rollups_match_the_readings(db):
+    conn = db.connection()
+    _insert_history(conn)
+
+    for period in rollups.PERIODS:
+        for entry in rollups.fetch_rollups(conn, 1, period):
+            expression = rollups.PERIODS[period]
+            rows = conn.execute(f'''
+                SELECT systolic_bp, risk_level FROM health_records
+                WHERE user_id = 1 AND {expression} = ?
+            ''', (entry['period_start'],)).fetchall()
+            systolic = [row[0] for row in rows]
+            assert entry['readings'] == len(rows)
+            assert entry['systolic_bp']['min'] == min(systolic)
+            assert entry['systolic_bp']['max'] == max(systolic)
+            assert entry['systolic_bp']['mean'] == pytest.approx(sum(systolic) / len(systolic))
+            assert entry['risk_levels'] == {
+                level: sum(row[1] == level for row in rows) for level in rollups.RISK_LEVELS
+            }
+
+    # Weeks start on Monday: 2024-03-04 and 2024-03-11 are Mondays
+    weeks = [entry['period_start'] for entry in rollups.fetch_rollups(conn, 1, 'week')]
+    assert set(weeks) <= {'2024-02-26', '2024-03-04', '2024-03-11', '2024-03-18'}
@@ -0,0 +1,243 @@
+"""
+Vectorized trend analytics over a patient's vital-sign history.
+
+A history is loaded into NumPy arrays, either from the vital_rollups table
+(one point per day or week, weighted by its reading count) or from the raw
+readings, and every statistic is computed with array operations over all
+vitals at once: time-windowed rolling means, EWMA, weighted least-squares
+slopes per week and z-score outliers against the patient's own baseline.
+Rollups keep even years of minute-level home-monitor data to a few thousand
+points; raw readings are fetched in chunks converted straight to arrays.
+"""
+
+import datetime
+
+import numpy as np
+
+from rollups import PERIODS, VITALS
+
+RESOLUTIONS = list(PERIODS) + ['reading']
+
+# julianday() of 1970-01-01: time is measured in days since the epoch
+_JULIAN_EPOCH = 2440587.5
+_EPOCH = datetime.datetime(1970, 1, 1)
+
+
+class VitalSeries:
+    """Points of a patient's history in time order.
+
+    ``days`` holds each point's time in days since the epoch, ``counts`` the
+    readings it aggregates and ``sums`` (one column per vital, in VITALS
+    order) the sum of those readings, so ``means`` are the plotted values.
+    """
+
+    def __init__(self, days, counts, sums):
+        self.days = days
+        self.counts = counts
+        self.sums = sums
+
+    @property
+    def means(self):
+        """Mean of each vital per point"""
+        return self.sums / self.counts[:, None]
+
+    def __len__(self):
+        """Number of points"""
+        return len(self.days)
+
+
+def _series_from_rows(rows):
+    """VitalSeries from (day, count, sum per vital...) rows, dropping unparseable timestamps"""
+    data = np.array(rows, dtype=float).reshape(-1, len(VITALS) + 2)
+    data = data[~np.isnan(data).any(axis=1)]
+    return VitalSeries(data[:, 0], data[:, 1], data[:, 2:])
+
+
+def load_rollup_series(conn, user_id, period='day', since=None, until=None):
+    """A user's daily or weekly rollups as a VitalSeries"""
+    if period not in PERIODS:
+        raise ValueError(f"period must be one of {', '.join(PERIODS)}")
+
+    filters = ['user_id = ?', 'period = ?']
+    params = [user_id, period]
+    if since:
+        filters.append('period_start >= ?')
+        params.append(since)
+    if until:
+        filters.append('period_start < ?')
+        params.append(until)
+
+    rows = conn.execute(f'''
+        SELECT julianday(period_start) - {_JULIAN_EPOCH}, readings, {', '.join(f'{vital}_sum' for vital in VITALS)}
+        FROM vital_rollups
+        WHERE {' AND '.join(filters)}
+        ORDER BY period_start
+    ''', params).fetchall()
+    return _series_from_rows(rows)
+
+
+def load_reading_series(conn, user_id, since=None, until=None, chunk_size=10000):
+    """A user's individual readings as a VitalSeries (each point counts one reading)"""
+    filters = ['user_id = ?']
+    params = [user_id]
+    if since:
+        filters.append('recorded_at >= ?')
+        params.append(since)
+    if until:
+        filters.append('recorded_at < ?')
+        params.append(until)
+
+    cursor = conn.execute(f'''
+        SELECT julianday(recorded_at) - {_JULIAN_EPOCH}, 1, {', '.join(VITALS)}
+        FROM health_records
+        WHERE {' AND '.join(filters)}
+        ORDER BY recorded_at, id
+    ''', params)
+    chunks = []
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        chunks.append(np.array(rows, dtype=float))
+    if not chunks:
+        return _series_from_rows([])
+    return _series_from_rows(np.concatenate(chunks))
+
+
+def load_series(conn, user_id, resolution='day', since=None, until=None):
+    """VitalSeries at a resolution: 'day' or 'week' rollups, or every 'reading'"""
+    if resolution == 'reading':
+        return load_reading_series(conn, user_id, since, until)
+    if resolution not in PERIODS:
+        raise ValueError(f"resolution must be one of {', '.join(RESOLUTIONS)}")
+    return load_rollup_series(conn, user_id, resolution, since, until)
+
+
+def rolling_mean(series, window_days):
+    """Mean of the readings in the ``window_days`` ending at each point, weighted by reading count"""
+    cumulative_sums = np.vstack([np.zeros(series.sums.shape[1]), np.cumsum(series.sums, axis=0)])
+    cumulative_counts = np.concatenate([[0.0], np.cumsum(series.counts)])
+    # First point inside each window (the window always contains the point itself)
+    starts = np.searchsorted(series.days, series.days - window_days, side='right')
+    ends = np.arange(1, len(series) + 1)
+    return (cumulative_sums[ends] - cumulative_sums[starts]) / (cumulative_counts[ends] - cumulative_counts[starts])[:, None]
+
+
+def ewma(values, span):
+    """Exponentially weighted moving average down the rows (alpha = 2 / (span + 1), seeded with the first row).
+
+    y[t] = (1 - alpha) * y[t - 1] + alpha * x[t] is evaluated in closed form
+    within blocks short enough for beta ** -k to stay in floating point
+    range, carrying y across blocks: a Python step per block, not per point.
+    """
+    values = np.asarray(values, dtype=float)
+    if not len(values):
+        return values.copy()
+
+    alpha = 2.0 / (span + 1)
+    beta = 1.0 - alpha
+    if beta <= 0:
+        return values.copy()
+    block = max(1, min(len(values), int(-200 / np.log10(beta))))
+    powers = beta ** np.arange(block + 1)
+    inverse_powers = 1.0 / powers[:block]
+
+    result = np.empty_like(values)
+    carry = values[0]
+    for start in range(0, len(values), block):
+        chunk = values[start:start + block]
+        k = len(chunk)
+        # y[s + j] = beta^(j+1) * carry + alpha * sum_{i<=j} beta^(j-i) * x[s + i]
+        weighted = np.cumsum(chunk * inverse_powers[:k, None], axis=0)
+        result[start:start + k] = (powers[1:k + 1, None] * carry
+                                   + alpha * powers[:k, None] * weighted)
+        carry = result[start + k - 1]
+    return result
+
+
+def slope_per_week(series):
+    """Weighted least-squares slope of each vital against time, in units per week (None when undefined)"""
+    weights = series.counts
+    total = weights.sum()
+    if len(series) < 2 or total == 0:
+        return [None] * len(VITALS)
+    means = series.means
+    t = series.days - (weights @ series.days) / total
+    spread = weights @ (t * t)
+    if spread == 0:
+        return [None] * len(VITALS)
+    return ((weights * t) @ means / spread * 7).tolist()
+
+
+def baseline(series):
+    """Reading-weighted mean and standard deviation of each vital over the whole series"""
+    total = series.counts.sum()
+    mean = series.sums.sum(axis=0) / total
+    variance = series.counts @ ((series.means - mean) ** 2) / total
+    return mean, np.sqrt(variance)
+
+
+def _day_label(days, resolution):
+    """Timestamp string of a point"""
+    value = _EPOCH + datetime.timedelta(seconds=round(float(days) * 86400))
+    return value.strftime('%Y-%m-%d %H:%M:%S') if resolution == 'reading' else value.strftime('%Y-%m-%d')
+
+
+def _rounded(values):
+    """Array values rounded to 2 decimals as a list"""
+    return np.round(values, 2).tolist()
+
+
+def analyze(series, resolution='day', window_days=7, span=7, z_threshold=3.0,
+            max_points=500, max_outliers=100):
+    """Trend statistics of a VitalSeries as a JSON-ready dict.
+
+    Slopes, baselines and outliers cover the whole series; the per-point
+    arrays (values, rolling mean, EWMA) are returned for the latest
+    ``max_points`` points only, and at most ``max_outliers`` outliers per
+    vital (the largest |z|), so the response size does not grow with the
+    history.
+    """
+    result = {
+        'resolution': resolution,
+        'points': len(series),
+        'readings': int(series.counts.sum()),
+        'window_days': window_days,
+        'span': span,
+        'z_threshold': z_threshold,
+        'timestamps': [],
+        'vitals': {}
+    }
+    if not len(series):
+        return result
+
+    means = series.means
+    rolling = rolling_mean(series, window_days)
+    smoothed = ewma(means, span)
+    slopes = slope_per_week(series)
+    baseline_mean, baseline_std = baseline(series)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z_scores = np.where(baseline_std > 0, (means - baseline_mean) / baseline_std, 0.0)
+
+    tail = slice(max(0, len(series) - max_points), len(series))
+    result['timestamps'] = [_day_label(days, resolution) for days in series.days[tail]]
+
+    for i, vital in enumerate(VITALS):
+        outliers = np.flatnonzero(np.abs(z_scores[:, i]) > z_threshold)
+        if len(outliers) > max_outliers:
+            strongest = np.argpartition(-np.abs(z_scores[outliers, i]), max_outliers)[:max_outliers]
+            outliers = np.sort(outliers[strongest])
+        result['vitals'][vital] = {
+            'values': _rounded(means[tail, i]),
+            'rolling_mean': _rounded(rolling[tail, i]),
+            'ewma': _rounded(smoothed[tail, i]),
+            'slope_per_week': None if slopes[i] is None else round(slopes[i], 3),
+            'baseline': {'mean': round(float(baseline_mean[i]), 2), 'std': round(float(baseline_std[i]), 2)},
+            'outliers': [
+                {'timestamp': _day_label(series.days[j], resolution),
+                 'value': round(float(means[j, i]), 2),
+                 'z_score': round(float(z_scores[j, i]), 2)}
+                for j in outliers
+            ]
+        }
+    return result
@@ -4,6 +4,7 @@ import json
 class PregnancyTracker:
     def __init__(self):
         self.weekly_guidance = self._load_weekly_guidance()
+        self.guidance_by_week = self._materialize_guidance()
     
     def create_profile(self, last_menstrual_period):
         """Create pregnancy profile with calculated dates and current week"""
@@ -33,7 +34,16 @@ class PregnancyTracker:
         if week < 1 or week > 42:
             return {"error": "Invalid week number"}
         
-        return self.weekly_guidance.get(str(week), self._get_default_guidance(week))
+        return self.guidance_by_week[week]
+    
+    def _materialize_guidance(self):
+        """Build the guidance for all 42 weeks once, with trimester info (treat as read-only)"""
+        guidance_by_week = {}
+        for week in range(1, 43):
+            guidance = dict(self.weekly_guidance.get(str(week)) or self._get_default_guidance(week))
+            guidance['trimester'] = self.get_trimester_info(week)
+            guidance_by_week[week] = guidance
+        return guidance_by_week
     
     def _load_weekly_guidance(self):
         """Load comprehensive weekly pregnancy guidance"""
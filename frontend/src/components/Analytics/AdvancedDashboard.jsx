@@ -57,8 +57,18 @@ const AdvancedDashboard = () => {
 
   const fetchHealthData = async () => {
     try {
-      // For demo purposes, use sample data
-      setHealthData(sampleHealthData)
+      // Latest page of readings, only the columns the charts plot (newest first)
+      const response = await axios.get('/health-records', {
+        params: {
+          limit: 100,
+          fields: 'systolic_bp,diastolic_bp,blood_sugar,body_weight,hemoglobin,risk_level'
+        }
+      })
+      const records = response.data.records
+        .map(record => ({ ...record, date: record.recorded_at.slice(0, 10) }))
+        .reverse()
+      // For demo purposes, fall back to sample data when there is no history yet
+      setHealthData(records.length > 0 ? records : sampleHealthData)
     } catch (error) {
       console.error('Error fetching health data:', error)
       setHealthData(sampleHealthData)
@@ -15,6 +15,8 @@ import {
 } from 'lucide-react'
 import { format } from 'date-fns'
 
+const STREAM_FALLBACK_POLL_MS = 30000
+
 const Dashboard = () => {
   const [dashboardData, setDashboardData] = useState(null)
   const [loading, setLoading] = useState(true)
@@ -23,6 +25,26 @@ const Dashboard = () => {
 
   useEffect(() => {
     fetchDashboardData()
+
+    // Reload when the server streams a new reading or profile instead of polling.
+    // EventSource cannot send headers, so the token goes in the query string
+    const token = (axios.defaults.headers.common['Authorization'] || '').replace('Bearer ', '')
+    const source = new EventSource(`${axios.defaults.baseURL}/stream?access_token=${encodeURIComponent(token)}`)
+    const reload = () => fetchDashboardData()
+    const eventTypes = ['health_record', 'health_records', 'import', 'pregnancy_profile', 'resync']
+    eventTypes.forEach((type) => source.addEventListener(type, reload))
+
+    // The server refuses streams (503) when too many are open; poll instead
+    let pollTimer = null
+    source.onerror = () => {
+      if (source.readyState === EventSource.CLOSED && pollTimer === null) {
+        pollTimer = setInterval(reload, STREAM_FALLBACK_POLL_MS)
+      }
+    }
+    return () => {
+      source.close()
+      if (pollTimer !== null) clearInterval(pollTimer)
+    }
   }, [])
 
   const fetchDashboardData = async () => {